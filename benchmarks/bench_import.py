@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name
+
+"""Measure the start up time of HPCCM
+
+Each case is run in a fresh Python interpreter, so the measurement
+includes the interpreter start up and module import time.  The
+`python` case is the bare interpreter start up time for reference.
+
+Usage:
+$ python benchmarks/bench_import.py [--repeat N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.dirname(here)
+basic = os.path.join(root, 'recipes', 'examples', 'basic.py')
+
+cases = [
+    ('python', 'pass'),
+    ('import hpccm', 'import hpccm'),
+    ('import hpccm.cli', 'import hpccm.cli'),
+    ('hpccm --recipe basic.py',
+     'import sys; sys.argv = ["hpccm", "--recipe", {!r}]; '
+     'import hpccm.cli; hpccm.cli.main()'.format(basic)),
+    ('hpccm --recipe basic.py --cpu-target haswell',
+     'import sys; sys.argv = ["hpccm", "--recipe", {!r}, '
+     '"--cpu-target", "haswell"]; '
+     'import hpccm.cli; hpccm.cli.main()'.format(basic))]
+
+def run(code):
+    """Run code in a new interpreter"""
+    env = dict(os.environ, PYTHONPATH=root)
+    with open(os.devnull, 'w') as devnull:
+        subprocess.check_call([sys.executable, '-c', code], env=env,
+                              stdout=devnull)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='number of times to run each case')
+    args = parser.parse_args()
+
+    print('{0:<48} {1:>10} {2:>10}'.format('case', 'min (ms)',
+                                           'median (ms)'))
+    for name, code in cases:
+        t = sorted(timeit.repeat(lambda: run(code), number=1,
+                                 repeat=args.repeat))
+        print('{0:<48} {1:>10.1f} {2:>10.1f}'.format(
+            name, t[0] * 1000, t[len(t) // 2] * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name
+
+"""HPCCM benchmark suite
+
+Times the start up of the command line tool, the evaluation and
+rendering of every recipe under `recipes/` in each container format,
+and micro-benchmarks of frequently used templates and primitives.
+The results are written as JSON so that they can be compared between
+commits.
+
+Usage:
+$ python benchmarks/suite.py run -o before.json
+$ git checkout <other commit>
+$ python benchmarks/suite.py run -o after.json
+$ python benchmarks/suite.py compare before.json after.json
+"""
+
+from __future__ import print_function
+
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.dirname(here)
+sys.path.insert(0, root)
+sys.path.insert(0, here)
+
+import bench_import # pylint: disable=wrong-import-position
+
+import hpccm # pylint: disable=wrong-import-position
+import hpccm.config # pylint: disable=wrong-import-position
+from hpccm.common import container_type # pylint: disable=wrong-import-position
+
+# The hpccm.recipe module is shadowed by the hpccm.recipe function
+recipe_module = sys.modules['hpccm.recipe']
+
+# User arguments passed to every recipe
+USERARG = {'eula': 'yes', 'nvhpc_eula_accept': 'yes'}
+
+formats = ['docker', 'singularity', 'bash']
+
+def find_recipes():
+    """Return the paths of the recipes, relative to `recipes/`.
+    Standalone Python scripts that import hpccm, i.e., files starting
+    with '#!', are not recipes and are excluded."""
+    recipes = []
+    for dirpath, dirnames, filenames in os.walk(os.path.join(root,
+                                                             'recipes')):
+        dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+        for f in sorted(filenames):
+            path = os.path.join(dirpath, f)
+            if not f.endswith('.py'):
+                continue
+            with open(path) as fp:
+                if fp.readline().startswith('#!'):
+                    continue
+            recipes.append(os.path.relpath(path, os.path.join(root,
+                                                              'recipes')))
+    return recipes
+
+@contextlib.contextmanager
+def record_stages(stages):
+    """Capture the Stage instances created by hpccm.recipe()"""
+
+    class _stage(recipe_module.Stage):
+        def __init__(self, **kwargs):
+            super(_stage, self).__init__(**kwargs)
+            stages.append(self)
+
+    original = recipe_module.Stage
+    recipe_module.Stage = _stage
+    try:
+        yield
+    finally:
+        recipe_module.Stage = original
+
+def recipe_benchmarks(recipes):
+    """Return the recipe evaluation and rendering benchmarks"""
+
+    benchmarks = []
+    for path in recipes:
+        rf = os.path.join(root, 'recipes', path)
+        for fmt in formats:
+            ctype = container_type[fmt.upper()]
+
+            def evaluate(rf=rf, ctype=ctype):
+                with hpccm.config.context():
+                    return hpccm.recipe(rf, ctype=ctype, userarg=USERARG,
+                                        raise_exceptions=True)
+
+            try:
+                if not evaluate().strip():
+                    # Not a recipe, e.g., a script that imports hpccm
+                    continue
+            except Exception as e: # pylint: disable=broad-except
+                print('skipping {0} ({1}): {2}'.format(path, fmt, e),
+                      file=sys.stderr)
+                continue
+
+            # Rendering only, i.e., str(Stage) of the evaluated recipe.
+            # The recipe is evaluated again, untimed, before each call
+            # so that nothing is reused from a previous call.
+            def evaluate_stages(evaluate=evaluate):
+                stages = []
+                with record_stages(stages):
+                    evaluate()
+                return stages
+
+            def render(stages, ctype=ctype):
+                with hpccm.config.context(ctype=ctype):
+                    return [str(s) for s in stages]
+
+            benchmarks.append(('recipe/{0}/{1}'.format(path, fmt), evaluate))
+            benchmarks.append(('render/{0}/{1}'.format(path, fmt), render,
+                               evaluate_stages))
+
+    return benchmarks
+
+def micro_benchmarks():
+    """Return micro-benchmarks for frequently used templates and
+    primitives"""
+
+    from hpccm.primitives.copy import copy
+    from hpccm.templates.ConfigureMake import ConfigureMake
+    from hpccm.templates.downloader import downloader
+
+    cm = ConfigureMake()
+    def configure_step():
+        return cm.configure_step(
+            directory='/var/tmp/openmpi-4.0.5',
+            environment={'CC': 'gcc', 'CXX': 'g++', 'FC': 'gfortran'},
+            opts=['--disable-getpwuid', '--enable-orterun-prefix-by-default',
+                  '--with-cuda', '--with-verbs'])
+
+    def download_step():
+        return downloader(
+            url='https://download.open-mpi.org/release/open-mpi/v4.0/openmpi-4.0.5.tar.bz2').download_step(wd='/var/tmp')
+
+    def repository_step():
+        return downloader(repository='https://github.com/openucx/ucx.git',
+                          branch='v1.9.0').download_step(wd='/var/tmp')
+
+    c = copy(_from='build', src=['/usr/local/openmpi', '/usr/local/ucx'],
+             dest='/usr/local')
+
+    benchmarks = [('micro/ConfigureMake.configure_step', configure_step),
+                  ('micro/downloader.download_step/url', download_step),
+                  ('micro/downloader.download_step/repository',
+                   repository_step)]
+    for fmt in formats:
+        def copy_str(fmt=fmt):
+            with hpccm.config.context(ctype=fmt):
+                return str(c)
+        benchmarks.append(('micro/copy.__str__/{}'.format(fmt), copy_str))
+
+    return benchmarks
+
+def measure(func, repeat, min_time, setup=None):
+    """Time a function, returning a list of seconds per call.  If setup
+    is specified, it is called before each call, untimed, and its
+    return value is passed to the function."""
+
+    if setup:
+        def timed(number):
+            t = 0
+            for _ in range(number):
+                arg = setup()
+                start = timeit.default_timer()
+                func(arg)
+                t += timeit.default_timer() - start
+            return t
+    else:
+        timed = timeit.Timer(func).timeit
+
+    # Calibrate the number of calls per sample
+    number = 1
+    while True:
+        t = timed(number)
+        if t >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if t < min_time / 10 else 2
+
+    return [timed(number) / number for _ in range(repeat)]
+
+def summarize(samples):
+    """Return statistics of a list of samples"""
+    return {'min': min(samples),
+            'median': statistics.median(samples),
+            'mean': statistics.mean(samples),
+            'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'samples': samples}
+
+def git_revision():
+    """Return the current git revision, if available"""
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'], cwd=root,
+            stderr=subprocess.STDOUT).decode('utf-8').strip()
+    except Exception: # pylint: disable=broad-except
+        return None
+
+def run(args):
+    """Run the benchmarks"""
+
+    # Suppress the warnings emitted by the recipes
+    logging.disable(logging.WARNING)
+
+    results = {}
+
+    # Some recipes write files to the current directory, e.g., SCI-F
+    # recipes, so run in a temporary directory
+    cwd = os.getcwd()
+    tmpdir = tempfile.mkdtemp()
+    os.chdir(tmpdir)
+    try:
+        benchmarks = [('import/{}'.format(name),
+                       lambda code=code: bench_import.run(code))
+                      for name, code in bench_import.cases]
+        benchmarks.extend(recipe_benchmarks(find_recipes()))
+        benchmarks.extend(micro_benchmarks())
+
+        if args.filter:
+            benchmarks = [b for b in benchmarks
+                          if re.search(args.filter, b[0])]
+
+        for benchmark in benchmarks:
+            name, func = benchmark[:2]
+            setup = benchmark[2] if len(benchmark) > 2 else None
+            if name.startswith('import/'):
+                # Each sample is a new interpreter, so no calibration
+                samples = [timeit.timeit(func, number=1)
+                           for _ in range(args.repeat)]
+            else:
+                samples = measure(func, args.repeat, args.min_time,
+                                  setup=setup)
+            results[name] = summarize(samples)
+            print('{0:<72} {1:>10.3f} ms'.format(
+                name, results[name]['median'] * 1000))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmpdir)
+
+    data = {'meta': {'date': datetime.datetime.now().isoformat(),
+                     'hpccm': hpccm.__version__,
+                     'platform': platform.platform(),
+                     'python': platform.python_version(),
+                     'revision': git_revision()},
+            'benchmarks': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+def compare(args):
+    """Compare two benchmark results"""
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.contender) as f:
+        contender = json.load(f)
+
+    print('baseline:  {0} ({1})'.format(baseline['meta'].get('revision'),
+                                        baseline['meta'].get('date')))
+    print('contender: {0} ({1})'.format(contender['meta'].get('revision'),
+                                        contender['meta'].get('date')))
+    print('{0:<72} {1:>10} {2:>10} {3:>7}'.format('benchmark', 'baseline',
+                                                  'contender', 'ratio'))
+
+    regressions = []
+    for name in sorted(set(baseline['benchmarks']) &
+                       set(contender['benchmarks'])):
+        b = baseline['benchmarks'][name][args.statistic]
+        c = contender['benchmarks'][name][args.statistic]
+        ratio = c / b if b else float('inf')
+        flag = ''
+        if ratio > args.threshold:
+            flag = ' *'
+            regressions.append(name)
+        print('{0:<72} {1:>10.3f} {2:>10.3f} {3:>7.2f}{4}'.format(
+            name, b * 1000, c * 1000, ratio, flag))
+
+    for label, a, b in [('baseline', baseline, contender),
+                        ('contender', contender, baseline)]:
+        missing = set(a['benchmarks']) - set(b['benchmarks'])
+        if missing:
+            print('{0} benchmark(s) only in the {1}'.format(len(missing),
+                                                           label))
+
+    if regressions:
+        print('{0} benchmark(s) slower than {1:.2f}x the baseline'.format(
+            len(regressions), args.threshold))
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description='HPCCM benchmark suite')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    p = subparsers.add_parser('run', help='run the benchmarks')
+    p.add_argument('--filter', '-k', type=str, default=None,
+                   help='only run the benchmarks matching the regular '
+                   'expression')
+    p.add_argument('--min-time', type=float, default=0.05,
+                   help='minimum time in seconds of each sample')
+    p.add_argument('--output', '-o', type=str, default=None,
+                   help='write the results to a JSON file')
+    p.add_argument('--repeat', type=int, default=5,
+                   help='number of samples of each benchmark')
+    p.set_defaults(func=run)
+
+    p = subparsers.add_parser('compare', help='compare two results')
+    p.add_argument('baseline', help='baseline JSON results')
+    p.add_argument('contender', help='contender JSON results')
+    p.add_argument('--statistic', default='min',
+                   choices=['min', 'median', 'mean'],
+                   help='statistic to compare')
+    p.add_argument('--threshold', type=float, default=1.1,
+                   help='report benchmarks slower than this ratio')
+    p.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
@@ -23,6 +23,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 
 import hpccm.config
+import hpccm.ir
+import hpccm.optimize
 
 from hpccm.common import container_type
 from hpccm.primitives.baseimage import baseimage
@@ -35,9 +37,23 @@ class Stage(object):
 
     # Parameters
 
+    fan_out: Boolean flag to specify whether to build independent
+    building blocks in separate stages, so that they may be built in
+    parallel (Docker specific).  The stage must be named.  The default
+    is the global setting, see `hpccm.config.set_fan_out`.
+
+    hoist_packages: Boolean flag to specify whether to install the
+    operating system packages of all the building blocks in the stage
+    in as few transactions as possible after the base image.  The default is the
+    global setting, see `hpccm.config.set_hoist_packages`.
+
     name: Name to use when refering to the stage (Docker specific).
     The default is an empty string.
 
+    optimize_layers: Boolean flag to specify whether to merge adjacent
+    compatible instructions into fewer layers.  The default is the
+    global setting, see `hpccm.config.set_optimize_layers`.
+
     separator: Separator to insert between stages.  The default is
     '\\n\\n'.
 
@@ -46,10 +62,17 @@ class Stage(object):
     def __init__(self, **kwargs):
         """Initialize stage"""
 
+        self.__depends = {}
+        self.__fan_out = kwargs.get('fan_out', None)
         self.__layers = []
+        self.__hoist_packages = kwargs.get('hoist_packages', None)
         self.name = kwargs.get('name', '')
+        self.__optimize_layers = kwargs.get('optimize_layers', None)
         self.__separator = kwargs.get('separator', '\n\n')
 
+        # The runtime is cached, see runtime()
+        self.__runtime = None
+
     def __iadd__(self, layer):
         """Add the layer to the stage.  Allows "+=" syntax."""
 
@@ -71,7 +94,108 @@ class Stage(object):
 
     def __str__(self):
         """String representation of the stage"""
-        return self.__separator.join(str(x) for x in self.__layers)
+
+        # Imported here so that importing HPCCM does not import the
+        # building blocks
+        from hpccm.building_blocks.base import render_pass
+
+        # Each building block is only rendered once
+        with render_pass():
+            return self.__render()
+
+    def __render(self):
+        """Return the string representation of the stage"""
+
+        layers = self.ir()
+
+        fan_out = self.__fan_out
+        if fan_out is None:
+            fan_out = hpccm.config.g_fan_out
+        if (fan_out and layers and
+            hpccm.config.g_ctype == container_type.DOCKER):
+            fanned, count = hpccm.optimize.fan_out(
+                layers, self.name, depends=self.__depends)
+            if count and not self.name:
+                # The other stages could refer to this stage by index
+                logging.warning('Fan-out requires a named stage')
+            elif count:
+                layers = fanned
+                logging.info('Fan-out built {0} building block(s) of stage '
+                             '"{1}" in separate stages'.format(count,
+                                                                self.name))
+
+        hoist = self.__hoist_packages
+        if hoist is None:
+            hoist = hpccm.config.g_hoist_packages
+        if hoist and layers:
+            layers, removed = hpccm.optimize.hoist_packages(layers)
+            logging.info('Package hoisting removed {0} package '
+                         'installation(s){1}'.format(
+                             removed, ' from stage "{}"'.format(self.name)
+                             if self.name else ''))
+
+        if layers:
+            layers, count = hpccm.optimize.instrument(
+                layers, default=hpccm.config.g_instrument)
+            if count:
+                logging.info('Instrumented {0} building block(s){1}'.format(
+                    count, ' of stage "{}"'.format(self.name)
+                    if self.name else ''))
+
+        optimize = self.__optimize_layers
+        if optimize is None:
+            optimize = hpccm.config.g_optimize_layers
+        if optimize and layers:
+            layers, removed = hpccm.optimize.merge_layers(layers)
+            logging.info('Layer optimization removed {0} instruction(s){1}'
+                         .format(removed, ' from stage "{}"'.format(self.name)
+                                 if self.name else ''))
+
+        return hpccm.ir.emit(layers, separator=self.__separator)
+
+    def depends(self, layer, *dependencies):
+        """Specify dependencies between the layers of the stage that
+        cannot be inferred when building independent building blocks
+        in separate stages, see `fan_out`.
+
+        # Arguments
+
+        layer: A building block or primitive of the stage.
+
+        dependencies: The building blocks or primitives of the stage
+        that `layer` depends on.  If none are specified, `layer`
+        depends on all the layers before it, so it is always built in
+        the final stage.
+
+        # Examples
+        ```python
+        Stage0 += baseimage(image='ubuntu:22.04', _as='devel')
+        mpi = openmpi()
+        Stage0 += mpi
+        app = generic_cmake(cmake_opts=['-D ENABLE_PARALLEL=ON'],
+                            prefix='/usr/local/app',
+                            repository='https://github.com/example/app.git')
+        Stage0 += app
+        Stage0.depends(app, mpi)
+        ```
+
+        """
+        self.__depends[layer] = list(dependencies)
+
+    def ir(self):
+        """Return the intermediate representation of the stage, a list
+        of `hpccm.ir.Layer` objects, one per layer.  See `hpccm.ir`.
+        The runtime of another stage, see `runtime`, is lowered to
+        one layer per building block."""
+
+        layers = []
+        for x in self.__layers:
+            if (isinstance(x, hpccm.ir.text) and
+                x.separator in [None, self.__separator]):
+                layers.extend(x.ir())
+            else:
+                layers.append(hpccm.ir.lower(x))
+        return layers
 
     def baseimage(self, image, _distro=''):
         """Insert the baseimage as the first layer
@@ -128,12 +252,32 @@ class Stage(object):
                 logging.warning('Multi-stage Singularity containers require a named first stage')
             _from = '0'
 
+        # The runtime() method of building blocks accumulates
+        # instructions, so only regenerate the runtime if a layer was
+        # added or the arguments or configuration changed.  The layers
+        # are referenced by the stage, so their id() is not reused.
+        # pylint: disable=protected-access
+        key = (tuple(id(x) for x in self.__layers), _from, tuple(exclude),
+               hpccm.config._state())
+        if self.__runtime and self.__runtime[0] == key:
+            return self.__runtime[1]
+
         instructions = []
+        layers = []
         for layer in self.__layers:
             runtime = getattr(layer, 'runtime', None)
             if callable(runtime) and layer.__class__.__name__ not in exclude:
                 inst = layer.runtime(_from=_from)
                 if inst:
                     instructions.append(inst)
-
-        return self.__separator.join(instructions)
+                    if isinstance(inst, hpccm.ir.text):
+                        layers.extend(inst.ir())
+                    else:
+                        layers.append(hpccm.ir.lower(inst))
+
+        # The intermediate representation is kept, so that the
+        # runtime can be optimized in the stage it is added to
+        rendered = hpccm.ir.text(self.__separator.join(instructions),
+                                 layers=layers, separator=self.__separator)
+        self.__runtime = (key, rendered)
+        return rendered
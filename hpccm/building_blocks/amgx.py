@@ -59,6 +59,11 @@ class amgx(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
     commit: The git commit to clone.  The default is empty and uses
     the latest commit on the selected branch of the repository.
 
+    cuda_arch: List of CUDA GPU architectures to build for, e.g.,
+    `['80', '90']`.  If set, `CUDA_ARCH` and `CMAKE_CUDA_ARCHITECTURES`
+    are added to the list of CMake options.  The default is the global
+    setting, see `hpccm.config.set_cuda_arch`.
+
     directory: Build from an unpackaged source directory relative to
     the local build context instead of fetching AMGX sources from a
     git repository.  This option is incompatible with
@@ -94,6 +99,13 @@ class amgx(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
         self.__prefix = kwargs.pop('prefix', '/usr/local/amgx')
         self.__repository = kwargs.pop('repository', 'https://github.com/NVIDIA/amgx')
 
+        # GPU architectures, unless specified explicitly
+        cuda_arch = hpccm.config.get_cuda_arch(kwargs.get('cuda_arch', None))
+        if cuda_arch and not any('CUDA_ARCH=' in o or 'CUDA_ARCH:' in o
+                                 for o in self.__cmake_opts):
+            self.__cmake_opts.append('-DCUDA_ARCH="{}"'.format(
+                ';'.join(cuda_arch)))
+
         # Set the environment
         self.environment_variables['CPATH'] = '{}:$CPATH'.format(
             posixpath.join(self.__prefix, 'include'))
@@ -29,7 +29,7 @@ import hpccm.templates.sed
 import hpccm.templates.wget
 
 from hpccm.building_blocks.base import bb_base
-from hpccm.common import linux_distro
+from hpccm.common import container_type, linux_distro
 from hpccm.primitives.shell import shell
 
 class apt_get(bb_base, hpccm.templates.sed, hpccm.templates.wget):
@@ -45,6 +45,13 @@ class apt_get(bb_base, hpccm.templates.sed, hpccm.templates.wget):
     aptitude: Boolean flag to specify whether `aptitude` should be
     used instead of `apt-get`.  The default is False.
 
+    cache: Boolean flag to specify whether the package indexes and
+    downloaded packages should be kept in a persistent [BuildKit cache mount](https://docs.docker.com/build/cache/optimize/#use-cache-mounts)
+    rather than being downloaded again for every build (Docker
+    specific).  The cache directories are not included in the image.
+    This parameter is ignored for the other container formats.  The
+    default is the global setting, see `hpccm.config.set_package_cache`.
+
     download: Boolean flag to specify whether to download the deb
     packages instead of installing them.  The default is False.
 
@@ -85,6 +92,7 @@ class apt_get(bb_base, hpccm.templates.sed, hpccm.templates.wget):
 
         self.__apt_key = kwargs.get('_apt_key', False)
         self.__aptitude = kwargs.get('aptitude', False)
+        self.__cache = kwargs.get('cache', hpccm.config.g_package_cache)
         self.__commands = []
         self.__download = kwargs.get('download', False)
         self.__download_directory = kwargs.get(
@@ -97,10 +105,15 @@ class apt_get(bb_base, hpccm.templates.sed, hpccm.templates.wget):
         self.ospackages = kwargs.get('ospackages', [])
         self.__ppas = kwargs.get('ppas', [])
         self.__repositories = kwargs.get('repositories', [])
+        self.__run_arguments = None
 
         if hpccm.config.g_linux_distro != linux_distro.UBUNTU: # pragma: no cover
             logging.warning('Using apt-get on a non-Ubuntu Linux distribution')
 
+        # The package cache relies on Docker BuildKit cache mounts
+        if self.__cache and hpccm.config.g_ctype != container_type.DOCKER:
+            self.__cache = False
+
         # Construct the series of commands that form the building
         # block
         self.__setup()
@@ -110,7 +123,8 @@ class apt_get(bb_base, hpccm.templates.sed, hpccm.templates.wget):
 
     def __instructions(self):
         """Fill in container instructions"""
-        self += shell(chdir=False, commands=self.__commands)
+        self += shell(_arguments=self.__run_arguments, chdir=False,
+                      commands=self.__commands)
 
     def __setup(self):
         """Construct the series of commands to execute"""
@@ -121,6 +135,17 @@ class apt_get(bb_base, hpccm.templates.sed, hpccm.templates.wget):
         apt_get_download = 'DEBIAN_FRONTEND=noninteractive apt-get download {}'.format(' '.join(self.__opts))
         apt_get_install = 'DEBIAN_FRONTEND=noninteractive apt-get install {}'.format(' '.join(self.__opts))
 
+        if self.__cache and self.ospackages:
+            # Mount the package cache directories and disable the
+            # Docker base image configuration that removes the
+            # downloaded packages after every install
+            self.__run_arguments = ' '.join(
+                ['--mount=type=cache,target={},sharing=locked'.format(d)
+                 for d in ['/var/cache/apt', '/var/lib/apt']])
+            self.__commands.extend([
+                'rm -f /etc/apt/apt.conf.d/docker-clean',
+                'echo \'Binary::apt::APT::Keep-Downloaded-Packages "true";\' > /etc/apt/apt.conf.d/keep-cache'])
+
         if self.__keys:
             for key in self.__keys:
                 if self.__apt_key:
@@ -146,7 +171,8 @@ class apt_get(bb_base, hpccm.templates.sed, hpccm.templates.wget):
                 if repo.startswith('http'):
                     # Repository is a URL to a repository configuration file
                     self.__commands.append(
-                        self.download_step(directory='/etc/apt/sources.list.d',
+                        self.download_step(cache=False,
+                                           directory='/etc/apt/sources.list.d',
                                            url=repo))
                 else:
                     # Repository is a configuration string
@@ -211,4 +237,5 @@ class apt_get(bb_base, hpccm.templates.sed, hpccm.templates.wget):
                 else:
                     self.__commands.append(apt_get_install + ' \\\n' + ' \\\n'.join(packages))
 
-            self.__commands.append('rm -rf /var/lib/apt/lists/*')
+            if not self.__cache:
+                self.__commands.append('rm -rf /var/lib/apt/lists/*')
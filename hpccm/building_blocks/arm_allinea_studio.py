@@ -160,7 +160,9 @@ class arm_allinea_studio(bb_base, hpccm.templates.envvars, hpccm.templates.rm,
         if self.__tarball:
             self += copy(src=self.__tarball, dest=self.__wd)
 
-        self += shell(commands=self.__commands)
+        # The source cache is only used when downloading the tarball
+        self += shell(_arguments=None if self.__tarball else self.cache_mount(),
+                      commands=self.__commands)
         self += environment(variables=self.environment_step())
 
     def __distro(self):
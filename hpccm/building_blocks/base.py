@@ -20,7 +20,37 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 from __future__ import print_function
 
+import contextlib
+import functools
+
+from six import add_metaclass
+
 import hpccm.base_object
+import hpccm.config
+import hpccm.ir
+import hpccm.profile
+
+# Rendered strings of the building blocks during a render pass, see
+# render_pass()
+_memo = hpccm.config._ContextVar('hpccm_render_memo', default=None) # pylint: disable=protected-access
+
+@contextlib.contextmanager
+def render_pass():
+    """Context manager to render each building block only once, e.g.,
+    while a stage is converted to a string.  The building blocks and
+    primitives must not be changed inside the context.  Outside of a
+    render pass, building blocks are always rendered again."""
+
+    if _memo.get() is not None:
+        # Nested render pass
+        yield
+        return
+
+    token = _memo.set({})
+    try:
+        yield
+    finally:
+        _memo.reset(token)
 
 class bb_instructions(hpccm.base_object):
     """Base class for building block instructions."""
@@ -52,8 +82,63 @@ class bb_instructions(hpccm.base_object):
 
     def __str__(self):
         """String representation of the building block"""
-        return '\n'.join(str(x) for x in self.__instructions_bb if str(x))
 
+        if isinstance(self, bb_base):
+            with hpccm.profile.timer('str', type(self).__name__):
+                return self.__render()
+        return self.__render()
+
+    def __render(self):
+        """Return the string representation of the building block"""
+
+        # The memo refers to the building block, so its id() is not
+        # reused during the render pass
+        memo = _memo.get()
+        if memo is not None:
+            state = hpccm.config._state() # pylint: disable=protected-access
+            cached = memo.get(id(self))
+            if cached and cached[0] is self and cached[1] == state:
+                return cached[2]
+
+        rendered = '\n'.join(s for s in (str(x) for x in
+                                          self.__instructions_bb) if s)
+
+        # The string refers back to the building block, so that the
+        # runtime of a building block added to a stage can be lowered
+        # to the intermediate representation
+        rendered = hpccm.ir.text(rendered, source=self)
+        if memo is not None:
+            memo[id(self)] = (self, state, rendered)
+        return rendered
+
+    def ir(self):
+        """Return the intermediate representation of the building
+        block, a `hpccm.ir.Layer` object.  See `hpccm.ir`."""
+        return hpccm.ir.lower(self)
+
+def _timed_runtime(runtime):
+    """Wrap a runtime method so that it is timed when profiling"""
+
+    @functools.wraps(runtime)
+    def wrapper(self, *args, **kwargs):
+        with hpccm.profile.timer('runtime', type(self).__name__):
+            return runtime(self, *args, **kwargs)
+    return wrapper
+
+class _timed(type):
+    """Metaclass to time the construction and the runtime method of
+    building blocks when profiling, see `hpccm.profile`"""
+
+    def __new__(mcs, name, bases, namespace):
+        if 'runtime' in namespace:
+            namespace['runtime'] = _timed_runtime(namespace['runtime'])
+        return super(_timed, mcs).__new__(mcs, name, bases, namespace)
+
+    def __call__(cls, *args, **kwargs):
+        with hpccm.profile.timer('init', cls.__name__):
+            return super(_timed, cls).__call__(*args, **kwargs)
+
+@add_metaclass(_timed)
 class bb_base(bb_instructions):
     """Base class for building blocks."""
 
@@ -63,3 +148,7 @@ class bb_base(bb_instructions):
         # Runtime instructions are kept in a separate list from the
         # "regular" instructions
         self.rt = bb_instructions()
+
+        # Build time instrumentation, see hpccm.optimize.instrument.
+        # None means the global setting.
+        self.instrument = kwargs.get('instrument', None)
@@ -67,6 +67,11 @@ class boost(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
     default values are `bzip2`, `bzip2-devel`, `tar`, `wget`, `which`,
     and `zlib-devel`.
 
+    parallel_memory: The estimated memory per build job in GiB.  If
+    the number of parallel build jobs is `auto`, see
+    `hpccm.config.set_parallel`, the number of jobs is limited so that
+    the available memory is not exceeded.  The default is 2.
+
     prefix: The top level installation location.  The default value
     is `/usr/local/boost`.
 
@@ -106,7 +111,9 @@ class boost(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
                                     'https://archives.boost.io/release/__version__/source')
         self.__bootstrap_opts = kwargs.get('bootstrap_opts', [])
         self.__ospackages = kwargs.get('ospackages', [])
-        self.__parallel = kwargs.get('parallel', '$(nproc)')
+        self.__parallel = hpccm.config.get_parallel(
+            kwargs.get('parallel', None),
+            memory=kwargs.get('parallel_memory', 2))
         self.__prefix = kwargs.get('prefix', '/usr/local/boost')
         self.__python = kwargs.get('python', False)
         self.__sourceforge = kwargs.get('sourceforge', False)
@@ -132,7 +139,7 @@ class boost(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
 
         self += comment('Boost version {}'.format(self.__version))
         self += packages(ospackages=self.__ospackages)
-        self += shell(commands=self.__commands)
+        self += shell(_arguments=self.cache_mount(), commands=self.__commands)
         self += environment(variables=self.environment_step())
 
     def __distro(self):
@@ -78,6 +78,9 @@ class catalyst(bb_base, hpccm.templates.CMakeBuild, hpccm.templates.envvars,
     (`LD_LIBRARY_PATH` and `PATH`) should be modified to include
     ParaView Catalyst. The default is True.
 
+    generator: The CMake generator, e.g., `Ninja`.  The default is the
+    global setting, see `hpccm.config.set_cmake_generator`.
+
     ldconfig: Boolean flag to specify whether the Catalyst library
     directory should be added dynamic linker cache.  If False, then
     `LD_LIBRARY_PATH` is modified to include the Catalyst library
@@ -158,7 +161,15 @@ class catalyst(bb_base, hpccm.templates.CMakeBuild, hpccm.templates.envvars,
 
         self += comment('ParaView Catalyst version {}'.format(self.__version))
         self += packages(ospackages=self.__ospackages)
-        self += shell(commands=self.__commands)
+        compiler_cache_packages = self.compiler_cache_packages()
+        if compiler_cache_packages:
+            self += compiler_cache_packages
+        generator_packages = self.cmake_generator_packages()
+        if generator_packages:
+            self += generator_packages
+        run_arguments = [self.cache_mount(), self.compiler_cache_mount()]
+        self += shell(_arguments=' '.join(x for x in run_arguments if x),
+                      commands=self.__commands)
         self += environment(variables=self.environment_step())
 
     def __distro(self):
@@ -70,6 +70,11 @@ class charm(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
     and building.  The default values are `autoconf`, `automake`,
     `git`, `libtool`, `make`, and `wget`.
 
+    parallel_memory: The estimated memory per build job in GiB.  If
+    the number of parallel build jobs is `auto`, the number of jobs is
+    limited so that the available memory is not exceeded.  The default
+    is the global setting, see `hpccm.config.set_parallel`.
+
     prefix: The top level install prefix.  The default value is
     `/usr/local`.
 
@@ -111,7 +116,9 @@ class charm(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
         self.__ospackages = kwargs.get('ospackages',
                                        ['autoconf', 'automake', 'git',
                                         'libtool', 'make', 'wget'])
-        self.__parallel = kwargs.get('parallel', '$(nproc)')
+        self.__parallel = hpccm.config.get_parallel(
+            kwargs.get('parallel', None),
+            memory=kwargs.get('parallel_memory', None))
         self.__prefix = kwargs.get('prefix', '/usr/local')
         self.__target = kwargs.get('target', 'charm++')
         self.__target_architecture = kwargs.get('target_architecture', '')
@@ -143,7 +150,7 @@ class charm(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
 
         self += comment('Charm++ version {}'.format(self.__version))
         self += packages(ospackages=self.__ospackages)
-        self += shell(commands=self.__commands)
+        self += shell(_arguments=self.cache_mount(), commands=self.__commands)
         self += environment(variables=self.environment_step())
 
     def __cpu_arch(self):
@@ -54,6 +54,11 @@ class cmake(bb_base, hpccm.templates.rm, hpccm.templates.tar,
     ospackages: List of OS packages to install prior to installing.
     The default values are `make` and `wget`.
 
+    parallel_memory: The estimated memory per build job in GiB.  If
+    the number of parallel build jobs is `auto`, the number of jobs is
+    limited so that the available memory is not exceeded.  The default
+    is the global setting, see `hpccm.config.set_parallel`.
+
     prefix: The top level install location.  The default value is
     `/usr/local`.
 
@@ -93,7 +98,9 @@ class cmake(bb_base, hpccm.templates.rm, hpccm.templates.tar,
         self.__eula = kwargs.get('eula', False)
 
         self.__ospackages = kwargs.get('ospackages', ['make', 'wget'])
-        self.__parallel = kwargs.get('parallel', '$(nproc)')
+        self.__parallel = hpccm.config.get_parallel(
+            kwargs.get('parallel', None),
+            memory=kwargs.get('parallel_memory', None))
         self.__prefix = kwargs.get('prefix', '/usr/local')
         self.__source = kwargs.get('source', False)
         self.__version = kwargs.get('version', '3.25.1')
@@ -112,7 +119,7 @@ class cmake(bb_base, hpccm.templates.rm, hpccm.templates.tar,
 
         self += comment('CMake version {}'.format(self.__version))
         self += packages(ospackages=self.__ospackages)
-        self += shell(commands=self.__commands)
+        self += shell(_arguments=self.cache_mount(), commands=self.__commands)
         self += environment(variables={'PATH': '{}:$PATH'.format(
             posixpath.join(self.__prefix, 'bin'))})
 
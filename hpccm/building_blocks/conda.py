@@ -135,7 +135,7 @@ class conda(bb_base, hpccm.templates.rm, hpccm.templates.wget):
         if self.__environment:
             self += copy(src=self.__environment, dest=posixpath.join(
                 self.__wd, posixpath.basename(self.__environment)))
-        self += shell(commands=self.__commands)
+        self += shell(_arguments=self.cache_mount(), commands=self.__commands)
 
     def __cpu_arch(self):
         """Based on the CPU architecture, set values accordingly.  A user
@@ -72,6 +72,15 @@ class generic_autotools(bb_base, hpccm.templates.ConfigureMake,
     `repository` parameter is specified.  The default is empty, i.e.,
     use the latest commit on the default branch for the repository.
 
+    compiler_cache: Boolean flag or compiler cache command, `ccache`
+    or `sccache`, to specify whether compiler invocations should be
+    cached.  If enabled, the compilers are wrapped by the compiler
+    cache, ccache is installed from the OS package, and the cache
+    statistics are reported after the build.  The cache directory is
+    persisted between Docker builds with a BuildKit cache mount.  The
+    default is the global setting, see
+    `hpccm.config.set_compiler_cache`.
+
     configure_opts: List of options to pass to `configure`.  The
     default value is an empty list.
 
@@ -118,6 +127,20 @@ class generic_autotools(bb_base, hpccm.templates.ConfigureMake,
     build context.  One of this parameter or the `repository` or `url`
     parameters must be specified.
 
+    parallel: The number of parallel build jobs, e.g., `4` or `auto`.
+    The default is the global setting, see
+    `hpccm.config.set_parallel`.
+
+    parallel_decompress: Boolean flag to specify whether to unpack
+    the source tarball with a multi-threaded decompressor, if
+    available in the container image.  The default is the global
+    setting, see `hpccm.config.set_parallel_decompress`.
+
+    parallel_memory: The estimated memory per build job in GiB.  If
+    the number of parallel build jobs is `auto`, the number of jobs is
+    limited so that the available memory is not exceeded.  The default
+    is the global setting, see `hpccm.config.set_parallel`.
+
     postinstall: List of shell commands to run after running 'make
     install'.  The working directory is the install prefix.  The
     default is an empty list.
@@ -147,6 +170,22 @@ class generic_autotools(bb_base, hpccm.templates.ConfigureMake,
     values, e.g., `LD_LIBRARY_PATH` and `PATH`, to set in the runtime
     stage.  The default is an empty dictionary.
 
+    sha256: The SHA-256 checksum of the package downloaded from
+    `url`.  If specified, the download is verified.  The default is
+    empty.
+
+    source_cache: Boolean flag or directory to specify whether the
+    package downloaded from `url` should be stored in and reused from
+    the shared source cache.  The default is the global setting, see
+    `hpccm.config.set_source_cache`.
+
+    stream: Boolean flag to specify whether to download and unpack
+    the tarball downloaded from `url` in one pass, without writing the
+    tarball to disk.  If `sha256` is specified, the download is
+    verified as it is unpacked.  Packages that are not tarballs, and
+    packages stored in the source cache, are downloaded as usual.
+    The default is False.
+
     toolchain: The toolchain object.  This should be used if
     non-default compilers or other toolchain options are needed.  The
     default is empty.
@@ -227,11 +266,16 @@ class generic_autotools(bb_base, hpccm.templates.ConfigureMake,
                 self += comment(self.repository, reformat=False)
             elif self.package:
                 self += comment(self.package, reformat=False)
+        compiler_cache_packages = self.compiler_cache_packages()
+        if compiler_cache_packages:
+            self += compiler_cache_packages
         if self.package:
             self += copy(src=self.package,
                          dest=posixpath.join(self.__wd,
                                              os.path.basename(self.package)))
-        self += shell(_arguments=self.__run_arguments,
+        run_arguments = [self.__run_arguments, self.download_mount(),
+                         self.compiler_cache_mount()]
+        self += shell(_arguments=' '.join(x for x in run_arguments if x),
                       commands=self.__commands)
         self += environment(variables=self.environment_step())
         self += label(metadata=self.annotate_step())
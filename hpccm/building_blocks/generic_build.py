@@ -25,6 +25,7 @@ import os
 import posixpath
 
 import hpccm.templates.annotate
+import hpccm.templates.compiler_cache
 import hpccm.templates.downloader
 import hpccm.templates.envvars
 import hpccm.templates.ldconfig
@@ -38,6 +39,7 @@ from hpccm.primitives.label import label
 from hpccm.primitives.shell import shell
 
 class generic_build(bb_base, hpccm.templates.annotate,
+                    hpccm.templates.compiler_cache,
                     hpccm.templates.downloader, hpccm.templates.envvars,
                     hpccm.templates.ldconfig, hpccm.templates.rm):
     """The `generic_build` building block downloads and builds
@@ -63,6 +65,16 @@ class generic_build(bb_base, hpccm.templates.annotate,
     `repository` parameter is specified.  The default is empty, i.e.,
     use the latest commit on the default branch for the repository.
 
+    compiler_cache: Boolean flag or compiler cache command, `ccache`
+    or `sccache`, to specify whether compiler invocations should be
+    cached.  If enabled, the compiler cache is set up before the
+    `build` commands and the cache statistics are reported after the
+    `install` commands.  Only compilers invoked through the masquerade
+    directory of ccache, e.g., `gcc`, are cached.  The cache directory
+    is persisted between Docker builds with a BuildKit cache mount.
+    The default is the global setting, see
+    `hpccm.config.set_compiler_cache`.
+
     devel_environment: Dictionary of environment variables and values,
     e.g., `LD_LIBRARY_PATH` and `PATH`, to set in the development
     stage after the package is built and installed.  The default is an
@@ -91,6 +103,11 @@ class generic_build(bb_base, hpccm.templates.annotate,
     build context.  One of this parameter or the `repository` or `url`
     parameters must be specified.
 
+    parallel_decompress: Boolean flag to specify whether to unpack
+    the source tarball with a multi-threaded decompressor, if
+    available in the container image.  The default is the global
+    setting, see `hpccm.config.set_parallel_decompress`.
+
     prefix: The top level install location.  The default value is
     empty. If defined then the location is copied as part of the
     runtime method.
@@ -112,6 +129,22 @@ class generic_build(bb_base, hpccm.templates.annotate,
     values, e.g., `LD_LIBRARY_PATH` and `PATH`, to set in the runtime
     stage.  The default is an empty dictionary.
 
+    sha256: The SHA-256 checksum of the package downloaded from
+    `url`.  If specified, the download is verified.  The default is
+    empty.
+
+    source_cache: Boolean flag or directory to specify whether the
+    package downloaded from `url` should be stored in and reused from
+    the shared source cache.  The default is the global setting, see
+    `hpccm.config.set_source_cache`.
+
+    stream: Boolean flag to specify whether to download and unpack
+    the tarball downloaded from `url` in one pass, without writing the
+    tarball to disk.  If `sha256` is specified, the download is
+    verified as it is unpacked.  Packages that are not tarballs, and
+    packages stored in the source cache, are downloaded as usual.
+    The default is False.
+
     unpack: Unpack the sources after downloading. Default is `True`.
 
     url: The URL of the package to build.  One of this parameter or
@@ -165,11 +198,16 @@ class generic_build(bb_base, hpccm.templates.annotate,
                 self += comment(self.repository, reformat=False)
             elif self.package:
                 self += comment(self.package, reformat=False)
+        compiler_cache_packages = self.compiler_cache_packages()
+        if compiler_cache_packages:
+            self += compiler_cache_packages
         if self.package:
             self += copy(src=self.package,
                          dest=posixpath.join(self.__wd,
                                              os.path.basename(self.package)))
-        self += shell(_arguments=self.__run_arguments,
+        run_arguments = [self.__run_arguments, self.download_mount(),
+                         self.compiler_cache_mount()]
+        self += shell(_arguments=' '.join(x for x in run_arguments if x),
                       commands=self.__commands)
         self += environment(variables=self.environment_step())
         self += label(metadata=self.annotate_step())
@@ -196,6 +234,9 @@ class generic_build(bb_base, hpccm.templates.annotate,
 
         # Build
         if self.__build:
+            setup = self.compiler_cache_setup_step()
+            if setup:
+                self.__commands.append(setup)
             self.__commands.append('cd {}'.format(self.src_directory))
             self.__commands.extend(self.__build)
 
@@ -206,6 +247,12 @@ class generic_build(bb_base, hpccm.templates.annotate,
             self.__commands.append('cd {}'.format(self.src_directory))
             self.__commands.extend(self.__install)
 
+        # Report the compiler cache statistics of the build
+        if self.__build:
+            stats = self.compiler_cache_stats_step()
+            if stats:
+                self.__commands.append(stats)
+
         # Set library path
         if self.ldconfig:
             self.__commands.append(self.ldcache_step(
@@ -99,6 +99,12 @@ class gnu(bb_base, hpccm.templates.ConfigureMake, hpccm.templates.envvars,
     `perl`, `tar`, `wget`, and `xz`. This option is only recognized if
     a source build is enabled.
 
+    parallel_decompress: Boolean flag to specify whether to unpack
+    the source tarball with a multi-threaded decompressor, if
+    available in the container image.  The default is the global
+    setting, see `hpccm.config.set_parallel_decompress`.  This option
+    is only recognized if a source build is enabled.
+
     prefix: The top level install location.  The default value is
     `/usr/local/gnu`. This option is only recognized if a source build
     is enabled.
@@ -399,6 +405,9 @@ class gnu(bb_base, hpccm.templates.ConfigureMake, hpccm.templates.envvars,
         if self.__source:
             # Installing from source
             self += packages(ospackages=self.__ospackages)
+            compiler_cache_packages = self.compiler_cache_packages()
+            if compiler_cache_packages:
+                self += compiler_cache_packages
         else:
             # Installing from package repository
             self += packages(apt=self.__compiler_debs,
@@ -407,7 +416,9 @@ class gnu(bb_base, hpccm.templates.ConfigureMake, hpccm.templates.envvars,
                              scl=bool(self.__version), # True / False
                              yum=self.__compiler_rpms)
         if self.__commands:
-            self += shell(commands=self.__commands)
+            run_arguments = [self.cache_mount(), self.compiler_cache_mount()]
+            self += shell(_arguments=' '.join(x for x in run_arguments if x),
+                          commands=self.__commands)
         self += environment(variables=self.environment_step())
 
     def __repository(self):
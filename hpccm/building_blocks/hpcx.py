@@ -125,6 +125,10 @@ class hpcx(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
     prefix: The top level installation location.  The default value is
     `/usr/local/hpcx`.
 
+    stream: Boolean flag to specify whether to download and unpack
+    the tarball in one pass, without writing the tarball to disk.  The
+    default is False.
+
     version: The version of Mellanox HPC-X to install.  The default
     value is `2.24.1`.
 
@@ -156,6 +160,7 @@ class hpcx(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
         self.__ospackages = kwargs.get('ospackages', []) # Filled in by _distro()
         self.__packages = kwargs.get('packages', [])
         self.__prefix = kwargs.get('prefix', '/usr/local/hpcx')
+        self.__stream = kwargs.get('stream', False)
         self.__version = kwargs.get('version', '2.24.1')
 
         self.__commands = [] # Filled in by __setup()
@@ -209,7 +214,7 @@ class hpcx(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
 
         self += comment('Mellanox HPC-X version {}'.format(self.__version))
         self += packages(ospackages=self.__ospackages)
-        self += shell(commands=self.__commands)
+        self += shell(_arguments=self.cache_mount(), commands=self.__commands)
         self += environment(variables=self.environment_step())
 
     def __distro(self):
@@ -299,12 +304,21 @@ class hpcx(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
         tarball = self.__label + '.tbz'
         url = '{0}/v{1}/{2}'.format(self.__baseurl, version_dirstring, tarball)
 
-        # Download source from web
-        self.__commands.append(self.download_step(url=url, directory=self.__wd))
-
-        # "Install"
-        self.__commands.append(self.untar_step(
-            tarball=posixpath.join(self.__wd, tarball), directory=self.__wd))
+        if self.__stream and not hpccm.config.get_source_cache():
+            # Download and unpack the tarball in one pass
+            self.__commands.append('mkdir -p {0} && {1}'.format(
+                self.__wd, self.stream_step(
+                    url=url, command=self.untar_step(
+                        tarball=tarball, directory=self.__wd, stream=True))))
+        else:
+            # Download source from web
+            self.__commands.append(self.download_step(url=url,
+                                                      directory=self.__wd))
+
+            # "Install"
+            self.__commands.append(self.untar_step(
+                tarball=posixpath.join(self.__wd, tarball),
+                directory=self.__wd))
         self.__commands.append('cp -a {0} {1}'.format(
             posixpath.join(self.__wd, self.__label), self.__prefix))
 
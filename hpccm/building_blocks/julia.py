@@ -126,7 +126,7 @@ class julia(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
 
         self += comment('Julia version {}'.format(self.__version))
         self += packages(ospackages=self.__ospackages)
-        self += shell(commands=self.__commands)
+        self += shell(_arguments=self.cache_mount(), commands=self.__commands)
         self += environment(variables=self.environment_step())
 
     def __cpu_arch(self):
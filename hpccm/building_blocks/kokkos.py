@@ -23,6 +23,8 @@ from __future__ import print_function
 
 from packaging.version import Version
 
+import logging # pylint: disable=unused-import
+
 import hpccm.config
 import hpccm.templates.downloader
 import hpccm.templates.envvars
@@ -33,6 +35,15 @@ from hpccm.building_blocks.packages import packages
 from hpccm.common import linux_distro
 from hpccm.primitives.comment import comment
 
+# Kokkos architecture of each CUDA GPU architecture
+_kokkos_arch = {'30': 'KEPLER30', '32': 'KEPLER32', '35': 'KEPLER35',
+                '37': 'KEPLER37', '50': 'MAXWELL50', '52': 'MAXWELL52',
+                '53': 'MAXWELL53', '60': 'PASCAL60', '61': 'PASCAL61',
+                '70': 'VOLTA70', '72': 'VOLTA72', '75': 'TURING75',
+                '80': 'AMPERE80', '86': 'AMPERE86', '87': 'AMPERE87',
+                '89': 'ADA89', '90': 'HOPPER90', '100': 'BLACKWELL100',
+                '120': 'BLACKWELL120'}
+
 class kokkos(bb_base, hpccm.templates.downloader, hpccm.templates.envvars):
     """The `kokkos` building block downloads and installs the
     [Kokkos](https://github.com/kokkos/kokkos) component.
@@ -47,8 +58,11 @@ class kokkos(bb_base, hpccm.templates.downloader, hpccm.templates.envvars):
 
     arch: List of target architectures to build. If set adds
     `-DKokkos_ARCH_<value>=ON` to the list of CMake options. The
-    default value is `VOLTA70`, i.e., sm_70.  If a CUDA aware build is
-    not selected, then a non-default value should be used.
+    default value is the Kokkos architecture of the oldest CUDA GPU
+    architecture of the `cuda_arch` parameter or of the global
+    setting, see `hpccm.config.set_cuda_arch`, e.g., `AMPERE80`, or
+    `VOLTA70`, i.e., sm_70, if neither is set.  If a CUDA aware build
+    is not selected, then a non-default value should be used.
 
     branch: The git branch to clone.  Only recognized if the
     `repository` parameter is specified.  The default is empty, i.e.,
@@ -74,6 +88,9 @@ class kokkos(bb_base, hpccm.templates.downloader, hpccm.templates.envvars):
     (`LD_LIBRARY_PATH` and `PATH`) should be modified to include
     Kokkos. The default is True.
 
+    generator: The CMake generator, e.g., `Ninja`.  The default is the
+    global setting, see `hpccm.config.set_cmake_generator`.
+
     hwloc: Flag to control whether a hwloc aware build is performed.
     If True, adds `-DKokkos_ENABLE_HWLOC=ON` to the list of CMake
     options. The default value is True.
@@ -110,13 +127,14 @@ class kokkos(bb_base, hpccm.templates.downloader, hpccm.templates.envvars):
 
         super(kokkos, self).__init__(**kwargs)
 
-        self.__arch = kwargs.pop('arch', ['VOLTA70'])
+        self.__arch = kwargs.pop('arch', None)
         self.__baseurl = kwargs.pop('baseurl',
                                     'https://github.com/kokkos/kokkos/archive')
         self.__check = kwargs.pop('check', False)
         self.__cmake_opts = kwargs.pop('cmake_opts',
                                        ['-DCMAKE_BUILD_TYPE=RELEASE'])
         self.__cuda = kwargs.pop('cuda', True)
+        self.__cuda_arch = kwargs.get('cuda_arch', None)
         self.__default_repository = 'https://github.com/kokkos/kokkos.git'
         self.__hwloc = kwargs.pop('hwloc', True)
         self.__ospackages = kwargs.pop('ospackages', [])
@@ -141,6 +159,9 @@ class kokkos(bb_base, hpccm.templates.downloader, hpccm.templates.envvars):
         kwargs['repository'] = self.repository
         kwargs['url'] = self.url
 
+        # The GPU architecture is selected by the Kokkos architecture
+        kwargs['cuda_arch'] = False
+
         # Setup the environment variables
         self.environment_variables['PATH'] = '{}/bin:$PATH'.format(
             self.__prefix)
@@ -166,6 +187,18 @@ class kokkos(bb_base, hpccm.templates.downloader, hpccm.templates.envvars):
     def __cmake(self):
         """Set CMake options based on user input"""
 
+        # Kokkos builds for a single GPU architecture, so select the
+        # oldest one, which also runs on newer GPUs
+        if self.__arch is None:
+            self.__arch = ['VOLTA70']
+            cuda_arch = hpccm.config.get_cuda_arch(self.__cuda_arch)
+            if cuda_arch and self.__cuda:
+                if cuda_arch[0] in _kokkos_arch:
+                    self.__arch = [_kokkos_arch[cuda_arch[0]]]
+                else:
+                    logging.warning('no Kokkos architecture for CUDA GPU '
+                                    'architecture {}'.format(cuda_arch[0]))
+
         # Set options
         if self.__arch:
             for arch in self.__arch:
@@ -80,6 +80,11 @@ class libsim(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
     `tar`, `wget`, `which`, `zlib-devel`, `libXt-devel`,
     `libglvnd-devel`, `mesa-libGL-devel`, and `mesa-libGLU-devel`.
 
+    parallel_memory: The estimated memory per build job in GiB.  If
+    the number of parallel build jobs is `auto`, the number of jobs is
+    limited so that the available memory is not exceeded.  The default
+    is the global setting, see `hpccm.config.set_parallel`.
+
     prefix: The top level install location.  The default value is
     `/usr/local/visit`.
 
@@ -124,7 +129,9 @@ class libsim(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
         self.__opts = kwargs.get('build_opts',
                                  ['--xdb', '--server-components-only'])
         self.__ospackages = kwargs.get('ospackages', [])
-        self.__parallel = kwargs.get('parallel', '$(nproc)')
+        self.__parallel = hpccm.config.get_parallel(
+            kwargs.get('parallel', None),
+            memory=kwargs.get('parallel_memory', None))
         self.__prefix = kwargs.get('prefix', '/usr/local/visit')
         self.__runtime_ospackages = [] # Filled in by __distro()
         self.__system_cmake = kwargs.get('system_cmake', True)
@@ -154,7 +161,7 @@ class libsim(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
 
         self += comment('VisIt libsim version {}'.format(self.__version))
         self += packages(ospackages=self.__ospackages)
-        self += shell(commands=self.__commands)
+        self += shell(_arguments=self.cache_mount(), commands=self.__commands)
         self += environment(variables=self.environment_step())
 
     def __cpu_arch(self):
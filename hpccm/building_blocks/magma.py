@@ -23,6 +23,7 @@ from __future__ import print_function
 
 import posixpath
 
+import hpccm.config
 import hpccm.templates.envvars
 import hpccm.templates.ldconfig
 
@@ -49,12 +50,22 @@ class magma(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
     cmake_opts: List of options to pass to `cmake`.  The default value
     is an empty list.
 
-    gpu_target: List of GPU architectures to compile.  The default
-    values are `Pascal`, `Volta`, and `Turing`.
+    generator: The CMake generator, e.g., `Ninja`.  The default is the
+    global setting, see `hpccm.config.set_cmake_generator`.
+
+    gpu_target: List of GPU architectures to compile.  The default is
+    the CUDA GPU architectures of the `cuda_arch` parameter or of the
+    global setting, see `hpccm.config.set_cuda_arch`, e.g., `sm_80`,
+    or `Pascal`, `Volta`, and `Turing` if neither is set.
 
     ospackages: List of OS packages to install prior to configuring
     and building.  The default values are `tar` and `wget`.
 
+    parallel_memory: The estimated memory per build job in GiB.  If
+    the number of parallel build jobs is `auto`, see
+    `hpccm.config.set_parallel`, the number of jobs is limited so that
+    the available memory is not exceeded.  The default is 4.
+
     prefix: The top level install location.  The default value is
     `/usr/local/magma`.
 
@@ -80,9 +91,10 @@ class magma(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
 
         self.__baseurl = kwargs.pop('baseurl', 'http://icl.utk.edu/projectsfiles/magma/downloads')
         self.__cmake_opts = kwargs.pop('cmake_opts', [])
-        self.__gpu_target = kwargs.pop('gpu_target',
-                                       ['Pascal', 'Volta', 'Turing'])
+        self.__cuda_arch = kwargs.get('cuda_arch', None)
+        self.__gpu_target = kwargs.pop('gpu_target', None)
         self.__ospackages = kwargs.pop('ospackages', ['tar', 'wget'])
+        self.__parallel_memory = kwargs.pop('parallel_memory', 4)
         self.__prefix = kwargs.pop('prefix', '/usr/local/magma')
         self.__version = kwargs.pop('version', '2.5.3')
 
@@ -104,6 +116,7 @@ class magma(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
             comment=False,
             cmake_opts=self.__cmake_opts,
             devel_environment=self.environment_variables,
+            parallel_memory=self.__parallel_memory,
             prefix=self.__prefix,
             runtime_environment=self.environment_variables,
             url='{0}/magma-{1}.tar.gz'.format(self.__baseurl, self.__version),
@@ -118,6 +131,13 @@ class magma(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
         """Setup cmake options based on users parameters"""
 
         # GPU architectures
+        if self.__gpu_target is None:
+            cuda_arch = hpccm.config.get_cuda_arch(self.__cuda_arch)
+            if cuda_arch:
+                self.__gpu_target = ['sm_{}'.format(a) for a in cuda_arch]
+            else:
+                self.__gpu_target = ['Pascal', 'Volta', 'Turing']
+
         if self.__gpu_target:
             self.__cmake_opts.append('-DGPU_TARGET="{}"'.format(
                 ' '.join(self.__gpu_target)))
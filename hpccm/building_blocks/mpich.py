@@ -158,6 +158,9 @@ class mpich(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
             toolchain=self.__toolchain,
             url='{0}/{1}/mpich-{1}.tar.gz'.format(self.__baseurl,
                                                   self.__version),
+            # The compiler cache command must not be embedded in the
+            # MPI compiler wrappers
+            _compiler_cache_wrap=False,
             **kwargs)
 
         # Container instructions
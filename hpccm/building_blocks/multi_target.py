@@ -0,0 +1,261 @@
+# Copyright (c) 2019, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""'multi' target building block"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import logging # pylint: disable=unused-import
+import posixpath
+
+from six.moves import shlex_quote
+
+import hpccm.config
+
+from hpccm.building_blocks.base import bb_base
+from hpccm.primitives.comment import comment
+from hpccm.primitives.copy import copy
+from hpccm.primitives.shell import shell
+
+def _dispatch_script(prefix, targets):
+    """Return the lines of the shell script that selects the build of
+    the most specific CPU target compatible with the host, based on
+    the CPU vendor and features in /proc/cpuinfo"""
+
+    # Imported here since loading the archspec microarchitecture
+    # database is relatively expensive
+    import archspec.cpu
+    from archspec.cpu.schema import TARGETS_JSON
+
+    arm_vendors = TARGETS_JSON['conversions']['arm_vendors']
+
+    # Same ordering as archspec host detection: the deepest target in
+    # the inheritance tree, then the target with the most features
+    ordered = sorted(targets, reverse=True,
+                     key=lambda t: (len(archspec.cpu.TARGETS[t].ancestors),
+                                    len(archspec.cpu.TARGETS[t].features)))
+
+    lines = ['#!/bin/sh',
+             '# Select the build in {} for this CPU, generated by '
+             'HPC Container Maker'.format(prefix),
+             '# Set HPCCM_TARGET to override the selection',
+             "_hpccm_flags=\" $(awk -F': *' '/^(flags|Features)[[:space:]]*:/ "
+             "{print $2; exit}' /proc/cpuinfo 2>/dev/null) \"",
+             "_hpccm_vendor=$(awk -F': *' "
+             "'/^(vendor_id|CPU implementer)[[:space:]]*:/ "
+             "{print $2; exit}' /proc/cpuinfo 2>/dev/null)",
+             '_hpccm_has() { for _f in "$@"; do case "$_hpccm_flags" in '
+             '*" $_f "*) ;; *) return 1 ;; esac; done; }',
+             '_hpccm_is() { for _v in "$@"; do '
+             '[ "$_v" = "$_hpccm_vendor" ] && return 0; done; return 1; }',
+             'case "${HPCCM_TARGET:-}" in',
+             '  {}) _hpccm_target=$HPCCM_TARGET ;;'.format('|'.join(targets)),
+             '  *)']
+
+    for index, name in enumerate(ordered):
+        target = archspec.cpu.TARGETS[name]
+        conditions = []
+        if target.vendor != 'generic':
+            if target.family.name == 'aarch64':
+                vendors = sorted(code for code, vendor in arm_vendors.items()
+                                 if vendor == target.vendor)
+            else:
+                vendors = [target.vendor]
+            conditions.append('_hpccm_is {}'.format(' '.join(vendors)))
+        features = set(target.features)
+        if 'ssse3' in features:
+            # Not listed in /proc/cpuinfo, but implied by ssse3
+            features.discard('sse3')
+        if features:
+            conditions.append('_hpccm_has {}'.format(
+                ' '.join(sorted(features))))
+        lines.append('    {0} {1}; then _hpccm_target={2}'.format(
+            'if' if index == 0 else 'elif',
+            ' && '.join(conditions) or 'true', name))
+
+    lines.extend(['    else _hpccm_target=; echo "warning: no build in {} is '
+                  'compatible with this CPU" >&2'.format(prefix),
+                  '    fi ;;',
+                  'esac',
+                  'if [ -n "$_hpccm_target" ]; then',
+                  '  _hpccm_prefix={}/$_hpccm_target'.format(prefix),
+                  '  export PATH="$_hpccm_prefix/bin:$PATH"',
+                  '  export LD_LIBRARY_PATH="$_hpccm_prefix/lib64:'
+                  '$_hpccm_prefix/lib${LD_LIBRARY_PATH:+:$LD_LIBRARY_PATH}"',
+                  'fi',
+                  'unset _hpccm_flags _hpccm_vendor _hpccm_target '
+                  '_hpccm_prefix _f _v',
+                  'unset -f _hpccm_has _hpccm_is'])
+    return lines
+
+class multi_target(bb_base):
+    """The `multi_target` building block builds another building block
+    once for each of several CPU targets, i.e., a "fat" install that
+    runs at peak performance on a range of CPU microarchitectures.
+
+    Each build uses the archspec optimization flags of its CPU target,
+    see the `native-target` profile of
+    `hpccm.config.set_optimization`, and is installed in a
+    subdirectory of the prefix named for the CPU target.  This applies
+    to building blocks that use the `ConfigureMake` or `CMakeBuild`
+    templates, e.g., `generic_autotools`, `generic_cmake`, and `fftw`,
+    and to `openblas`.  CPU targets of another CPU architecture than
+    the configured one are skipped, so the same recipe can be used for
+    multiple CPU architectures.
+
+    The building block also generates the script `env.sh` in the
+    prefix that selects the build of the most specific CPU target
+    compatible with the CPU at container start, following the archspec
+    compatibility rules, and adds the corresponding `bin` and `lib`
+    directories to `PATH` and `LD_LIBRARY_PATH` when sourced.  The
+    `launch` script in the prefix sources `env.sh` and runs its
+    arguments, e.g., as the container entry point.  The `HPCCM_TARGET`
+    environment variable overrides the selection.  If no build is
+    compatible with the CPU, a warning is printed and the environment
+    is not modified.
+
+    # Parameters
+
+    building_block: The building block class to build, e.g.,
+    `generic_cmake`.  This parameter is required.
+
+    prefix: The top level install location.  This parameter is
+    required.
+
+    targets: List of archspec CPU targets, e.g., `skylake_avx512`,
+    `icelake`, `zen3`, and `neoverse_n1`.  This parameter is required.
+
+    Any other parameters are passed to the building block.  The
+    building block environment variables and dynamic linker
+    configuration are disabled, since they would refer to a single CPU
+    target.
+
+    # Examples
+
+    ```python
+    multi_target(building_block=generic_cmake,
+                 targets=['skylake_avx512', 'icelake', 'zen3'],
+                 prefix='/usr/local/app',
+                 repository='https://github.com/user/app.git')
+    ```
+
+    ```python
+    multi_target(building_block=fftw, prefix='/usr/local/fftw',
+                 targets=['haswell', 'skylake_avx512', 'zen2'],
+                 version='3.3.10')
+    ```
+
+    """
+
+    def __init__(self, **kwargs):
+        """Initialize building block"""
+
+        super(multi_target, self).__init__(**kwargs)
+
+        self.__building_block = kwargs.pop('building_block', None)
+        self.__prefix = kwargs.pop('prefix', None)
+        self.__targets = kwargs.pop('targets', [])
+        self.__kwargs = kwargs
+
+        self.toolchain = kwargs.get('toolchain', None)
+
+        if not self.__building_block:
+            raise RuntimeError('must specify a building block')
+        if not self.__prefix:
+            raise RuntimeError('must specify a prefix')
+
+        # Select the CPU targets of the configured CPU architecture
+        self.__select_targets()
+
+        # Fill in container instructions
+        self.__instructions()
+
+    def __select_targets(self):
+        """Validate the CPU targets and skip the targets of other CPU
+        architectures"""
+
+        import archspec.cpu
+
+        arch = hpccm.config.get_cpu_architecture()
+        targets = []
+        for target in self.__targets:
+            if target not in archspec.cpu.TARGETS:
+                raise RuntimeError('unrecognized CPU target "{}"'.format(
+                    target))
+            family = archspec.cpu.TARGETS[target].family.name
+            if family not in ['aarch64', 'x86_64']:
+                raise RuntimeError('CPU target "{}" is not supported'.format(
+                    target))
+            if family != arch:
+                logging.info('skipping CPU target "{0}" for {1}'.format(
+                    target, arch))
+                continue
+            if target not in targets:
+                targets.append(target)
+
+        if not targets:
+            raise RuntimeError('no CPU targets for {}'.format(arch))
+
+        self.__targets = targets
+
+    def __instructions(self):
+        """Fill in container instructions"""
+
+        profiles = hpccm.config.get_optimization()
+        if 'native-target' not in profiles:
+            profiles = profiles + ['native-target']
+
+        kwargs = dict(self.__kwargs, environment=False, ldconfig=False)
+        for target in self.__targets:
+            with hpccm.config.context(cpu_target=target,
+                                      optimization=profiles):
+                self += self.__building_block(
+                    prefix=posixpath.join(self.__prefix, target), **kwargs)
+
+        env = posixpath.join(self.__prefix, 'env.sh')
+        launch = posixpath.join(self.__prefix, 'launch')
+        self += shell(commands=[
+            'mkdir -p {}'.format(self.__prefix),
+            'printf "%s\\n" {0} > {1}'.format(
+                ' '.join(shlex_quote(line) for line in
+                         _dispatch_script(self.__prefix, self.__targets)),
+                env),
+            'printf "%s\\n" {0} > {1}'.format(
+                ' '.join(shlex_quote(line) for line in
+                         ['#!/bin/sh', '. {}'.format(env), 'exec "$@"']),
+                launch),
+            'chmod +x {0} {1}'.format(env, launch)])
+
+    def runtime(self, _from='0'):
+        """Generate the set of instructions to install the runtime specific
+        components from a build in a previous stage.
+
+        # Examples
+
+        ```python
+        m = multi_target(...)
+        Stage0 += m
+        Stage1 += m.runtime()
+        ```
+        """
+
+        self.rt += comment('{0} for {1}'.format(
+            self.__building_block.__name__, ', '.join(self.__targets)))
+        self.rt += copy(_from=_from, dest=self.__prefix, src=self.__prefix)
+        return str(self.rt)
@@ -206,6 +206,9 @@ class mvapich2(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig,
             toolchain=self.__toolchain,
             url='{0}/mvapich2-{1}.tar.gz'.format(self.__baseurl,
                                                  self.__version),
+            # The compiler cache command must not be embedded in the
+            # MPI compiler wrappers
+            _compiler_cache_wrap=False,
             **kwargs)
 
         # Container instructions
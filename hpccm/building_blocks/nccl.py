@@ -22,6 +22,7 @@ from __future__ import unicode_literals
 from __future__ import print_function
 
 from packaging.version import Version
+from six.moves import shlex_quote
 import posixpath
 
 import hpccm.templates.downloader
@@ -57,6 +58,14 @@ class nccl(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
     cuda: Flag to specify the CUDA version of the package to download.
     The default is `13.2`.  This option is ignored if build is True.
 
+    cuda_arch: List of CUDA GPU architectures to build for, e.g.,
+    `['80', '90']`.  If set, the `NVCC_GENCODE` make variable is set
+    to build for only these GPU architectures, plus PTX for the newest
+    one.  The default is the global setting, see
+    `hpccm.config.set_cuda_arch`, or all the GPU architectures
+    supported by the CUDA version if not set.  This option is ignored
+    if build is False.
+
     environment: Boolean flag to specify whether the environment
     (`CPATH`, `LD_LIBRARY_PATH`, `LIBRARY_PATH`, and `PATH`) should be
     modified to include NCCL. The default is True.  This option is
@@ -69,6 +78,12 @@ class nccl(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
     ospackages: List of OS packages to install prior to building.  The
     default values are `make` and `wget`.
 
+    parallel_memory: The estimated memory per build job in GiB.  If
+    the number of parallel build jobs is `auto`, see
+    `hpccm.config.set_parallel`, the number of jobs is limited so that
+    the available memory is not exceeded.  The default is 4.  This
+    option is ignored if build is False.
+
     prefix: The top level install location.  The default value is
     `/usr/local/nccl`.  This option is ignored if build is False.
 
@@ -103,8 +118,12 @@ class nccl(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
         self.__default_repository = 'https://github.com/NVIDIA/nccl.git'
         self.__distro_label = ''     # Filled in by __distro
         self.__cuda = kwargs.pop('cuda', '13.2')
+        self.__cuda_arch = kwargs.pop('cuda_arch', None)
         self.__make_variables = kwargs.pop('make_variables', {})
         self.__ospackages = kwargs.pop('ospackages', [])
+        self.__parallel = hpccm.config.get_parallel(
+            kwargs.pop('parallel', None),
+            memory=kwargs.pop('parallel_memory', 4))
         self.__prefix = kwargs.pop('prefix', '/usr/local/nccl')
         self.__repo_key = ''         # Filled in by __repo_key
         self.__src_directory = kwargs.pop('src_directory', None)
@@ -160,8 +179,8 @@ class nccl(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
 
             self.__bb = generic_build(
                 base_annotation=self.__class__.__name__,
-                build = ['{} make -j$(nproc) install'.format(
-                    self.__build_environment)],
+                build = ['{0} make -j{1} install'.format(
+                    self.__build_environment, self.__parallel)],
                 comment=False,
                 devel_environment=self.environment_variables,
                 directory='nccl-{}'.format(self.__version) if not self.repository else None,
@@ -191,6 +210,15 @@ class nccl(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
 
         e['PREFIX'] = self.__prefix
 
+        # Only build for the selected GPU architectures
+        cuda_arch = hpccm.config.get_cuda_arch(self.__cuda_arch)
+        if cuda_arch:
+            gencode = ['-gencode=arch=compute_{0},code=sm_{0}'.format(a)
+                       for a in cuda_arch]
+            gencode.append('-gencode=arch=compute_{0},code=compute_{0}'.format(
+                cuda_arch[-1]))
+            e['NVCC_GENCODE'] = shlex_quote(' '.join(gencode))
+
         if self.__make_variables:
           e.update(self.__make_variables)
 
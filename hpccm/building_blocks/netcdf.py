@@ -185,7 +185,7 @@ class netcdf(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
                 comment=False,
                 directory='netcdf-cxx4-{}'.format(self.__version_cxx),
                 # Checks fail when using parallel make.  Disable it.
-                parallel=1 if self.__check else '$(nproc)',
+                parallel=1 if self.__check else None,
                 prefix=self.__prefix,
                 toolchain=self.__toolchain,
                 url='{0}/v{1}.tar.gz'.format(self.__baseurl_cxx,
@@ -208,7 +208,7 @@ class netcdf(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
                 comment=False,
                 directory='netcdf-fortran-{}'.format(self.__version_fortran),
                 # Checks fail when using parallel make.  Disable it.
-                parallel=1 if self.__check else '$(nproc)',
+                parallel=1 if self.__check else None,
                 prefix=self.__prefix,
                 toolchain=self.__toolchain,
                 url='{0}/v{1}.tar.gz'.format(self.__baseurl_fortran,
@@ -97,6 +97,12 @@ class nvhpc(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
     package: Path to the NVIDIA HPC SDK tar package file relative to
     the local build context.  The default value is empty.
 
+    parallel_decompress: Boolean flag to specify whether to unpack
+    the tar package file with a multi-threaded decompressor, if
+    available in the container image.  This only applies if `tarball`
+    is True or `package` is specified.  The default is the global
+    setting, see `hpccm.config.set_parallel_decompress`.
+
     prefix: The top level install prefix.  The default value is
     `/opt/nvidia/hpc_sdk`.  This value is ignored when installing from
     the package repository.
@@ -105,6 +111,11 @@ class nvhpc(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
     stage.  The paths are relative to the `REDIST` directory and
     wildcards are supported.  The default is an empty list.
 
+    stream: Boolean flag to specify whether to download and unpack
+    the tar package file in one pass, without writing it to disk.
+    This only applies if `tarball` is True and `package` is not
+    specified.  The default is False.
+
     tarball: Boolean flag to specify whether the NVIDIA HPC SDK should
     be installed by downloading the tar package file.  If False,
     install from the package repository.  The default is False.
@@ -264,7 +275,8 @@ class nvhpc(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
 
         if self.package or self.__tarball or self.__url:
             # tarball install
-            self += shell(commands=self.__commands)
+            self += shell(_arguments=self.download_mount(),
+                          commands=self.__commands)
         else:
             # repository install
             if Version(self.__version) >= Version('22.9'):
@@ -59,6 +59,11 @@ class nvshmem(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
     cuda: Flag to specify the path to the CUDA installation.  The
     default is `/usr/local/cuda`.
 
+    cuda_arch: List of CUDA GPU architectures to build for, e.g.,
+    `['80', '90']`.  If set, `CMAKE_CUDA_ARCHITECTURES` is added to
+    the list of CMake options.  The default is the global setting, see
+    `hpccm.config.set_cuda_arch`.
+
     environment: Boolean flag to specify whether the environment
     (`CPATH`, `LIBRARY_PATH`, and `PATH`) should be modified to
     include NVSHMEM. The default is True.
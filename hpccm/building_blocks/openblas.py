@@ -34,6 +34,23 @@ from hpccm.common import cpu_arch
 from hpccm.primitives.comment import comment
 from hpccm.toolchain import toolchain
 
+# OpenBLAS TARGET corresponding to archspec CPU targets and their
+# ancestors
+_targets = {'a64fx': 'A64FX',
+            'cooperlake': 'COOPERLAKE',
+            'haswell': 'HASWELL',
+            'nehalem': 'NEHALEM',
+            'neoverse_n1': 'NEOVERSEN1',
+            'neoverse_v1': 'NEOVERSEV1',
+            'neoverse_v2': 'NEOVERSEV2',
+            'power9le': 'POWER9',
+            'power10le': 'POWER10',
+            'sandybridge': 'SANDYBRIDGE',
+            'sapphirerapids': 'SAPPHIRERAPIDS',
+            'skylake_avx512': 'SKYLAKEX',
+            'thunderx2': 'THUNDERX2T99',
+            'zen': 'ZEN'}
+
 class openblas(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
     """The `openblas` building block builds and installs the
     [OpenBLAS](https://www.openblas.net) component.
@@ -56,7 +73,10 @@ class openblas(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
     processors, the default values are `TARGET=ARMV8` and
     `USE_OPENMP=1`.  For ppc64le processors, the default values are
     `TARGET=POWER8` and `USE_OPENMP=1`.  For x86_64 processors, the
-    default value is `USE_OPENMP=1`.
+    default value is `USE_OPENMP=1`.  If the `native-target`
+    optimization profile is selected, see
+    `hpccm.config.set_optimization`, the `TARGET` corresponds to the
+    CPU target.
 
     ospackages: List of OS packages to install prior to building.  The
     default values are `make`, `perl`, `tar`, and `wget`.
@@ -129,15 +149,39 @@ class openblas(bb_base, hpccm.templates.envvars, hpccm.templates.ldconfig):
             if self.__toolchain.FC:
                 self.__make_opts.append('FC={}'.format(self.__toolchain.FC))
 
+            target = self.__target()
             if hpccm.config.g_cpu_arch == cpu_arch.AARCH64:
-                self.__make_opts.extend(['TARGET=ARMV8', 'USE_OPENMP=1'])
+                self.__make_opts.extend(['TARGET={}'.format(target or 'ARMV8'),
+                                         'USE_OPENMP=1'])
             elif hpccm.config.g_cpu_arch == cpu_arch.PPC64LE:
-                self.__make_opts.extend(['TARGET=POWER8', 'USE_OPENMP=1'])
+                self.__make_opts.extend(['TARGET={}'.format(target or 'POWER8'),
+                                         'USE_OPENMP=1'])
             elif hpccm.config.g_cpu_arch == cpu_arch.X86_64:
+                if target:
+                    self.__make_opts.append('TARGET={}'.format(target))
                 self.__make_opts.extend(['USE_OPENMP=1'])
             else: # pragma: no cover
                 raise RuntimeError('Unknown CPU architecture')
 
+    def __target(self): # pylint: disable=no-self-use
+        """Return the OpenBLAS TARGET corresponding to the CPU target if
+        the native-target optimization profile is selected, or None"""
+
+        if ('native-target' not in hpccm.config.get_optimization() or
+                not hpccm.config.g_cpu_target):
+            return None
+
+        import archspec.cpu
+
+        target = archspec.cpu.TARGETS.get(hpccm.config.g_cpu_target)
+        if target is None:
+            return None
+
+        for t in [target] + target.ancestors:
+            if t.name in _targets:
+                return _targets[t.name]
+        return None
+
     def runtime(self, _from='0'):
         """Generate the set of instructions to install the runtime specific
         components from a build in a previous stage.
@@ -240,6 +240,9 @@ class openmpi(bb_base, hpccm.templates.downloader, hpccm.templates.envvars,
             recursive=self.__recursive,
             runtime_environment=self.environment_variables,
             toolchain=self.__toolchain,
+            # The compiler cache command must not be embedded in the
+            # MPI compiler wrappers
+            _compiler_cache_wrap=False,
             **kwargs)
 
         # Container instructions
@@ -55,6 +55,14 @@ class packages(bb_base):
     apt_repositories: A list of apt repositories to add.  The default
     is an empty list.
 
+    cache: Boolean flag to specify whether the package manager
+    indexes and downloaded packages should be kept in a persistent
+    [BuildKit cache mount](https://docs.docker.com/build/cache/optimize/#use-cache-mounts)
+    rather than being downloaded again for every build (Docker
+    specific).  This parameter is ignored for the other container
+    formats.  The default is the global setting, see
+    `hpccm.config.set_package_cache`.
+
     download: Boolean flag to specify whether to download the deb /
     rpm packages instead of installing them.  The default is False.
 
@@ -139,6 +147,7 @@ class packages(bb_base):
         self.__apt_ppas = kwargs.get('apt_ppas', [])
         self.__apt_repositories = kwargs.get('apt_repositories', [])
         self.__aptitude = kwargs.get('aptitude', False)
+        self.__cache = kwargs.get('cache', hpccm.config.g_package_cache)
         self.__download = kwargs.get('download', False)
         self.__download_directory = kwargs.get(
             'download_directory',
@@ -169,6 +178,7 @@ class packages(bb_base):
 
             self += apt_get(_apt_key=self.__apt_key,
                             aptitude=self.__aptitude,
+                            cache=self.__cache,
                             download=self.__download,
                             download_directory=self.__download_directory,
                             extra_opts=self.__extra_opts,
@@ -183,7 +193,8 @@ class packages(bb_base):
             else:
                 ospackages = self.__ospackages
 
-            self += yum(download=self.__download,
+            self += yum(cache=self.__cache,
+                        download=self.__download,
                         download_directory=self.__download_directory,
                         extra_opts=self.__extra_opts,
                         extract=self.__extract,
@@ -211,15 +211,10 @@ class scif(hpccm.base_object):
 
             # Temporarily switch container format to Singularity to write
             # the SCI-F recipe file
-            preserved_ctype = hpccm.config.g_ctype
-            hpccm.config.set_container_format('singularity')
-
-            logging.info('Writing {}'.format(self.__scif_file))
-            with open(self.__scif_file, 'w') as f:
-                f.write('\n\n'.join(str(x) for x in scif_recipe))
-
-            # Restore original container format
-            hpccm.config.g_ctype = preserved_ctype
+            with hpccm.config.context(ctype=container_type.SINGULARITY):
+                logging.info('Writing {}'.format(self.__scif_file))
+                with open(self.__scif_file, 'w') as f:
+                    f.write('\n\n'.join(str(x) for x in scif_recipe))
 
             # Container instructions to copy the SCI-F recipe file
             # into the container and then run scif
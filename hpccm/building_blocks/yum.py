@@ -27,7 +27,7 @@ import posixpath
 import hpccm.config
 
 from hpccm.building_blocks.base import bb_base
-from hpccm.common import cpu_arch, linux_distro
+from hpccm.common import container_type, cpu_arch, linux_distro
 from hpccm.primitives.shell import shell
 
 class yum(bb_base):
@@ -40,6 +40,13 @@ class yum(bb_base):
 
     # Parameters
 
+    cache: Boolean flag to specify whether the repository metadata
+    and downloaded packages should be kept in a persistent [BuildKit cache mount](https://docs.docker.com/build/cache/optimize/#use-cache-mounts)
+    rather than being downloaded again for every build (Docker
+    specific).  The cache directories are not included in the image.
+    This parameter is ignored for the other container formats.  The
+    default is the global setting, see `hpccm.config.set_package_cache`.
+
     download: Boolean flag to specify whether to download the rpm
     packages instead of installing them.  The default is False.
 
@@ -68,8 +75,9 @@ class yum(bb_base):
     empty list.
 
     powertools: Boolean flag to specify whether to enable the
-    PowerTools repository.  The default is False.  This parameter is
-    only recognized if the distribution version is 8.x.
+    PowerTools repository, or its successor the CRB repository for
+    version 9.x and later.  The default is False.  This parameter is
+    only recognized if the distribution version is 8.x or later.
 
     release_stream: Boolean flag to specify whether to enable the [CentOS release stream](https://wiki.centos.org/Manuals/ReleaseNotes/CentOSStream)
     repository.  The default is False.  This parameter is only
@@ -99,6 +107,7 @@ class yum(bb_base):
 
         super(yum, self).__init__()
 
+        self.__cache = kwargs.get('cache', hpccm.config.g_package_cache)
         self.__commands = []
         self.__download = kwargs.get('download', False)
         self.__download_args = kwargs.get('download_args', '')
@@ -115,12 +124,17 @@ class yum(bb_base):
         self.__powertools = kwargs.get('powertools', False)
         self.__release_stream = kwargs.get('release_stream', False)
         self.__repositories = kwargs.get('repositories', [])
+        self.__run_arguments = None
         self.__scl = kwargs.get('scl', False)
         self.__yum4 = kwargs.get('yum4', False)
 
         if hpccm.config.g_linux_distro != linux_distro.CENTOS: # pragma: no cover
             logging.warning('Using yum on a non-RHEL based Linux distribution')
 
+        # The package cache relies on Docker BuildKit cache mounts
+        if self.__cache and hpccm.config.g_ctype != container_type.DOCKER:
+            self.__cache = False
+
         # Set the CPU architecture specific parameters
         self.__cpu_arch()
 
@@ -133,7 +147,8 @@ class yum(bb_base):
 
     def __instructions(self):
         """Fill in container instructions"""
-        self += shell(chdir=False, commands=self.__commands)
+        self += shell(_arguments=self.__run_arguments, chdir=False,
+                      commands=self.__commands)
 
     def __cpu_arch(self):
         """Based on the CPU architecture, set values accordingly.  A user
@@ -150,6 +165,19 @@ class yum(bb_base):
             self.__download_args += ' ' + ' '.join(self.__extra_opts)
             self.__opts.extend(self.__extra_opts)
 
+        if self.__cache and (self.__epel or self.ospackages):
+            # Mount the package cache directories and keep the
+            # downloaded packages after installation.  yum 4 (dnf)
+            # uses a different cache directory.
+            cache_directories = ['/var/cache/yum']
+            if (self.__yum4 or
+                hpccm.config.g_linux_version >= Version('8.0')):
+                cache_directories.append('/var/cache/dnf')
+            self.__run_arguments = ' '.join(
+                ['--mount=type=cache,target={},sharing=locked'.format(d)
+                 for d in cache_directories])
+            self.__opts.append('--setopt=keepcache=1')
+
         # Use yum version 4 is requested.  yum 4 is the default on
         # CentOS 8.
         yum = 'yum'
@@ -191,7 +219,10 @@ class yum(bb_base):
                 # dnf-utils will be installed above if repositories are
                 # enabled
                 self.__commands.append('yum install -y dnf-utils')
-            self.__commands.append('yum-config-manager --set-enabled powertools')
+            if hpccm.config.g_linux_version >= Version('9.0'):
+                self.__commands.append('yum-config-manager --set-enabled crb')
+            else:
+                self.__commands.append('yum-config-manager --set-enabled powertools')
 
         if (self.__release_stream and
             hpccm.config.g_linux_version >= Version('8.0') and
@@ -246,5 +277,5 @@ class yum(bb_base):
                 install = install + ' \\\n'.join(packages)
                 self.__commands.append(install)
 
-        if self.__epel or self.ospackages:
+        if (self.__epel or self.ospackages) and not self.__cache:
             self.__commands.append('rm -rf /var/cache/yum/*')
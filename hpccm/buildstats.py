@@ -0,0 +1,168 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name
+
+"""Build time statistics from instrumented container builds
+
+When instrumentation is enabled, see `hpccm.config.set_instrument`,
+the shell commands of each building block print a marker line with
+the name of the building block, the phase of the build, and a
+timestamp in seconds when the phase starts, and a marker with the
+`end` phase when the commands are done, e.g.,
+
+```
+hpccm-mark openmpi download 1700000000
+hpccm-mark openmpi compile 1700000012
+hpccm-mark openmpi end 1700000345
+```
+
+The `hpccm-buildstats` command reads a saved build log, e.g., from
+`docker build --progress=plain`, `singularity build`, or a bash
+script, and reports the time spent in each building block and phase.
+"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import argparse
+import json
+import re
+import sys
+
+from hpccm.version import __version__
+
+# Phases of the build, in the order they are reported
+phases = ['download', 'packages', 'compile', 'other']
+
+# Marker printed by the instrumented commands.  The format string is
+# separate from the values, so that neither the command itself nor a
+# shell trace of it, e.g., `sh -x`, matches the marker pattern.
+_marker = re.compile(r'hpccm-mark (\S+) (\S+) (\d+)\s*$')
+
+# Docker BuildKit step prefix, e.g., "#12 3.456 "
+_step = re.compile(r'^#(\d+) ')
+
+def marker(name, phase):
+    """Return the shell command to print the marker for the start of a
+    phase of a building block"""
+    return ('printf \'hpccm-mark %s %s %s\\n\' {0} {1} '
+            '"$(date +%s)"'.format(name, phase))
+
+def parse(lines):
+    """Return the time spent in each building block and phase of a
+    build log
+
+    # Arguments
+
+    lines: iterable of the lines of the build log.
+
+    # Returns
+
+    A dictionary, by building block name, of dictionaries with the
+    `wall` time and the time of each phase in seconds, and the
+    `count` of instrumented instructions that completed.  Instructions
+    that did not complete, e.g., because the build failed, are not
+    included.
+
+    """
+
+    stats = {}
+    current = {}  # Phase and start time, by build step and name
+    segments = {} # Time of each phase so far, by build step and name
+
+    for line in lines:
+        m = _marker.search(line)
+        if not m:
+            continue
+        name, phase, timestamp = m.group(1), m.group(2), int(m.group(3))
+
+        # Instructions of different stages may be built concurrently,
+        # so keep track of each building block per build step
+        step = _step.match(line)
+        key = (step.group(1) if step else None, name)
+
+        if key in current:
+            previous, start = current.pop(key)
+            segment = segments.setdefault(key, {})
+            segment[previous] = segment.get(previous, 0) + timestamp - start
+
+        if phase != 'end':
+            current[key] = (phase, timestamp)
+            continue
+
+        totals = stats.setdefault(name, dict(
+            [('count', 0), ('wall', 0)] + [(p, 0) for p in phases]))
+        totals['count'] += 1
+        for p, seconds in segments.pop(key, {}).items():
+            totals[p] = totals.get(p, 0) + seconds
+            totals['wall'] += seconds
+
+    return stats
+
+def _duration(seconds):
+    """Format a duration in seconds as H:MM:SS"""
+    return '{0}:{1:02d}:{2:02d}'.format(seconds // 3600, seconds // 60 % 60,
+                                        seconds % 60)
+
+def table(stats):
+    """Return the statistics as a table, sorted by decreasing wall
+    time"""
+
+    columns = ['wall'] + phases
+    lines = [('{:<24} {:>5}' + ' {:>9}' * len(columns)).format(
+        'building block', 'count', *columns)]
+    totals = dict((c, 0) for c in columns)
+    for name in sorted(stats, key=lambda n: (-stats[n]['wall'], n)):
+        s = stats[name]
+        lines.append(('{:<24} {:>5}' + ' {:>9}' * len(columns)).format(
+            name, s['count'], *[_duration(s[c]) for c in columns]))
+        for c in columns:
+            totals[c] += s[c]
+    lines.append(('{:<24} {:>5}' + ' {:>9}' * len(columns)).format(
+        'total', '', *[_duration(totals[c]) for c in columns]))
+    return '\n'.join(lines)
+
+def main(): # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description='Report the time spent in each building block of a '
+        'container image build instrumented with hpccm --instrument')
+    parser.add_argument('log', type=str, nargs='?', default='-',
+                        help='build log, e.g., the output of docker build '
+                        '--progress=plain, or - for standard input '
+                        '(default)')
+    parser.add_argument('--json', action='store_true', default=False,
+                        help='print the statistics as JSON')
+    parser.add_argument('--version', action='version', version=__version__)
+
+    args = parser.parse_args()
+
+    if args.log == '-':
+        stats = parse(sys.stdin)
+    else:
+        with open(args.log) as f:
+            stats = parse(f)
+
+    if not stats:
+        sys.stderr.write('no instrumented building blocks found\n')
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(stats, indent=2, sort_keys=True))
+    else:
+        print(table(stats))
+
+if __name__ == "__main__": # pragma: no cover
+    main()
@@ -20,11 +20,14 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 from __future__ import print_function
 
-import archspec.cpu
 import argparse
 import logging
+import sys
 
 import hpccm
+import hpccm.config
+import hpccm.fetch
+import hpccm.profile
 from hpccm.version import __version__
 
 class KeyValue(argparse.Action): # pylint: disable=too-few-public-methods
@@ -42,18 +45,79 @@ class KeyValue(argparse.Action): # pylint: disable=too-few-public-methods
         setattr(namespace, self.dest, d)
 
 def main(): # pragma: no cover
-    parser = argparse.ArgumentParser(description='HPC Container Maker')
+    # The matrix and server modules are only imported when needed to
+    # keep the start up time low
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from hpccm import server
+        server.main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description='HPC Container Maker',
+        epilog='Use "hpccm serve --help" for the recipe rendering server.')
+    parser.add_argument('--cmake-generator', type=str, default=None,
+                        help='CMake generator for building blocks that ' +
+                        'build with CMake, e.g., Ninja')
     parser.add_argument('--cpu-target', type=str, default=None,
-                        choices=[a for a in sorted(archspec.cpu.TARGETS)],
                         help='cpu microarchitecture optimization target')
+    parser.add_argument('--cuda-arch', type=str, default=None,
+                        help='comma separated CUDA GPU architectures to ' +
+                        'build for, e.g., 80,90')
+    parser.add_argument('--fan-out', action='store_true', default=False,
+                        help='build independent building blocks in ' +
+                        'separate stages that can be built in parallel ' +
+                        '(Docker specific)')
+    parser.add_argument('--fetch-manifest', action='store_true',
+                        default=False,
+                        help='print a JSON manifest of the source URLs and ' +
+                        'git repositories referenced by the recipe instead ' +
+                        'of the container spec, for use with hpccm-fetch')
     parser.add_argument('--format', type=str, default='docker',
                         choices=[i.name.lower() for i in hpccm.container_type],
                         help='select output format')
+    parser.add_argument('--hoist-packages', action='store_true',
+                        default=False,
+                        help='install the OS packages of each stage in ' +
+                        'as few transactions as possible after the base ' +
+                        'image')
+    parser.add_argument('--instrument', action='store_true', default=False,
+                        help='print timestamped markers around the ' +
+                        'commands of each building block when the ' +
+                        'container image is built, for use with ' +
+                        'hpccm-buildstats')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='number of parallel processes to use with ' +
+                        '--matrix')
+    parser.add_argument('--matrix', type=str, default=None,
+                        help='generate container specs for all the ' +
+                        'combinations in the MATRIX file')
+    parser.add_argument('--optimization', type=str, default=None,
+                        help='comma separated toolchain optimization ' +
+                        'profiles: lto, native-target, pgo-generate, ' +
+                        'pgo-use')
+    parser.add_argument('--optimize-layers', action='store_true',
+                        default=False,
+                        help='merge adjacent compatible instructions into ' +
+                        'fewer layers and report the number of ' +
+                        'instructions removed')
+    parser.add_argument('--output-directory', type=str, default='.',
+                        help='directory for the container specs generated ' +
+                        'with --matrix')
     parser.add_argument('--print-exceptions', action='store_true',
                         default=False,
                         help='print exceptions (stack traces)')
-    parser.add_argument('--recipe', required=True,
+    parser.add_argument('--profile', type=str, nargs='?', const='-',
+                        default=None, metavar='FILE',
+                        help='time the building blocks and included ' +
+                        'recipes and print a table to standard error, ' +
+                        'or write the timings to FILE as JSON if it ends ' +
+                        'in .json, or cProfile statistics otherwise')
+    parser.add_argument('--recipe',
                         help='generate a container spec for the RECIPE file')
+    parser.add_argument('--server', type=str, default=None,
+                        help='render the recipe using a running "hpccm ' +
+                        'serve" instance at SERVER, host:port or ' +
+                        'unix:/path/to/socket')
     parser.add_argument('--single-stage', action='store_true', default=False,
                         help='only process the first stage of a multi-stage ' +
                         'recipe')
@@ -73,19 +137,105 @@ def main(): # pragma: no cover
 
     args = parser.parse_args()
 
-    # configure logger
-    logging.basicConfig(format='%(levelname)s: %(message)s')
-
-    recipe = hpccm.recipe(args.recipe,
-                          cpu_target=args.cpu_target,
-                          ctype=hpccm.container_type[args.format.upper()],
-                          raise_exceptions=args.print_exceptions,
-                          single_stage=args.single_stage,
-                          singularity_version=args.singularity_version,
-                          userarg=args.userarg,
-                          working_directory=args.working_directory,
-                          singularity_tmp_fallback=args.singularity_tmp_fallback)
-    print(recipe)
+    # configure logger, the optimizations report at the INFO level
+    logging.basicConfig(format='%(levelname)s: %(message)s',
+                        level=logging.INFO if (args.fan_out or
+                                               args.hoist_packages or
+                                               args.optimize_layers)
+                        else logging.WARNING)
+
+    # Only load the archspec microarchitecture database if a CPU
+    # target is specified
+    if args.cpu_target:
+        import archspec.cpu
+        if args.cpu_target not in archspec.cpu.TARGETS:
+            parser.error(
+                "argument --cpu-target: invalid choice: '{0}' (choose from {1})".format(
+                    args.cpu_target,
+                    ', '.join("'{}'".format(a)
+                              for a in sorted(archspec.cpu.TARGETS))))
+
+    if args.profile and (args.matrix or args.server):
+        parser.error('--profile cannot be used with --matrix or --server')
+
+    # Recipe level options that select a global configuration setting
+    options = dict((name, getattr(args, name))
+                   for name, _, _ in hpccm.config._recipe_options) # pylint: disable=protected-access
+
+    if args.matrix:
+        from hpccm import matrix as hpccm_matrix
+        matrix = hpccm_matrix.load(args.matrix)
+        if args.recipe:
+            matrix['recipe'] = args.recipe
+        if not matrix.get('recipe'):
+            parser.error('no recipe specified')
+        matrix.setdefault('single_stage', args.single_stage)
+        for name, value in options.items():
+            matrix.setdefault(name, value)
+        results = hpccm_matrix.render(
+            hpccm_matrix.cells(matrix, cpu_target=args.cpu_target,
+                               format=args.format, userarg=args.userarg),
+            jobs=args.jobs, output_directory=args.output_directory)
+        if any(error for _, _, error in results):
+            sys.exit(1)
+        return
+
+    if not args.recipe:
+        parser.error('the following arguments are required: --recipe')
+
+    if args.server:
+        from hpccm import server
+        request = {'recipe': args.recipe,
+                   'cpu_target': args.cpu_target,
+                   'format': args.format,
+                   'single_stage': args.single_stage,
+                   'userarg': args.userarg}
+        request.update(options)
+        try:
+            response = server.client(request, address=args.server)
+        except Exception as e:
+            logging.error(e)
+            sys.exit(1)
+        for message in response.get('warnings', []):
+            sys.stderr.write(message + '\n')
+        print(response['spec'])
+        return
+
+    # cProfile is only imported when needed to keep the start up time
+    # low
+    profiler = None
+    if args.profile and args.profile != '-' and \
+       not args.profile.endswith('.json'):
+        import cProfile
+        profiler = cProfile.Profile()
+
+    with hpccm.fetch.record() as manifest, hpccm.profile.record() as timings:
+        if profiler:
+            profiler.enable()
+        try:
+            recipe = hpccm.recipe(args.recipe,
+                                  cpu_target=args.cpu_target,
+                                  ctype=hpccm.container_type[args.format.upper()],
+                                  raise_exceptions=args.print_exceptions,
+                                  single_stage=args.single_stage,
+                                  userarg=args.userarg,
+                                  **options)
+        finally:
+            if profiler:
+                profiler.disable()
+
+    if profiler:
+        profiler.dump_stats(args.profile)
+    elif args.profile == '-':
+        sys.stderr.write(timings.table() + '\n')
+    elif args.profile:
+        with open(args.profile, 'w') as f:
+            f.write(timings.json() + '\n')
+
+    if args.fetch_manifest:
+        print(manifest.json())
+    else:
+        print(recipe)
 
 if __name__ == "__main__": # pragma: no cover
     main()
@@ -19,20 +19,53 @@
 #
 # And access variables as
 # hpccm.config.var
+#
+# The variables may be overridden for the current thread or asyncio
+# task with the context() context manager.
 
 from __future__ import absolute_import
 
 from packaging.version import Version
-import archspec.cpu
+from six import string_types
+import contextlib
 import logging
+import os
 import platform
+import re
 import sys
+import threading
+import types
+
+try:
+  from contextvars import ContextVar as _ContextVar
+except ImportError: # pragma: no cover
+  class _ContextVar(object):
+    """Thread-local substitute for contextvars.ContextVar on Python
+    versions prior to 3.7"""
+
+    def __init__(self, name, default=None):
+      self.name = name
+      self.__default = default
+      self.__local = threading.local()
+
+    def get(self):
+      return getattr(self.__local, 'value', self.__default)
+
+    def set(self, value):
+      token = self.get()
+      self.__local.value = value
+      return token
+
+    def reset(self, token):
+      self.__local.value = token
 
 from hpccm.common import cpu_arch
 from hpccm.common import container_type
 from hpccm.common import linux_distro
 
 # Global variables
+g_cmake_generator = None # CMake generator, e.g., Ninja
+g_compiler_cache = None # Compiler cache command, ccache or sccache
 g_cpu_arch = cpu_arch.X86_64         # CPU architecture
 if platform.machine() == 'aarch64':
   g_cpu_arch = cpu_arch.AARCH64
@@ -40,12 +73,149 @@ elif platform.machine() == 'ppc64le':
   g_cpu_arch = cpu_arch.PPC64LE
 g_cpu_target = None                  # CPU optimization target
 g_ctype = container_type.DOCKER      # Container type
+g_cuda_arch = None # CUDA GPU architectures, e.g., 80
+g_fan_out = False # Build independent building blocks in separate stages
+g_git_filter = None # Partial clone filter for git repositories
+g_git_jobs = None # Number of git submodules to fetch in parallel
+g_git_shallow = False # Fetch only the required commits of git repositories
+g_git_verify_cache = None # Git remote verification cache file
+g_git_verify_ttl = 3600 # Lifetime of git verification results in seconds
+g_hoist_packages = False # Install all OS packages in a single transaction
+g_instrument = False # Emit build timing markers for each building block
 g_linux_distro = linux_distro.UBUNTU # Linux distribution
 g_linux_version = Version('16.04') # Linux distribution version
+g_optimization = None # Toolchain optimization profiles
+g_optimize_layers = False # Merge adjacent instructions into fewer layers
+g_package_cache = False # Cache package manager downloads between builds
+g_parallel = '$(nproc)' # Number of parallel build jobs
+g_parallel_decompress = False # Use multi-threaded decompressors for tarballs
+g_parallel_memory = 1 # Estimated memory per build job, in GiB
 g_singularity_version = Version('2.6') # Singularity version
+g_source_cache = None # Source download cache directory
 g_wd = '/var/tmp' # Working directory
 g_singularity_tmp_fallback = True    # Singularity / Apptainer behavior flags
 
+@contextlib.contextmanager
+def context(**kwargs):
+  """Context manager to override the configuration for the current
+  thread or asyncio task
+
+  The configuration inside the context starts as a copy of the
+  current configuration, plus any overrides.  Changes made inside the
+  context, e.g., by the `baseimage` primitive setting the Linux
+  distribution, are local to the context and discarded when the
+  context exits.  This allows multiple recipes to be processed
+  concurrently in the same process.
+
+  # Arguments
+
+  Any configuration variable, without the `g_` prefix, e.g.,
+  `ctype`, `cpu_arch`, `cpu_target`, `linux_distro`, or `wd`.  The
+  `ctype` and `cpu_arch` values may be specified as strings, e.g.,
+  `docker` or `aarch64`.  A `linux_distro` string, e.g., `centos8`,
+  also sets the Linux version.
+
+  # Raises
+
+  RuntimeError: unrecognized configuration variable
+
+  # Examples
+
+  ```python
+  with hpccm.config.context(ctype=container_type.SINGULARITY,
+                            linux_distro='ubuntu22'):
+      print(hpccm.recipe('recipe.py'))
+  ```
+
+  """
+
+  this = sys.modules[__name__]
+
+  for key in kwargs:
+    if 'g_' + key not in _variables:
+      raise RuntimeError('Unrecognized configuration variable: {}'.format(key))
+
+  if not _context_local: # pragma: no cover
+    # Module properties are not supported, so fall back to saving and
+    # restoring the global variables.  This is not thread safe.
+    saved = dict((name, getattr(this, name)) for name in _variables)
+
+  settings = dict((name, getattr(this, name)) for name in _variables)
+  token = _context.set(settings)
+  try:
+    for key, value in kwargs.items():
+      if isinstance(value, string_types) and key == 'ctype':
+        this.g_ctype = container_type[value.upper()]
+      elif isinstance(value, string_types) and key == 'cpu_arch':
+        set_cpu_architecture(value)
+      elif isinstance(value, string_types) and key == 'linux_distro':
+        set_linux_distro(value)
+      elif isinstance(value, string_types) and key in ['linux_version',
+                                                     'singularity_version']:
+        setattr(this, 'g_' + key, Version(value))
+      else:
+        setattr(this, 'g_' + key, value)
+    yield
+  finally:
+    _context.reset(token)
+    if not _context_local: # pragma: no cover
+      for name, value in saved.items():
+        setattr(this, name, value)
+
+def get_cmake_generator(generator=None):
+  """Return the CMake generator to use, e.g., `Ninja`, or None to use
+  the CMake default generator.
+
+  # Arguments
+
+  generator: A value of None selects the global setting, see
+  `set_cmake_generator`.  False selects the CMake default generator.
+  A string specifies the CMake generator.
+
+  """
+  this = sys.modules[__name__]
+
+  if generator is None:
+    return this.g_cmake_generator
+  elif not generator:
+    return None
+  return generator
+
+def get_compiler_cache(cache=None):
+  """Return the compiler cache command to use, `ccache` or `sccache`,
+  or None if the compiler cache is disabled.
+
+  # Arguments
+
+  cache: A value of None selects the global setting, see
+  `set_compiler_cache`.  False disables the compiler cache.  True
+  selects the global compiler cache, or `ccache` if the global
+  compiler cache is not enabled.  A string specifies the compiler
+  cache command.
+
+  """
+  this = sys.modules[__name__]
+
+  if cache is None:
+    return this.g_compiler_cache
+  elif cache is True:
+    return this.g_compiler_cache or 'ccache'
+  elif not cache:
+    return None
+  elif cache not in ['ccache', 'sccache']:
+    raise RuntimeError('Unrecognized compiler cache: {}'.format(cache))
+  return cache
+
+def get_compiler_cache_directory(cache):
+  """Return the cache directory of a compiler cache command
+
+  # Arguments
+
+  cache (string): The compiler cache command, `ccache` or `sccache`.
+
+  """
+  return '/var/cache/hpccm/{}'.format(cache)
+
 def get_cpu_architecture():
   """Return the architecture string for the currently configured CPU
   architecture, e.g., `aarch64`, `ppc64le`, or `x86_64`.
@@ -82,6 +252,10 @@ def get_cpu_optimization_flags(compiler, version='9999'):
   if not this.g_cpu_target:
     return None
 
+  # Loading the archspec microarchitecture database is relatively
+  # expensive, so only import it when a CPU target is set
+  import archspec.cpu
+
   if this.g_cpu_target not in archspec.cpu.TARGETS:
     logging.warning('unrecognized CPU target "{}"'.format(this.g_cpu_target))
     return None
@@ -93,6 +267,48 @@ def get_cpu_optimization_flags(compiler, version='9999'):
 
   return None
 
+def get_cuda_arch(arch=None):
+  """Return the sorted list of CUDA GPU architectures to build for,
+  as compute capabilities without a period, e.g., `['80', '90']`.
+
+  # Arguments
+
+  arch: A value of None selects the global setting, see
+  `set_cuda_arch`.  False selects the default GPU architectures of
+  each component.  A string specifies a GPU architecture or a comma
+  separated list of GPU architectures, and a list specifies a list of
+  GPU architectures.
+
+  # Raises
+
+  RuntimeError: unrecognized GPU architecture
+
+  """
+  this = sys.modules[__name__]
+
+  if arch is None:
+    arch = this.g_cuda_arch
+  if not arch:
+    return []
+  if isinstance(arch, string_types):
+    arch = arch.split(',')
+  elif not isinstance(arch, (list, tuple)):
+    arch = [arch]
+
+  archs = []
+  for a in arch:
+    a = str(a).strip()
+    if not a:
+      continue
+    m = re.match(r'^(?:sm_|compute_)?(\d+)(?:\.(\d))?([af]?)$', a)
+    if not m:
+      raise RuntimeError('Unrecognized CUDA GPU architecture: {}'.format(a))
+    cc = '{0}{1}{2}'.format(m.group(1), m.group(2) or '', m.group(3))
+    if cc not in archs:
+      archs.append(cc)
+
+  return sorted(archs, key=lambda cc: (int(re.match(r'\d+', cc).group()), cc))
+
 def get_format():
   """Return the container format string for the currently configured
   format, e.g., `bash`, `docker`, or `singularity`."""
@@ -108,6 +324,181 @@ def get_format():
   else: # pragma: no cover
     raise RuntimeError('Unrecognized format')
 
+# Shell expression for the number of parallel build jobs.  The
+# number of processors is limited by the cgroup (v2 or v1) CPU quota,
+# and by the available memory, i.e., the lower of the system available
+# memory and the unused cgroup memory limit, divided by the estimated
+# memory per job (in kB).
+_parallel_auto = (
+  "$(awk -v n=$(nproc) -v m={} '"
+  'function r(f,  l) {{ l = ""; getline l < f; close(f); return l }} '
+  'BEGIN {{ '
+  'c = r("/sys/fs/cgroup/cpu.max"); '
+  'if (c == "") c = r("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") " " '
+  'r("/sys/fs/cgroup/cpu/cpu.cfs_period_us"); '
+  'split(c, q, " "); '
+  'if (q[1] + 0 > 0 && q[2] + 0 > 0 && q[1] / q[2] < n) '
+  'n = int((q[1] + q[2] - 1) / q[2]); '
+  'while ((getline l < "/proc/meminfo") > 0) '
+  'if (l ~ /^MemAvailable:/) {{ split(l, a, " "); k = a[2] }} '
+  'l = r("/sys/fs/cgroup/memory.max"); u = r("/sys/fs/cgroup/memory.current"); '
+  'if (l == "") {{ l = r("/sys/fs/cgroup/memory/memory.limit_in_bytes"); '
+  'u = r("/sys/fs/cgroup/memory/memory.usage_in_bytes") }} '
+  'if (l + 0 > 0 && (l - u) / 1024 < k) k = (l - u) / 1024; '
+  'if (k > 0 && int(k / m) < n) n = int(k / m); '
+  "print (n > 1 ? n : 1) }}')")
+
+# Toolchain optimization profiles, see set_optimization
+_optimization_profiles = ['lto', 'native-target', 'pgo-generate', 'pgo-use']
+
+def get_git_verify_cache():
+  """Return the git remote verification cache file, or None if the
+  cache is disabled.  See `set_git_verify_cache`."""
+  this = sys.modules[__name__]
+
+  if this.g_git_verify_cache is True:
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or
+                        os.path.join(os.path.expanduser('~'), '.cache'),
+                        'hpccm', 'git-verify.json')
+  return this.g_git_verify_cache or None
+
+def get_optimization(profiles=None):
+  """Return the list of toolchain optimization profiles to use.
+
+  # Arguments
+
+  profiles: A value of None selects the global setting, see
+  `set_optimization`.  False disables the optimization profiles.  A
+  string specifies a profile or a comma separated list of profiles,
+  and a list specifies a list of profiles.
+
+  # Raises
+
+  RuntimeError: unrecognized or conflicting optimization profiles
+
+  """
+  this = sys.modules[__name__]
+
+  if profiles is None:
+    profiles = this.g_optimization
+  if not profiles:
+    return []
+  if isinstance(profiles, string_types):
+    profiles = [p.strip() for p in profiles.split(',') if p.strip()]
+
+  for p in profiles:
+    if p not in _optimization_profiles:
+      raise RuntimeError('Unrecognized optimization profile: {}'.format(p))
+  if 'pgo-generate' in profiles and 'pgo-use' in profiles:
+    raise RuntimeError('The pgo-generate and pgo-use optimization '
+                       'profiles are mutually exclusive')
+  return list(profiles)
+
+def get_parallel(parallel=None, memory=None):
+  """Return the number of parallel build jobs to use, e.g., for
+  `make -j`.
+
+  # Arguments
+
+  parallel: A value of None selects the global setting, see
+  `set_parallel`.  `auto` selects a shell expression that computes
+  the number of jobs when the container image is built.  Any other
+  value is the number of jobs, e.g., `4` or `$(nproc)`.
+
+  memory: The estimated memory per build job in GiB when `parallel`
+  is `auto`.  A value of None selects the global setting, see
+  `set_parallel`.
+
+  """
+  this = sys.modules[__name__]
+
+  if parallel is None:
+    parallel = this.g_parallel
+  if parallel != 'auto':
+    return parallel
+
+  if not memory:
+    memory = this.g_parallel_memory
+  return _parallel_auto.format(max(1, int(memory * 1024 * 1024)))
+
+def get_source_cache(cache=None):
+  """Return the source cache directory to use, or None if the source
+  cache is disabled.
+
+  # Arguments
+
+  cache: A value of None selects the global setting, see
+  `set_source_cache`.  False disables the source cache.  True
+  selects the global source cache directory, or the default
+  directory if the global source cache is not enabled.  A string
+  specifies the source cache directory.
+
+  """
+  this = sys.modules[__name__]
+
+  if cache is None:
+    return this.g_source_cache
+  elif cache is True:
+    return this.g_source_cache or '/var/cache/hpccm/sources'
+  elif not cache:
+    return None
+  return cache
+
+def set_cmake_generator(generator='Ninja'):
+  """Set the default CMake generator
+
+  The `CMakeBuild` template, and therefore the `generic_cmake`,
+  `kokkos`, `magma`, and other building blocks that build with CMake,
+  use the global setting unless the `generator` parameter is
+  specified.  With the `Ninja` generator, these building blocks
+  install Ninja from the `ninja-build` OS package, and the number of
+  parallel build jobs is passed with `cmake --build --parallel`.
+
+  # Arguments
+
+  generator (string): The CMake generator, e.g., `Ninja`.  None
+  selects the CMake default generator, i.e., Unix Makefiles.  The
+  default is `Ninja`.
+
+  """
+  this = sys.modules[__name__]
+  this.g_cmake_generator = generator
+
+def set_compiler_cache(cache='ccache'):
+  """Enable or disable caching of compiler output between builds
+
+  The `ConfigureMake` and `CMakeBuild` templates, and therefore the
+  `generic_autotools`, `generic_cmake`, and most other building
+  blocks that build from source, as well as `generic_build`, enable
+  the compiler cache and report the cache statistics after each build
+  step.  ccache is installed from the OS package and wraps the system
+  compilers using its masquerade directory.  sccache is not
+  installed by the building blocks, so it must already be in the
+  container image, and the compilers specified by the toolchain are
+  prefixed by the sccache command.  For CMake, the
+  compiler cache is also set as the compiler launcher of each
+  language.  Building blocks that build compiler wrappers, e.g.,
+  `openmpi`, do not use sccache so that the wrappers do not embed
+  the sccache command.
+
+  For Docker, the cache directory, `/var/cache/hpccm/ccache` or
+  `/var/cache/hpccm/sccache`, is a persistent [BuildKit cache mount](https://docs.docker.com/build/cache/optimize/#use-cache-mounts)
+  that the building blocks add to the `RUN` instructions that build
+  with the compiler cache.  For Singularity and bash, the cache
+  directory should be a host directory, e.g., bind mounted with
+  `singularity build --bind`.
+
+  # Arguments
+
+  cache (string): The compiler cache command, `ccache` or `sccache`.
+  None disables the compiler cache.  The default is `ccache`.
+
+  """
+  this = sys.modules[__name__]
+  if cache and cache not in ['ccache', 'sccache']:
+    raise RuntimeError('Unrecognized compiler cache: {}'.format(cache))
+  this.g_compiler_cache = cache
+
 def set_container_format(ctype):
   """Set the container format
 
@@ -164,6 +555,183 @@ def set_cpu_target(target):
   this = sys.modules[__name__]
   this.g_cpu_target = target
 
+def set_cuda_arch(arch):
+  """Set the default CUDA GPU architectures
+
+  Building for only the GPU architectures of the target systems
+  reduces both the build time and the size of the container image.
+  The `CMakeBuild` template, and therefore the `generic_cmake` and
+  other building blocks that build with CMake, sets
+  `CMAKE_CUDA_ARCHITECTURES`.  The `amgx`, `kokkos`, `magma`,
+  `nccl`, and `nvshmem` building blocks also set their own GPU
+  architecture options.  Options specified explicitly take
+  precedence.
+
+  # Arguments
+
+  arch: A GPU architecture or a list of GPU architectures, either as
+  a compute capability, e.g., `8.0` or `80`, or as a GPU target,
+  e.g., `sm_80`.  A string may also be a comma separated list.  None
+  selects the default GPU architectures of each component.
+
+  # Raises
+
+  RuntimeError: unrecognized GPU architecture
+
+  # Examples
+
+  ```python
+  hpccm.config.set_cuda_arch(['80', '90'])
+  ```
+
+  """
+  this = sys.modules[__name__]
+  get_cuda_arch(arch if arch is not None else False) # validate
+  this.g_cuda_arch = arch
+
+def set_fan_out(enable=True):
+  """Enable or disable building independent building blocks in
+  separate stages (Docker specific).
+
+  Each building block that installs into its own prefix and does not
+  depend on the other layers of a stage, other than the layers before
+  it in a shared base stage, is built in its own stage so that the
+  building blocks may be built in parallel, e.g., by BuildKit.  The
+  stage then copies the prefix of each of these building blocks from
+  its stage.  Dependencies are inferred from the toolchains, prefixes,
+  and environment variables of the building blocks.  Use
+  `Stage.depends` to specify dependencies that cannot be inferred.
+
+  Only named stages are built this way, since the stages are
+  referred to by name.
+
+  # Arguments
+
+  enable (bool): True to enable, False to disable (default).
+
+  """
+  this = sys.modules[__name__]
+  this.g_fan_out = enable
+
+def set_git_clone(shallow=True, filter_spec=None, jobs=None):
+  """Set the default options for cloning git repositories.
+
+  With `shallow`, a git repository that is checked out at a specific
+  commit fetches only that commit instead of the full history of the
+  repository, and the submodules of recursive clones are shallow
+  clones as well.  If the git server does not allow fetching a commit
+  directly, or the commit is abbreviated, the full history is fetched
+  instead.
+
+  Note that these options require git 2.19 or later in the container
+  image.  Repositories cloned with git LFS always fetch the full
+  history if a commit is specified.
+
+  # Arguments
+
+  shallow (bool): True to fetch only the required commits, False to
+  fetch the full history when a commit is specified (default).
+
+  filter_spec (string): The partial clone filter, e.g., `blob:none`
+  to download file contents only for the commit that is checked out.
+  If None, the complete objects are downloaded (default).
+
+  jobs (int): The number of submodules of recursive clones to fetch
+  in parallel.  If None, the git default is used (default).
+
+  # Examples
+
+  ```python
+  hpccm.config.set_git_clone(shallow=True, filter_spec='blob:none', jobs=8)
+  ```
+
+  """
+  this = sys.modules[__name__]
+  this.g_git_filter = filter_spec
+  this.g_git_jobs = jobs
+  this.g_git_shallow = shallow
+
+def set_git_verify_cache(path=True, ttl=3600):
+  """Set the git remote verification cache.
+
+  The `git` template verifies that a repository and branch exist when
+  the `verify` parameter is specified.  If the cache is enabled, the
+  commit each repository and branch resolves to is recorded in the
+  cache, so later renders of the recipe do not access the network
+  until the result expires.  The cache is disabled by default.
+
+  # Arguments
+
+  path (string): The cache file.  True selects the default file,
+  `$XDG_CACHE_HOME/hpccm/git-verify.json` or
+  `~/.cache/hpccm/git-verify.json` (default).  None or False disables
+  the cache.
+
+  ttl (int): The number of seconds a result is valid.  The default
+  is 3600.  None records the resolved commits permanently, so that
+  later renders never access the network.
+
+  # Examples
+
+  ```python
+  hpccm.config.set_git_verify_cache('/tmp/git-verify.json', ttl=None)
+  ```
+
+  """
+  this = sys.modules[__name__]
+  this.g_git_verify_cache = path
+  this.g_git_verify_ttl = ttl
+
+def set_hoist_packages(enable=True):
+  """Enable or disable the hoisting of operating system packages.
+
+  The operating system packages of all the building blocks in a stage,
+  including the runtime of a previous stage, are installed after the
+  base image, instead of separately by each building block.  The
+  packages are merged into as few transactions as possible.  A new
+  transaction is started by a building block that adds package
+  repositories or keys, since it may depend on the packages installed
+  before it.  Packages that are only downloaded are not hoisted.
+
+  Note that the packages are installed before any other instruction
+  of the stage, so this should not be used if a package depends on an
+  earlier instruction of the stage.
+
+  # Arguments
+
+  enable (bool): True to enable package hoisting, False to disable
+  (default).
+
+  """
+  this = sys.modules[__name__]
+  this.g_hoist_packages = enable
+
+def set_instrument(enable=True):
+  """Enable or disable build time instrumentation.
+
+  The shell commands of each building block are preceded by commands
+  that print a timestamped marker with the name of the building block
+  and the phase of the build, i.e., `download`, `packages`, `compile`,
+  or `other`, and followed by a marker for the end of the building
+  block.  The `hpccm-buildstats` command reads a saved build log and
+  reports the time spent in each building block and phase.  The
+  `instrument` parameter of a building block overrides this setting.
+
+  # Arguments
+
+  enable (bool): True to enable instrumentation, False to disable
+  (default).
+
+  # Examples
+
+  ```python
+  hpccm.config.set_instrument()
+  ```
+
+  """
+  this = sys.modules[__name__]
+  this.g_instrument = enable
+
 def set_linux_distro(distro):
 
   """Set the Linux distribution and version
@@ -232,6 +800,153 @@ def set_linux_distro(distro):
     this.g_linux_distro = linux_distro.UBUNTU
     this.g_linux_version = Version('16.04')
 
+def set_optimization(profiles):
+  """Set the default toolchain optimization profiles
+
+  The `ConfigureMake` and `CMakeBuild` templates, and therefore the
+  `generic_autotools`, `generic_cmake`, and most other building
+  blocks that build from source, merge the compiler flags of the
+  optimization profiles into the `CFLAGS`, `CXXFLAGS`, `FCFLAGS`,
+  `FFLAGS`, and `LDFLAGS` of the toolchain.  The flags depend on the
+  compiler family, e.g., GNU or LLVM, of the toolchain compilers.
+  Use the `optimization` toolchain attribute to select different
+  profiles for a building block.
+
+  The profiles are:
+
+  - `native-target`: the archspec optimization flags of the CPU
+  target, see `set_cpu_target`.
+  - `lto`: link time optimization.
+  - `pgo-generate`: instrument the build to generate profile guided
+  optimization data in the `pgo_directory` of the toolchain,
+  `/var/tmp/pgo` by default.
+  - `pgo-use`: optimize the build using the profile guided
+  optimization data.
+
+  # Arguments
+
+  profiles: A list of profiles or a comma separated string, e.g.,
+  `native-target,lto`.  None disables the optimization profiles.
+
+  # Raises
+
+  RuntimeError: unrecognized or conflicting optimization profiles
+
+  # Examples
+
+  ```python
+  hpccm.config.set_cpu_target('icelake')
+  hpccm.config.set_optimization(['native-target', 'lto'])
+  ```
+
+  """
+  this = sys.modules[__name__]
+  get_optimization(profiles or False) # validate
+  this.g_optimization = profiles
+
+def set_optimize_layers(enable=True):
+  """Enable or disable the layer optimization of container stages.
+
+  Adjacent compatible `shell`, `environment`, and `label` primitives,
+  including those from building blocks, are merged, so that the
+  container specification has fewer instructions and the container
+  image fewer layers.  Comments between merged primitives are moved
+  before the merged primitive.  The number of instructions removed is
+  logged at the INFO level.
+
+  # Arguments
+
+  enable (bool): True to enable layer optimization, False to disable
+  (default).
+
+  """
+  this = sys.modules[__name__]
+  this.g_optimize_layers = enable
+
+def set_package_cache(enable=True):
+  """Enable or disable caching of the package manager indexes and
+  downloaded packages between builds.
+
+  For Docker, the `apt_get` and `yum` building blocks mount
+  persistent [BuildKit cache mounts](https://docs.docker.com/build/cache/optimize/#use-cache-mounts)
+  over the package manager cache directories and skip the cleanup
+  commands that would otherwise empty them.  The package manager
+  caches are not part of the resulting image.  For the other
+  container formats the setting is ignored.
+
+  # Arguments
+
+  enable (bool): True to enable package caching, False to disable
+  (default).
+
+  """
+  this = sys.modules[__name__]
+  this.g_package_cache = enable
+
+def set_parallel(parallel='auto', memory=None):
+  """Set the default number of parallel build jobs
+
+  The `ConfigureMake` and `CMakeBuild` templates, and therefore the
+  `generic_autotools`, `generic_cmake`, and most other building
+  blocks that build from source, use the global setting unless the
+  `parallel` parameter is specified.
+
+  With `auto`, the number of jobs is computed by a shell expression
+  when the container image is built.  The number of processors,
+  `$(nproc)`, is limited by the cgroup CPU quota, if any, and by the
+  available memory, including the cgroup memory limit, divided by the
+  estimated memory per job.  Building blocks that are known to need
+  more memory per job, e.g., `nccl`, use a larger estimate, and the
+  estimate of any building block can be overridden with the
+  `parallel_memory` parameter.
+
+  # Arguments
+
+  parallel (string): The number of parallel build jobs, e.g., `4`,
+  or `auto`.  The default is `auto`.  `$(nproc)` restores the
+  default behavior.
+
+  memory (float): The estimated memory per build job in GiB.  If
+  None, the current setting is unchanged.  The initial value is 1.
+
+  # Examples
+
+  ```python
+  hpccm.config.set_parallel('auto', memory=2)
+  ```
+
+  """
+  this = sys.modules[__name__]
+  this.g_parallel = parallel
+  if memory:
+    this.g_parallel_memory = memory
+
+def set_parallel_decompress(enable=True):
+  """Enable or disable multi-threaded decompression of tarballs.
+
+  Tarballs are decompressed with `pigz` instead of `gzip`, with
+  `lbzip2` or `pbzip2` instead of `bzip2`, and with `xz -T0` and
+  `zstd -T0`.  The decompressor is selected when the container image
+  is built, so if `pigz`, `lbzip2`, or `pbzip2` is not installed in
+  the container image the single-threaded decompressor is used
+  instead.  The `parallel_decompress` parameter of a building block
+  overrides this setting.
+
+  # Arguments
+
+  enable (bool): True to enable multi-threaded decompression, False
+  to disable (default).
+
+  # Examples
+
+  ```python
+  hpccm.config.set_parallel_decompress()
+  ```
+
+  """
+  this = sys.modules[__name__]
+  this.g_parallel_decompress = enable
+
 def set_singularity_version(ver):
   """Set the Singularity definition file format version
 
@@ -247,6 +962,29 @@ def set_singularity_version(ver):
   this = sys.modules[__name__]
   this.g_singularity_version = Version(ver)
 
+def set_source_cache(directory='/var/cache/hpccm/sources'):
+  """Enable or disable the shared source download cache
+
+  Downloads made by the `downloader` and `wget` templates are stored
+  in the cache directory, keyed by the URL or the SHA-256 checksum if
+  specified.  A valid cached download is reused instead of being
+  downloaded again.
+
+  For Docker, the cache directory is a persistent [BuildKit cache mount](https://docs.docker.com/build/cache/optimize/#use-cache-mounts)
+  that the building blocks add to the `RUN` instructions that
+  download into it.  For Singularity and bash, the cache directory
+  should be a host directory, e.g., bind mounted with `singularity
+  build --bind`.
+
+  # Arguments
+
+  directory (string): source cache directory.  None disables the
+  source cache.  The default is `/var/cache/hpccm/sources`.
+
+  """
+  this = sys.modules[__name__]
+  this.g_source_cache = directory
+
 def set_working_directory(wd):
   """Set the working directory to use for staging inside the container
 
@@ -279,6 +1017,11 @@ def test_cpu_feature_flag(flag):
   """
   this = sys.modules[__name__]
 
+  if not this.g_cpu_target:
+    return False
+
+  import archspec.cpu
+
   if this.g_cpu_target not in archspec.cpu.TARGETS:
     logging.warning('unrecognized CPU target "{}"'.format(this.g_cpu_target))
     return False
@@ -290,3 +1033,64 @@ def test_cpu_feature_flag(flag):
       logging.warning('get_cpu_optimization_flags: {}'.format(e))
 
   return False
+
+# Recipe level options, i.e., the keyword arguments of `hpccm.recipe`
+# that select a global configuration setting.  The `hpccm` command
+# line tool, matrix files, and `hpccm serve` requests accept the same
+# options.  Each entry is the option name, its default value, and the
+# function that applies it.
+_recipe_options = [
+  ('cmake_generator', None, set_cmake_generator),
+  ('cuda_arch', None, set_cuda_arch),
+  ('fan_out', False, set_fan_out),
+  ('hoist_packages', False, set_hoist_packages),
+  ('instrument', False, set_instrument),
+  ('optimization', None, set_optimization),
+  ('optimize_layers', False, set_optimize_layers),
+  ('singularity_tmp_fallback', True, set_singularity_tmp_fallback),
+  ('singularity_version', '2.6', set_singularity_version),
+  ('working_directory', '/var/tmp', set_working_directory)]
+
+# Names of the configuration variables
+_variables = [name for name in list(globals()) if name.startswith('g_')]
+
+def _state():
+  """Return the values of all the configuration variables, e.g., to
+  detect configuration changes"""
+  this = sys.modules[__name__]
+  return tuple(getattr(this, name) for name in _variables)
+
+# Configuration variables of the active context, if any
+_context = _ContextVar('hpccm_config', default=None)
+
+class _config_module(types.ModuleType):
+  """Module type that redirects the configuration variables to the
+  active context, if any"""
+
+def _variable(name):
+  """Return a property for a configuration variable"""
+
+  def getter(self):
+    settings = _context.get()
+    if settings is not None:
+      return settings[name]
+    return self.__dict__[name]
+
+  def setter(self, value):
+    settings = _context.get()
+    if settings is not None:
+      settings[name] = value
+    else:
+      self.__dict__[name] = value
+
+  return property(getter, setter)
+
+for _name in _variables:
+  setattr(_config_module, _name, _variable(_name))
+
+try:
+  sys.modules[__name__].__class__ = _config_module
+  _context_local = True
+except TypeError: # pragma: no cover
+  # Python 2 does not support changing the class of a module
+  _context_local = False
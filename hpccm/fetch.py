@@ -0,0 +1,372 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name
+
+"""Source fetch manifest and host-side fetcher
+
+The `wget` and `git` templates record every URL and git repository
+they would fetch into the active `manifest`, if any.  The `hpccm-fetch`
+command downloads a manifest into a local mirror directory.  Files in
+the mirror can then be used with the `package` parameter of the
+building blocks, so that nothing needs to be downloaded when the
+container image is built.
+"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import shutil
+import subprocess
+import sys
+
+import hpccm.config
+
+from hpccm.version import __version__
+
+# The manifest currently being recorded in this context
+_active = hpccm.config._ContextVar('hpccm_fetch', default=None) # pylint: disable=protected-access
+
+class manifest(object):
+    """Collection of the URLs and git repositories referenced by a
+    recipe
+
+    # Arguments
+
+    urls: list of dictionaries with `url` and optionally `sha256`
+    keys.
+
+    repositories: list of dictionaries with `repository` and
+    optionally `branch`, `commit`, and `recursive` keys.
+
+    # Examples
+
+    ```python
+    with hpccm.fetch.record() as m:
+        hpccm.recipe('recipe.py')
+    print(m.json())
+    ```
+
+    """
+
+    version = 1
+
+    def __init__(self, urls=None, repositories=None):
+        """Initialize manifest"""
+
+        self.urls = []
+        self.repositories = []
+
+        for u in urls or []:
+            self.add_url(**u)
+        for r in repositories or []:
+            self.add_repository(**r)
+
+    def add_url(self, url, sha256=None):
+        """Add a URL to the manifest.  Duplicate URLs are ignored, but a
+        checksum supplied later fills in a missing one."""
+
+        for u in self.urls:
+            if u['url'] == url:
+                if sha256 and not u.get('sha256'):
+                    u['sha256'] = sha256
+                return
+
+        entry = {'url': url}
+        if sha256:
+            entry['sha256'] = sha256
+        self.urls.append(entry)
+
+    def add_repository(self, repository, branch=None, commit=None,
+                       recursive=False):
+        """Add a git repository to the manifest.  Duplicate entries are
+        ignored."""
+
+        entry = {'repository': repository}
+        if branch:
+            entry['branch'] = branch
+        if commit:
+            entry['commit'] = commit
+        if recursive:
+            entry['recursive'] = True
+
+        if entry not in self.repositories:
+            self.repositories.append(entry)
+
+    def json(self):
+        """Return the manifest as a JSON string"""
+
+        return json.dumps({'version': self.version,
+                           'urls': self.urls,
+                           'repositories': self.repositories},
+                          indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, f):
+        """Read a manifest from a file object"""
+
+        d = json.load(f)
+        if d.get('version', cls.version) != cls.version:
+            raise RuntimeError('unsupported manifest version: {}'.format(
+                d.get('version')))
+
+        return cls(urls=d.get('urls'), repositories=d.get('repositories'))
+
+@contextlib.contextmanager
+def record(m=None):
+    """Context manager to record the URLs and git repositories fetched
+    by the `wget` and `git` templates into a manifest
+
+    # Arguments
+
+    m: The manifest to record into.  If None, a new manifest is
+    created.  The manifest is returned by the context manager.
+
+    """
+
+    if m is None:
+        m = manifest()
+
+    token = _active.set(m)
+    try:
+        yield m
+    finally:
+        _active.reset(token)
+
+def record_url(url, sha256=None):
+    """Record a URL in the active manifest, if any"""
+
+    m = _active.get()
+    if m is not None and url:
+        m.add_url(url, sha256=sha256)
+
+def record_repository(repository, branch=None, commit=None, recursive=False):
+    """Record a git repository in the active manifest, if any"""
+
+    m = _active.get()
+    if m is not None and repository:
+        m.add_repository(repository, branch=branch, commit=commit,
+                         recursive=recursive)
+
+def _sha256sum(path):
+    """Return the SHA-256 checksum of a file"""
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def mirror_path(mirror, url):
+    """Return the location of a URL or git repository in the mirror
+    directory, `<mirror>/<host>/<path of the URL>`.  This is the same
+    layout as `wget --force-directories`, so the location of a file
+    can be derived from its URL, e.g.,
+    `https://example.com/foo/foo-1.0.tar.gz` is stored as
+    `<mirror>/example.com/foo/foo-1.0.tar.gz`."""
+
+    # Imported here since the module is also imported by the command
+    # line tool, which should start quickly
+    from six.moves.urllib.parse import urlparse
+
+    parsed = urlparse(url)
+
+    # Drop empty and relative path components so that the location is
+    # always inside the mirror directory
+    components = [x for x in [parsed.netloc.rpartition('@')[2]] +
+                  parsed.path.split('/') if x and x not in ['.', '..']]
+    if not components:
+        raise RuntimeError('unable to derive the mirror location of '
+                           '"{}"'.format(url))
+
+    return os.path.join(mirror, *components)
+
+def fetch_url(entry, mirror, timeout=60):
+    """Download a manifest URL entry into the mirror directory.
+
+    The file is stored as `<mirror>/<host>/<path of the URL>`, see
+    `mirror_path`.  A partial download is kept in a `.part` file and
+    resumed on the next attempt if the server supports range
+    requests.  If the entry
+    includes a SHA-256 checksum, the download is verified and an
+    existing file with a matching checksum is not downloaded again.
+
+    Returns the path of the downloaded file."""
+
+    # Imported here since the module is also imported by the command
+    # line tool, which should start quickly
+    from six.moves.urllib.request import Request, urlopen
+
+    url = entry['url']
+    sha256 = entry.get('sha256')
+    dest = mirror_path(mirror, url)
+    part = dest + '.part'
+
+    if not os.path.isdir(os.path.dirname(dest)):
+        os.makedirs(os.path.dirname(dest))
+
+    if os.path.exists(dest):
+        if not sha256 or _sha256sum(dest) == sha256:
+            logging.info('{} is up to date'.format(dest))
+            return dest
+        os.remove(dest)
+
+    request = Request(url)
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    if offset:
+        request.add_header('Range', 'bytes={}-'.format(offset))
+
+    response = urlopen(request, timeout=timeout)
+    try:
+        # Only append to the partial download if the server honored
+        # the range request
+        mode = 'ab' if offset and response.getcode() == 206 else 'wb'
+        with open(part, mode) as f:
+            shutil.copyfileobj(response, f, 1 << 20)
+    finally:
+        response.close()
+
+    if sha256:
+        checksum = _sha256sum(part)
+        if checksum != sha256:
+            os.remove(part)
+            raise RuntimeError('checksum mismatch for {0}: expected {1}, '
+                               'got {2}'.format(url, sha256, checksum))
+
+    os.rename(part, dest)
+    return dest
+
+def fetch_repository(entry, mirror):
+    """Mirror a manifest git repository entry into the mirror directory.
+
+    The repository is stored as a bare mirror clone in
+    `<mirror>/<host>/<path of the repository>.git`, see `mirror_path`.
+    An existing mirror is updated rather than cloned again.
+
+    Returns the path of the mirror."""
+
+    repository = entry['repository']
+    dest = mirror_path(mirror, repository)
+    if not dest.endswith('.git'):
+        dest += '.git'
+
+    if os.path.isdir(dest):
+        cmd = ['git', '--git-dir', dest, 'remote', 'update', '--prune']
+    else:
+        cmd = ['git', 'clone', '--quiet', '--mirror', repository, dest]
+
+    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = p.communicate()
+    if p.returncode != 0:
+        raise RuntimeError('unable to mirror git repository "{0}"\n'
+                           '  cmd: "{1}"\n  stdout: "{2}"\n  stderr: "{3}"'.format(
+                               repository, ' '.join(cmd), stdout, stderr))
+
+    return dest
+
+def fetch(m, mirror, jobs=4, timeout=60):
+    """Download all the entries of a manifest concurrently into the
+    mirror directory.
+
+    # Arguments
+
+    m: The manifest to download.
+
+    mirror: The local directory to store the downloaded files and
+    mirrored git repositories.
+
+    jobs: The number of concurrent downloads.  The default value is 4.
+
+    timeout: The network timeout in seconds.  The default value is 60.
+
+    Returns a list of `(entry, error)` tuples for the entries that
+    could not be fetched.
+
+    """
+
+    from multiprocessing.pool import ThreadPool
+
+    if not os.path.isdir(mirror):
+        os.makedirs(mirror)
+
+    def _fetch(item):
+        kind, entry = item
+        try:
+            if kind == 'url':
+                path = fetch_url(entry, mirror, timeout=timeout)
+            else:
+                path = fetch_repository(entry, mirror)
+            logging.info('fetched {}'.format(path))
+            return None
+        except Exception as e: # pylint: disable=broad-except
+            return (entry, e)
+
+    items = [('url', u) for u in m.urls]
+    items.extend([('repository', r) for r in m.repositories])
+
+    pool = ThreadPool(max(1, min(jobs, len(items) or 1)))
+    try:
+        results = pool.map(_fetch, items)
+    finally:
+        pool.close()
+        pool.join()
+
+    return [r for r in results if r is not None]
+
+def main(): # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description='Download the sources referenced by a HPC Container '
+        'Maker fetch manifest into a local mirror')
+    parser.add_argument('manifest', type=str,
+                        help='manifest file generated by hpccm '
+                        '--fetch-manifest, or - for standard input')
+    parser.add_argument('--jobs', '-j', type=int, default=4,
+                        help='number of concurrent downloads')
+    parser.add_argument('--mirror', type=str, default='.',
+                        help='local mirror directory')
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='network timeout in seconds')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        default=False, help='print progress messages')
+    parser.add_argument('--version', action='version', version=__version__)
+
+    args = parser.parse_args()
+
+    # configure logger
+    logging.basicConfig(format='%(levelname)s: %(message)s',
+                        level=logging.INFO if args.verbose else logging.WARNING)
+
+    if args.manifest == '-':
+        m = manifest.load(sys.stdin)
+    else:
+        with open(args.manifest) as f:
+            m = manifest.load(f)
+
+    errors = fetch(m, args.mirror, jobs=args.jobs, timeout=args.timeout)
+    for entry, e in errors:
+        logging.error('{0}: {1}'.format(
+            entry.get('url', entry.get('repository')), e))
+
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__": # pragma: no cover
+    main()
@@ -0,0 +1,349 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Intermediate representation of container stages
+
+A stage is lowered to a list of `Layer` objects, one per layer of the
+stage.  Each layer is a list of typed instruction nodes, one per
+primitive, with building blocks flattened into the primitives they
+consist of.  Optimization passes operate on the nodes, and `emit`
+serializes the result for a container format by converting the nodes
+back to primitives.
+
+Passes must not modify layers or nodes in place.  A pass returns a
+new list of layers, with a new `Layer` for each layer it changed and
+new nodes, e.g., from `node.replace()`, for each node it changed.
+Layers and nodes that are unchanged still refer to the object they
+were lowered from and are emitted by that object, so the output is
+identical to rendering the stage directly.
+
+# Examples
+
+```python
+layers = Stage0.ir()
+layers = [Layer(n for n in layer if not isinstance(n, Label))
+          for layer in layers]
+print(emit(layers, ctype=container_type.SINGULARITY))
+```
+
+"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import importlib
+
+import hpccm.config
+
+from hpccm.common import container_type
+
+class node(object):
+    """Base class for instruction nodes
+
+    # Arguments
+
+    source: The primitive the node was lowered from, if any.
+
+    The other keyword arguments are the fields of the node, which are
+    named after the parameters of the corresponding primitive.
+
+    """
+
+    # Name of the corresponding primitive, and the package it is
+    # defined in
+    primitive = None
+    package = 'hpccm.primitives'
+
+    # Names and default values of the fields
+    fields = ()
+
+    def __init__(self, source=None, **kwargs):
+        self.source = source
+        for name, default in self.fields:
+            setattr(self, name, kwargs.pop(name, default))
+        if kwargs:
+            raise RuntimeError('unrecognized {0} field(s): {1}'.format(
+                type(self).__name__, ', '.join(sorted(kwargs))))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.values() == other.values()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{0}({1})'.format(type(self).__name__, ', '.join(
+            '{0}={1!r}'.format(k, v) for k, v in self.values().items()))
+
+    @classmethod
+    def lower(cls, p):
+        """Return the node corresponding to the primitive `p`.  Private
+        attributes of the primitive are looked up by their mangled
+        name."""
+        kwargs = {}
+        for name, default in cls.fields:
+            mangled = '_{0}__{1}'.format(cls.primitive, name.lstrip('_'))
+            kwargs[name] = getattr(p, name, getattr(p, mangled, default))
+        return cls(source=p, **kwargs)
+
+    def replace(self, **kwargs):
+        """Return a copy of the node with the specified fields replaced.
+        The copy does not refer to the source primitive."""
+        values = self.values()
+        values.update(kwargs)
+        return type(self)(**values)
+
+    def to_primitive(self):
+        """Return a primitive equivalent to the node"""
+        if self.source is not None:
+            return self.source
+
+        # Some primitives set configuration variables when they are
+        # created, e.g., baseimage, so do not leak those
+        cls = getattr(importlib.import_module(self.package), self.primitive)
+        with hpccm.config.context():
+            return cls(**self.values())
+
+    def values(self):
+        """Return a dictionary of the fields of the node"""
+        return dict((name, getattr(self, name)) for name, _ in self.fields)
+
+class Blob(node):
+    """File contents inserted verbatim, see the `blob` primitive"""
+    primitive = 'blob'
+    fields = (('docker', {}), ('singularity', {}))
+
+class Comment(node):
+    """Comment, see the `comment` primitive"""
+    primitive = 'comment'
+    fields = (('string', ''), ('_app', False), ('reformat', True))
+
+    def to_primitive(self):
+        if self.source is not None:
+            return self.source
+
+        values = self.values()
+        cls = getattr(importlib.import_module(self.package), self.primitive)
+        return cls(values.pop('string'), **values)
+
+class Copy(node):
+    """Copy files into the container, see the `copy` primitive"""
+    primitive = 'copy'
+    fields = (('src', ''), ('dest', ''), ('files', {}), ('_app', ''),
+              ('_chown', ''), ('_exclude_from', []), ('_from', ''),
+              ('_mkdir', ''), ('_post', ''))
+
+class Env(node):
+    """Environment variables, see the `environment` primitive"""
+    primitive = 'environment'
+    fields = (('variables', {}), ('_app', ''), ('_export', True))
+
+class From(node):
+    """Base image, see the `baseimage` primitive"""
+    primitive = 'baseimage'
+    fields = (('image', 'ubuntu:18.04'), ('_arch', ''), ('_as', ''),
+              ('_bootstrap', 'docker'), ('_distro', ''),
+              ('_docker_env', True))
+
+class Label(node):
+    """Metadata, see the `label` primitive"""
+    primitive = 'label'
+    fields = (('metadata', {}), ('_app', ''))
+
+class Packages(node):
+    """Operating system packages, see the `packages` building block"""
+    primitive = 'packages'
+    package = 'hpccm.building_blocks'
+    fields = (('ospackages', []), ('apt', []), ('yum', []), ('_apt_key', False),
+              ('apt_keys', []), ('apt_ppas', []), ('apt_repositories', []),
+              ('aptitude', False), ('cache', False), ('download', False),
+              ('download_directory', '/var/tmp/packages_download'),
+              ('epel', False), ('extra_opts', []), ('extract', None),
+              ('force_add_repo', False), ('powertools', False),
+              ('release_stream', False), ('scl', False), ('yum4', False),
+              ('yum_keys', []), ('yum_repositories', []))
+
+class Raw(node):
+    """Text inserted verbatim, see the `raw` primitive"""
+    primitive = 'raw'
+    fields = (('docker', ''), ('singularity', ''))
+
+class Run(node):
+    """Shell commands, see the `shell` primitive"""
+    primitive = 'shell'
+    fields = (('commands', []), ('chdir', True), ('_app', ''),
+              ('_appenv', False), ('_arguments', ''), ('_test', False))
+
+class Runscript(node):
+    """Container entry point, see the `runscript` primitive"""
+    primitive = 'runscript'
+    fields = (('commands', []), ('_app', ''), ('_args', True),
+              ('_exec', True))
+
+class User(node):
+    """User to run as, see the `user` primitive"""
+    primitive = 'user'
+    fields = (('user', ''),)
+
+class Workdir(node):
+    """Working directory, see the `workdir` primitive"""
+    primitive = 'workdir'
+    fields = (('directory', ''),)
+
+class Opaque(node):
+    """Any other object, e.g., a string or a building block with custom
+    rendering.  The object is emitted as is."""
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.source is other.source
+
+    def __repr__(self):
+        return 'Opaque({!r})'.format(self.source)
+
+    def to_primitive(self):
+        return self.source
+
+# Node type of each primitive, by module
+_nodes = dict(('{0}.{1}'.format(cls.package, cls.primitive), cls)
+              for cls in [Blob, Comment, Copy, Env, From, Label, Packages,
+                          Raw, Run, Runscript, User, Workdir])
+
+class Layer(list):
+    """The nodes of one layer of a stage
+
+    # Arguments
+
+    nodes: The nodes of the layer.
+
+    source: The object the layer was lowered from, if any.
+
+    origin: The object the layer was derived from, if any, also after
+    an optimization pass changed the layer.  The default is `source`.
+
+    """
+
+    def __init__(self, nodes=(), source=None, origin=None):
+        super(Layer, self).__init__(nodes)
+        self.source = source
+        self.origin = origin if origin is not None else source
+
+def _flatten(obj, bb_instructions):
+    """Yield the nodes of an object, recursing into building blocks"""
+
+    cls = type(obj)
+    if (cls.__module__ in _nodes and
+        _nodes[cls.__module__].primitive == cls.__name__):
+        yield _nodes[cls.__module__].lower(obj)
+    elif (isinstance(obj, bb_instructions) and
+          cls.__str__ is bb_instructions.__str__):
+        for x in obj:
+            for n in _flatten(x, bb_instructions):
+                yield n
+    else:
+        yield Opaque(obj)
+
+def lower(obj):
+    """Return the `Layer` corresponding to a layer of a stage, i.e., a
+    primitive, a building block, or any other object that can be
+    converted to a string"""
+
+    # Imported here so that importing HPCCM does not import the
+    # building blocks
+    from hpccm.building_blocks.base import bb_instructions
+
+    return Layer(_flatten(obj, bb_instructions), source=obj)
+
+class text(str):
+    """String representation of a building block or of the runtime of
+    a stage that also provides the corresponding intermediate
+    representation, so that a stage the string is added to can lower
+    it.
+
+    # Arguments
+
+    value: The string.
+
+    source: The building block the string is the representation of.
+
+    layers: The list of layers the string is the representation of.
+
+    separator: The separator between the layers in the string.
+
+    """
+
+    def __new__(cls, value, source=None, layers=None, separator=None):
+        self = super(text, cls).__new__(cls, value)
+        self.__source = source
+        self.__layers = layers
+        self.separator = separator
+        return self
+
+    def ir(self):
+        """Return the list of layers corresponding to the string"""
+
+        if self.__layers is not None:
+            return self.__layers
+
+        # The runtime of building blocks accumulates instructions, so
+        # only use the building block if it still renders to the same
+        # string.  The layer refers to the string, which does not
+        # change.
+        if self.__source is not None and str(self.__source) == self:
+            from hpccm.building_blocks.base import bb_instructions
+            return [Layer(_flatten(self.__source, bb_instructions),
+                          source=self)]
+
+        return [lower(str(self))]
+
+def emit(layers, ctype=None, separator='\n\n'):
+    """Return the string representation of a list of layers
+
+    There is no separate serializer per container format.  Each node
+    is converted back to a primitive, see `node.to_primitive`, and the
+    primitive renders itself for the container format, so the output
+    of a node is always identical to that of the primitive.
+
+    # Arguments
+
+    layers: List of `Layer` objects, e.g., from `Stage.ir()`.
+
+    ctype: The container format.  The default is the configured
+    container format, see `hpccm.config.set_container_format`.
+
+    separator: Separator to insert between layers.  The default is
+    '\\n\\n'.
+
+    """
+
+    if ctype is None:
+        ctype = hpccm.config.g_ctype
+    if ctype not in [container_type.BASH, container_type.DOCKER,
+                     container_type.SINGULARITY]:
+        raise RuntimeError('Unknown container type')
+
+    def _layer(layer):
+        # Layers that were not changed by an optimization pass are
+        # emitted by the object they were lowered from
+        if layer.source is not None:
+            return str(layer.source)
+        return '\n'.join(s for s in (str(n.to_primitive()) for n in layer)
+                         if s)
+
+    with hpccm.config.context(ctype=ctype):
+        return separator.join(_layer(l) for l in layers)
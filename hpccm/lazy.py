@@ -0,0 +1,87 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name
+
+"""Lazy loading of the building blocks and primitives
+
+The `hpccm.building_blocks` and `hpccm.primitives` packages export one
+class per module, with the same name as the module, e.g.,
+`hpccm.building_blocks.openmpi` is the class defined in the module
+`hpccm/building_blocks/openmpi.py`.  Instead of importing every
+module when the package is imported, each module is imported the
+first time its class is accessed.
+
+The classes are properties of the package module type, so the
+package attribute always refers to the class even after the import
+system binds the submodule of the same name to the package.
+"""
+
+from __future__ import absolute_import
+
+import importlib
+import sys
+import threading
+import types
+
+# Serialize the first access of a class from multiple threads
+_lock = threading.RLock()
+
+def _load(package, name):
+    """Return the class `name` from the submodule `name` of `package`"""
+
+    loaded = package.__dict__['_lazy_loaded']
+    if name not in loaded:
+        with _lock:
+            if name not in loaded:
+                module = importlib.import_module(
+                    '{0}.{1}'.format(package.__name__, name))
+                loaded[name] = getattr(module, name)
+    return loaded[name]
+
+def _property(name):
+    """Return a property that loads the class `name` on first access"""
+
+    def getter(self):
+        return _load(self, name)
+
+    def setter(self, value):
+        # The import system binds each submodule to the package.
+        # Ignore it so that the name continues to refer to the class.
+        if not isinstance(value, types.ModuleType):
+            self.__dict__['_lazy_loaded'][name] = value
+
+    return property(getter, setter)
+
+def lazy_package(name):
+    """Enable lazy loading of the classes listed in the `__all__`
+    attribute of the package `name`.  Returns False if lazy loading is
+    not supported by this Python version, in which case the caller
+    should import the classes directly."""
+
+    package = sys.modules[name]
+
+    cls = type(str('lazy_package'), (types.ModuleType,),
+               dict((n, _property(n)) for n in package.__all__))
+    cls.__dir__ = lambda self: sorted(set(self.__dict__) | set(self.__all__))
+
+    package.__dict__['_lazy_loaded'] = {}
+    try:
+        package.__class__ = cls
+    except TypeError: # pragma: no cover
+        # Python 2 does not support changing the class of a module
+        del package.__dict__['_lazy_loaded']
+        return False
+
+    return True
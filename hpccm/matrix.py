@@ -0,0 +1,211 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name
+
+"""Render a recipe for a matrix of container formats, CPU targets, and
+user arguments"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import re
+import traceback
+
+import hpccm.config
+
+from hpccm.common import container_type
+from hpccm.recipe import recipe
+
+# File name suffix for each container format
+_suffix = {'bash': 'sh', 'docker': 'Dockerfile', 'singularity': 'def'}
+
+# Configuration to use for rendering each cell
+_config = None
+
+def load(matrix_file):
+    """Load a matrix file
+
+    The matrix file is JSON, or YAML if the file name ends with
+    `.yaml` or `.yml`.  YAML requires the PyYAML module.  A relative
+    `recipe` path is relative to the location of the matrix file.
+
+    # Arguments
+
+    matrix_file: path to the matrix file
+
+    # Raises
+
+    RuntimeError: unable to read the matrix file
+
+    """
+
+    with open(matrix_file) as f:
+        if re.search(r'\.ya?ml$', matrix_file):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError('PyYAML is required to read {}'.format(
+                    matrix_file))
+            m = yaml.safe_load(f)
+        else:
+            m = json.load(f)
+
+    if not isinstance(m, dict):
+        raise RuntimeError('invalid matrix file: {}'.format(matrix_file))
+
+    if m.get('recipe') and not os.path.isabs(m['recipe']):
+        m['recipe'] = os.path.join(os.path.dirname(matrix_file), m['recipe'])
+
+    return m
+
+def cells(matrix, cpu_target=None, format='docker', userarg=None):
+    """Return the list of cells for a matrix
+
+    Each cell is a dictionary of `recipe` keyword arguments plus the
+    output `name`.  The `format`, `cpu_target`, and `userarg` matrix
+    keys may be a single value or a list of values.  The cells are the
+    cross product of the values.  The keyword arguments are the
+    default values for keys not present in the matrix.  The
+    `single_stage` key and the keys of the recipe level configuration
+    options of `hpccm.recipe`, e.g., `optimize_layers`, apply to all
+    cells.
+
+    # Arguments
+
+    matrix: dictionary describing the matrix, e.g., from `load`.
+
+    cpu_target: default CPU target
+
+    format: default container format
+
+    userarg: default user arguments dictionary
+
+    """
+
+    def _list(value):
+        return value if isinstance(value, list) else [value]
+
+    formats = _list(matrix.get('format', format))
+    targets = _list(matrix.get('cpu_target', cpu_target))
+    userargs = _list(matrix.get('userarg', userarg or {}))
+
+    stem = os.path.splitext(os.path.basename(matrix['recipe']))[0]
+
+    c = []
+    for f, t, u in itertools.product(formats, targets, userargs):
+        if f not in _suffix:
+            raise RuntimeError('Unrecognized format: {}'.format(f))
+
+        u = dict((k, str(v)) for k, v in (u or {}).items())
+
+        tag = [stem]
+        if t:
+            tag.append(t)
+        tag.extend('{0}={1}'.format(k, u[k]) for k in sorted(u))
+        name = re.sub(r'[^\w.=+-]', '_', '-'.join(tag))
+
+        cell = {'recipe_file': matrix['recipe'],
+                'cpu_target': t,
+                'ctype': container_type[f.upper()],
+                'name': '{0}.{1}'.format(name, _suffix[f]),
+                'userarg': u}
+        for key in ['single_stage'] + [
+                name for name, _, _ in hpccm.config._recipe_options]: # pylint: disable=protected-access
+            if key in matrix:
+                cell[key] = matrix[key]
+        c.append(cell)
+
+    return c
+
+def _snapshot():
+    """Return the current configuration"""
+    return dict((k[2:], getattr(hpccm.config, k))
+                for k in hpccm.config._variables) # pylint: disable=protected-access
+
+def _init(config):
+    """Worker initializer"""
+    global _config # pylint: disable=global-statement
+    _config = config
+
+def _render(cell):
+    """Render a single cell.  Returns a tuple of the output name, the
+    container specification, and an error message."""
+
+    kwargs = dict(cell)
+    name = kwargs.pop('name')
+    try:
+        # Recipes modify the configuration, e.g., the Linux
+        # distribution, so start every cell from the same configuration
+        with hpccm.config.context(**_config):
+            return (name, recipe(raise_exceptions=True, **kwargs), None)
+    except Exception: # pylint: disable=broad-except
+        return (name, None, traceback.format_exc())
+
+def render(matrix_cells, jobs=1, output_directory=None):
+    """Render a list of cells, optionally in parallel
+
+    Each worker process renders multiple cells, so the interpreter
+    startup and the recipe compilation are amortized across cells.
+
+    # Arguments
+
+    matrix_cells: list of cells, e.g., from `cells`.
+
+    jobs: Number of worker processes.  The default is 1, i.e., render
+    the cells sequentially in the current process.
+
+    output_directory: If set, write each container specification to
+    a file in this directory, named after the cell.
+
+    # Returns
+
+    A list of `(name, spec, error)` tuples in the same order as the
+    cells.  `spec` is None and `error` is the stack trace if the cell
+    could not be rendered.
+
+    """
+
+    config = _snapshot()
+
+    if jobs > 1 and len(matrix_cells) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(matrix_cells)),
+                                    initializer=_init, initargs=(config,))
+        try:
+            results = pool.map(_render, matrix_cells, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        _init(config)
+        results = [_render(c) for c in matrix_cells]
+
+    if output_directory:
+        if not os.path.isdir(output_directory):
+            os.makedirs(output_directory)
+        for name, spec, error in results:
+            if error:
+                logging.error('{0}: {1}'.format(name, error))
+                continue
+            with open(os.path.join(output_directory, name), 'w') as f:
+                f.write(spec)
+                f.write('\n')
+
+    return results
@@ -0,0 +1,601 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Optimization passes over the intermediate representation
+
+Each pass takes a list of `hpccm.ir.Layer` objects and returns a new
+list of layers, see `hpccm.ir`.
+"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import posixpath
+import re
+
+import hpccm.config
+import hpccm.ir
+
+from hpccm.buildstats import marker
+from hpccm.common import container_type, linux_distro
+from hpccm.ir import (Comment, Copy, Env, From, Label, Layer, Packages,
+                      Run, Workdir)
+
+def _empty(n):
+    """Return True if the node renders to an empty string"""
+    if isinstance(n, Run):
+        return not any(n.commands)
+    elif isinstance(n, Env):
+        return not n.variables
+    elif isinstance(n, Label):
+        return not n.metadata
+    elif isinstance(n, Comment):
+        return not n.string
+    return False
+
+def _references(variables, names):
+    """Return True if any of the values references one of the names"""
+    if not names:
+        return False
+    pattern = re.compile(r'\$\{{?({})\b'.format('|'.join(
+        re.escape(x) for x in names)))
+    return any(pattern.search(str(v)) for v in variables.values())
+
+def _compatible(a, b):
+    """Return True if node b can be merged into node a"""
+
+    if type(a) is not type(b) or a._app != b._app:
+        return False
+
+    if isinstance(a, Run):
+        return (a._appenv == b._appenv and a._test == b._test and
+                (a._arguments or '') == (b._arguments or ''))
+    elif isinstance(a, Env):
+        # Docker expands variables using the values from before the
+        # ENV instruction, and Singularity exports the variables in
+        # sorted order, so the variables must be independent
+        return (a._export == b._export and
+                not set(a.variables) & set(b.variables) and
+                not _references(b.variables, a.variables) and
+                not _references(a.variables, b.variables))
+    elif isinstance(a, Label):
+        return True
+
+    return False
+
+def _merge(a, b, workdir):
+    """Return the node resulting from merging node b into node a"""
+
+    pa = a.to_primitive()
+    if isinstance(a, Run):
+        if b.chdir:
+            # Each RUN instruction starts in the working directory
+            b = b.replace(commands=['cd {}'.format(workdir)] + b.commands)
+        merged = pa.merge([pa, b.to_primitive()], _app=a._app,
+                          _appenv=a._appenv, _arguments=a._arguments,
+                          chdir=a.chdir, _test=a._test)
+    elif isinstance(a, Env):
+        merged = pa.merge([pa, b.to_primitive()], _app=a._app,
+                          _export=a._export)
+    else:
+        merged = pa.merge([pa, b.to_primitive()], _app=a._app)
+
+    return type(a).lower(merged)
+
+def merge_layers(layers):
+    """Merge adjacent compatible `shell`, `environment`, and `label`
+    primitives, across building blocks and layers, using the `merge`
+    method of the primitives.  Primitives that render to an empty
+    string are ignored, and comments between merged primitives are
+    moved before the merged primitive.  Any other primitive separates
+    the primitives before and after it.
+
+    # Arguments
+
+    layers: List of `hpccm.ir.Layer` objects.
+
+    # Returns
+
+    A tuple of the new list of layers and the number of instructions
+    removed.
+
+    """
+
+    # Working directory at the start of each RUN instruction
+    docker = hpccm.config.g_ctype == container_type.DOCKER
+    workdir = '/'
+
+    # List of [layer index, node] entries
+    out = []
+    changed = set()
+    last = None # Index into out of the node to merge into
+    removed = 0
+
+    for index, layer in enumerate(layers):
+        for n in layer:
+            if _empty(n) or isinstance(n, Comment):
+                out.append([index, n])
+                continue
+
+            if last is not None and _compatible(out[last][1], n):
+                # Move the comments in between before the merged node
+                between = [e for e in out[last+1:] if isinstance(e[1],
+                                                                 Comment)]
+                target = out[last][0]
+                changed.update(e[0] for e in out[last:])
+                changed.add(index)
+                for e in between:
+                    e[0] = target
+                out[last:] = between + [[target, _merge(out[last][1], n,
+                                                        workdir)]]
+                last = len(out) - 1
+                removed += 1
+                continue
+
+            if isinstance(n, From):
+                workdir = '/'
+            elif isinstance(n, Workdir) and docker and n.directory:
+                workdir = n.directory
+
+            out.append([index, n])
+            last = len(out) - 1 if isinstance(n, (Env, Label, Run)) else None
+
+    result = []
+    for index, layer in enumerate(layers):
+        if index not in changed:
+            result.append(layer)
+            continue
+
+        nodes = [n for i, n in out if i == index]
+        if not all(_empty(n) for n in nodes):
+            result.append(Layer(nodes))
+
+    return result, removed
+
+# Options that must be the same for packages to be installed in the
+# same transaction.  The options for adding repositories and keys do
+# not matter, since only the first building block of a transaction may
+# add repositories or keys.
+_transaction_options = ['aptitude', 'cache', 'extra_opts', 'yum4']
+
+def _ospackages(n):
+    """Return the packages installed by a packages node for the
+    configured Linux distribution"""
+    if hpccm.config.g_linux_distro == linux_distro.UBUNTU:
+        return n.apt or n.ospackages
+    return n.yum or n.ospackages
+
+def _repositories(n):
+    """Return True if a packages node adds package repositories or keys
+    for the configured Linux distribution"""
+    if hpccm.config.g_linux_distro == linux_distro.UBUNTU:
+        return bool(n.apt_keys or n.apt_ppas or n.apt_repositories)
+    return bool(n.yum_keys or n.yum_repositories or n.epel or
+                n.powertools or n.release_stream or n.scl)
+
+def hoist_packages(layers):
+    """Install the operating system packages of all the `packages`
+    building blocks in as few transactions as possible, after the
+    base image.  The transactions are in the original order of the
+    building blocks.  A new transaction is started by a building block
+    that adds package repositories or keys, or that uses different
+    package manager options.  Packages that are downloaded rather than
+    installed are not hoisted.
+
+    # Arguments
+
+    layers: List of `hpccm.ir.Layer` objects.
+
+    # Returns
+
+    A tuple of the new list of layers and the number of package
+    installation steps removed.
+
+    """
+
+    hoisted = []
+    for layer in layers:
+        hoisted.extend(n for n in layer
+                       if isinstance(n, Packages) and not n.download)
+    if len(hoisted) < 2:
+        return layers, 0
+    ids = set(id(n) for n in hoisted)
+
+    transactions = []
+    packages = []
+    for n in hoisted:
+        options = [getattr(n, x) for x in _transaction_options]
+        if (not transactions or _repositories(n) or
+            options != transactions[-1][1]):
+            transactions.append([n, options])
+            packages.append([])
+        packages[-1].extend(_ospackages(n))
+
+    nodes = []
+    for (n, _), ospackages in zip(transactions, packages):
+        if ospackages or _repositories(n):
+            nodes.append(n.replace(apt=[], yum=[],
+                                   ospackages=sorted(set(ospackages))))
+
+    # Insert after the layer with the base image, if any
+    position = 0
+    for index, layer in enumerate(layers):
+        if any(isinstance(n, From) for n in layer):
+            position = index + 1
+            break
+
+    # Layers that only consist of comments after removing the packages
+    # are dropped and their comments are moved to the hoisted packages
+    comments = []
+    result = []
+    for index, layer in enumerate(layers):
+        if index == position:
+            hoisted_layer = Layer()
+            result.append(hoisted_layer)
+
+        if any(id(n) in ids for n in layer):
+            remaining = [n for n in layer
+                         if id(n) not in ids and not _empty(n)]
+            if all(isinstance(n, Comment) for n in remaining):
+                comments.extend(remaining)
+            else:
+                result.append(Layer(remaining, origin=layer.origin))
+        else:
+            result.append(layer)
+
+    if position == len(layers):
+        hoisted_layer = Layer()
+        result.append(hoisted_layer)
+    hoisted_layer.extend(comments + nodes)
+
+    return result, len(hoisted) - len(nodes)
+
+# Phase of the build of a shell command, by the first pattern the
+# command matches
+_phases = [('packages', re.compile(r'\b(apt-get|apt-key|yum|dnf|zypper|apk|'
+                                   r'rpm|dpkg|conda|pip[0-9.]*)\s')),
+           ('download', re.compile(r'\b(wget|curl|unzip|git\s+(-C\s+\S+\s+)?'
+                                   r'(clone|fetch|checkout|submodule))\b|'
+                                   r'\btar\s+-?[a-zA-Z]*x')),
+           ('compile', re.compile(r'\b(configure|cmake|make|ninja|meson|'
+                                  r'scons|b2|bjam|nvcc|setup\.py)\b'))]
+
+# Commands that do not start a new phase, e.g., cleaning up
+_neutral = re.compile(r'^\s*(cd|export|ln|mkdir|rm)\s')
+
+def _phase(command):
+    """Return the phase of the build of a shell command, or None if the
+    command continues the current phase"""
+    for phase, pattern in _phases:
+        if pattern.search(command):
+            return phase
+    if _neutral.match(command):
+        return None
+    return 'other'
+
+def _instrument(name, layer):
+    """Return the instrumented nodes of a building block layer"""
+
+    nodes = []
+    for n in layer:
+        if isinstance(n, Packages):
+            # Lower the package installation to the shell commands it
+            # consists of, so that they can be instrumented
+            nodes.extend(m for x in n.to_primitive()
+                         for m in hpccm.ir.lower(x))
+        else:
+            nodes.append(n)
+
+    for index, n in enumerate(nodes):
+        if not isinstance(n, Run) or n._test or not any(n.commands):
+            continue
+
+        commands = []
+        current = None
+        for c in n.commands:
+            if not c:
+                continue
+            phase = _phase(c) or current or 'other'
+            if phase != current:
+                commands.append(marker(name, phase))
+                current = phase
+            commands.append(c)
+        commands.append(marker(name, 'end'))
+        nodes[index] = n.replace(commands=commands)
+
+    return nodes
+
+def instrument(layers, default=False):
+    """Print timestamped markers around the shell commands of building
+    blocks when the container image is built.  A marker is printed at
+    the start of each phase of the build, i.e., `download`,
+    `packages`, `compile`, or `other`, based on the commands, and at
+    the end of each instruction.  See `hpccm.buildstats`.
+
+    # Arguments
+
+    layers: List of `hpccm.ir.Layer` objects.
+
+    default: Boolean flag to specify whether to instrument the
+    building blocks that do not specify the `instrument` parameter.
+    The default is False.
+
+    # Returns
+
+    A tuple of the new list of layers and the number of building
+    blocks instrumented.
+
+    """
+
+    # Imported here so that importing HPCCM does not import the
+    # building blocks
+    from hpccm.building_blocks.base import bb_base
+
+    result = []
+    count = 0
+    for layer in layers:
+        if isinstance(layer.origin, bb_base):
+            enabled = layer.origin.instrument
+            if enabled is None:
+                enabled = default
+            if enabled and any(isinstance(n, (Packages, Run)) for n in layer):
+                result.append(Layer(_instrument(type(layer.origin).__name__,
+                                                layer), origin=layer.origin))
+                count += 1
+                continue
+        result.append(layer)
+
+    return result, count
+
+# Prefixes shared with other software, which cannot be copied to
+# another stage by themselves
+_system_prefixes = ['/', '/opt', '/usr', '/usr/local']
+
+# Build options that enable MPI support
+_mpi = re.compile(r'--(enable|with)-mpi\b|mpi=on\b', re.IGNORECASE)
+
+# Toolchain variables that name a command
+_toolchain_commands = ['CC', 'CXX', 'F77', 'F90', 'FC']
+
+def _private(obj, name):
+    """Return the value of an attribute of a building block, looking up
+    private attributes by their mangled name"""
+    for cls in type(obj).__mro__:
+        mangled = '_{0}__{1}'.format(cls.__name__, name)
+        if hasattr(obj, mangled):
+            return getattr(obj, mangled)
+    return getattr(obj, name, None)
+
+def _prefix(layer):
+    """Return the install prefix of a building block that can be built
+    in a separate stage, or None"""
+
+    prefix = _private(layer.source, 'prefix')
+    if not prefix:
+        return None
+    prefix = posixpath.normpath(prefix)
+    if not posixpath.isabs(prefix) or prefix in _system_prefixes:
+        return None
+
+    # Only building blocks consisting of instructions that can be
+    # separated into building and installing
+    if not any(isinstance(n, Run) for n in layer):
+        return None
+    if not all(isinstance(n, (Comment, Copy, Env, Label, Packages, Run))
+               for n in layer):
+        return None
+
+    # Files written to /etc, other than the dynamic linker
+    # configuration, would not be copied to the final stage
+    text = _text(layer)
+    if re.search(r'/etc/(?!ld\.so\.conf\.d/)', text):
+        return None
+
+    return prefix
+
+def _text(layer):
+    """Return the string representation of the instructions of a layer
+    that are executed when building, i.e., excluding environment
+    variables and metadata"""
+    return '\n'.join(str(n.to_primitive()) for n in layer
+                     if not isinstance(n, (Comment, Env, Label)))
+
+def _commands(toolchain):
+    """Return the set of commands of a toolchain"""
+    if toolchain is None:
+        return set()
+    return set(c for c in (getattr(toolchain, x, None)
+                           for x in _toolchain_commands) if c)
+
+def _depends(a, b, prefix):
+    """Return True if layer a uses the layer b, which was installed in
+    prefix, based on the toolchain, prefix, and environment variables
+    of the building blocks"""
+
+    commands = _commands(getattr(b.source, 'toolchain', None))
+    if commands & _commands(_private(a.source, 'toolchain')):
+        return True
+
+    # Building blocks with MPI support, e.g., `fftw(mpi=True)`, use the
+    # MPI compiler wrappers in the PATH
+    text = _text(a)
+    if 'mpicc' in commands and (_private(a.source, 'mpi') or
+                                _mpi.search(text)):
+        return True
+
+    if re.search(r'{}(?![\w.+-])'.format(re.escape(prefix)), text):
+        return True
+
+    names = set()
+    for n in b:
+        if isinstance(n, Env):
+            names.update(n.variables)
+    return _references({'': text}, names)
+
+def _stage_name(name, layer, names):
+    """Return a unique stage name for a building block"""
+    stage = '{0}-{1}'.format(name, type(layer.source).__name__.lower())
+    unique = stage
+    count = 1
+    while unique in names:
+        count += 1
+        unique = '{0}-{1}'.format(stage, count)
+    names.add(unique)
+    return unique
+
+def _distro():
+    """Return the `baseimage` primitive `_distro` value corresponding to
+    the configured Linux distribution"""
+    major = hpccm.config.g_linux_version.major
+    if hpccm.config.g_linux_distro == linux_distro.UBUNTU:
+        return 'ubuntu{}'.format(major) if major >= 16 else 'ubuntu'
+    return {7: 'centos7', 8: 'centos8'}.get(
+        major, 'rockylinux{}'.format(major))
+
+def _install(layer, stage, prefix):
+    """Return the nodes to install a building block built in another
+    stage: the packages, environment, and metadata of the building
+    block, and a copy of its prefix from the stage"""
+
+    ldconfig = []
+    for n in layer:
+        if isinstance(n, Run):
+            ldconfig.extend(c for c in n.commands if c and re.match(
+                r'echo "[^"]*" >> /etc/ld\.so\.conf\.d/\S+ && ldconfig$', c))
+
+    # The instructions that build the building block are replaced by
+    # the copy, followed by the dynamic linker configuration, if any
+    nodes = []
+    for n in layer:
+        if not isinstance(n, (Copy, Run)):
+            nodes.append(n)
+        elif not any(isinstance(x, Copy) for x in nodes):
+            nodes.append(Copy(_from=stage, src=prefix, dest=prefix))
+            if ldconfig:
+                nodes.append(Run(commands=ldconfig, chdir=False))
+    return Layer(nodes)
+
+def fan_out(layers, name, depends=None):
+    """Build independent building blocks in separate Docker stages, so
+    that they may be built in parallel, e.g., by BuildKit.
+
+    Layers up to the first building block that can be built
+    separately form a shared base stage.  A building block can be
+    built separately if it installs into its own prefix, e.g.,
+    `/usr/local/fftw`, and does not depend on any layer after the base
+    stage other than building blocks that are also built separately.
+    Each building block that is built separately gets its own stage,
+    based on the base stage plus the building blocks it depends on.
+    The final stage, with the original name, is based on the base
+    stage and copies the prefix of each building block from its stage
+    in place of building it.
+
+    A building block depends on another building block if it uses a
+    compiler from the toolchain of the other building block, e.g.,
+    `mpicc`, if it enables MPI support, e.g., `--enable-mpi`, and the
+    other building block provides the MPI compiler wrappers, or if its instructions
+    refer to the prefix or the environment variables of the other
+    building block.  Any other
+    layer after the base stage, e.g., a `shell` primitive, is assumed
+    to be a dependency of all the layers after it.
+
+    # Arguments
+
+    layers: List of `hpccm.ir.Layer` objects of a single stage.
+
+    name: The name of the stage.
+
+    depends: Dictionary of additional dependencies that cannot be
+    inferred, mapping the object a layer was lowered from to a list of
+    the objects of the layers it depends on.  If the list is empty,
+    the layer depends on all the layers before it and is not built
+    separately.
+
+    # Returns
+
+    A tuple of the new list of layers and the number of building
+    blocks built in separate stages.
+
+    """
+
+    depends = dict((id(k), set(id(x) for x in v))
+                   for k, v in (depends or {}).items())
+
+    # The base image must be the only one
+    base = [i for i, layer in enumerate(layers)
+            if any(isinstance(n, From) for n in layer)]
+    if len(base) != 1 or len(layers[base[0]]) != 1:
+        return layers, 0
+    base = base[0]
+
+    prefixes = {} # Prefix of each layer built separately, by index
+    required = {} # Separately built dependencies of each layer, by index
+    first = None  # Index of the first layer built separately
+    for index in range(base + 1, len(layers)):
+        layer = layers[index]
+        explicit = depends.get(id(layer.source))
+        prefix = _prefix(layer) if explicit != set() else None
+
+        # Layers with a dependency that is neither in the base stage
+        # nor built separately are built in the final stage
+        deps = set()
+        if prefix and first is not None:
+            for i in range(first, index):
+                if i in prefixes:
+                    if ((explicit and id(layers[i].source) in explicit) or
+                        _depends(layer, layers[i], prefixes[i])):
+                        deps.add(i)
+                        deps.update(required[i])
+                elif not all(isinstance(n, (Comment, Label))
+                             for n in layers[i]):
+                    prefix = None
+                    break
+
+        if prefix:
+            prefixes[index] = prefix
+            required[index] = deps
+            if first is None:
+                first = index
+
+    if len(prefixes) < 2:
+        return layers, 0
+
+    image = layers[base][0]
+    base_name = '{}-base'.format(name)
+    names = set([name, base_name])
+    stages = dict((i, _stage_name(name, layers[i], names))
+                  for i in sorted(prefixes))
+    distro = image._distro or _distro()
+
+    result = list(layers[:first])
+    result[base] = Layer([image.replace(_as=base_name)])
+    for index in sorted(prefixes):
+        result.append(Layer([image.replace(image=base_name, _as=stages[index],
+                                           _distro=distro)]))
+        for i in sorted(required[index]):
+            result.append(_install(layers[i], stages[i], prefixes[i]))
+        result.append(layers[index])
+
+    result.append(Layer([image.replace(image=base_name, _distro=distro)]))
+    for index in range(first, len(layers)):
+        if index in prefixes:
+            result.append(_install(layers[index], stages[index],
+                                   prefixes[index]))
+        else:
+            result.append(layers[index])
+
+    return result, len(prefixes)
@@ -17,14 +17,18 @@ from __future__ import absolute_import
 __all__ = ['baseimage', 'blob', 'comment', 'copy', 'environment', 'label',
            'raw', 'runscript', 'shell', 'user', 'workdir']
 
-from hpccm.primitives.baseimage import baseimage
-from hpccm.primitives.blob import blob
-from hpccm.primitives.comment import comment
-from hpccm.primitives.copy import copy
-from hpccm.primitives.environment import environment
-from hpccm.primitives.label import label
-from hpccm.primitives.raw import raw
-from hpccm.primitives.runscript import runscript
-from hpccm.primitives.shell import shell
-from hpccm.primitives.user import user
-from hpccm.primitives.workdir import workdir
+# The classes are loaded on first access, see hpccm.lazy.  Fall back
+# to importing all the classes if lazy loading is not supported.
+from hpccm.lazy import lazy_package
+if not lazy_package(__name__): # pragma: no cover
+    from hpccm.primitives.baseimage import baseimage
+    from hpccm.primitives.blob import blob
+    from hpccm.primitives.comment import comment
+    from hpccm.primitives.copy import copy
+    from hpccm.primitives.environment import environment
+    from hpccm.primitives.label import label
+    from hpccm.primitives.raw import raw
+    from hpccm.primitives.runscript import runscript
+    from hpccm.primitives.shell import shell
+    from hpccm.primitives.user import user
+    from hpccm.primitives.workdir import workdir
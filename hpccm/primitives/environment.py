@@ -122,7 +122,7 @@ class environment(object):
         else:
             return ''
 
-    def merge(self, lst, _app=None):
+    def merge(self, lst, _app=None, _export=True):
         """Merge one or more instances of the primitive into a single
         instance.  Due to conflicts or option differences the merged
         primitive may not be exact merger.
@@ -140,4 +140,4 @@ class environment(object):
 
             envs.update(item._environment__variables)
 
-        return environment(variables=envs, _app=_app)
+        return environment(variables=envs, _app=_app, _export=_export)
@@ -155,7 +155,8 @@ class shell(object):
         else:
             return ''
 
-    def merge(self, lst, _app=None, _appenv=False, _test=False):
+    def merge(self, lst, _app=None, _appenv=False, _test=False,
+              _arguments='', chdir=True):
         """Merge one or more instances of the primitive into a single
         instance.  Due to conflicts or option differences the merged
         primitive may not be exact merger.
@@ -173,4 +174,5 @@ class shell(object):
 
             cmds.extend(item.commands)
 
-        return shell(commands=cmds, _app=_app, _appenv=_appenv, _test=_test)
+        return shell(commands=cmds, _app=_app, _appenv=_appenv,
+                     _arguments=_arguments, chdir=chdir, _test=_test)
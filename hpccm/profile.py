@@ -0,0 +1,173 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name
+
+"""Profiling of recipe evaluation and rendering
+
+While a `profile` is being recorded, the construction (`init`), the
+string representation (`str`), and the `runtime` method of every
+building block, every included recipe file (`include`), and the
+rendering of every stage (`stage`) are timed.  The time of an event
+includes the time of the events nested in it, e.g., a building block
+that creates another building block, and the self time excludes it.
+
+# Examples
+
+```python
+with hpccm.profile.record() as p:
+    hpccm.recipe('recipe.py')
+print(p.table())
+```
+
+"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import contextlib
+import json
+import timeit
+
+import hpccm.config
+
+# The profile currently being recorded in this context
+_active = hpccm.config._ContextVar('hpccm_profile', default=None) # pylint: disable=protected-access
+
+class profile(object):
+    """Timings of the building blocks and included recipe files of a
+    recipe
+
+    # Arguments
+
+    callback: Function called with the kind, the name, and the time
+    in seconds of each event when it completes, e.g., to export the
+    timings as metrics.  The default is None.
+
+    """
+
+    def __init__(self, callback=None):
+        """Initialize profile"""
+
+        self.callback = callback
+
+        # List of (kind, name, seconds, self seconds) tuples, in the
+        # order the events completed
+        self.events = []
+
+        # Time spent in the nested events of each event in progress
+        self.__nested = []
+
+    @contextlib.contextmanager
+    def timer(self, kind, name):
+        """Context manager to time an event"""
+
+        self.__nested.append(0.0)
+        start = timeit.default_timer()
+        try:
+            yield
+        finally:
+            seconds = timeit.default_timer() - start
+            nested = self.__nested.pop()
+            if self.__nested:
+                self.__nested[-1] += seconds
+            self.events.append((kind, name, seconds, seconds - nested))
+            if self.callback:
+                self.callback(kind, name, seconds)
+
+    def summary(self):
+        """Return a list of dictionaries with the `kind`, `name`,
+        `count`, total time in `seconds`, and `self_seconds` of each
+        distinct event, sorted by decreasing self time"""
+
+        totals = {}
+        for kind, name, seconds, self_seconds in self.events:
+            t = totals.setdefault((kind, name), [0, 0.0, 0.0])
+            t[0] += 1
+            t[1] += seconds
+            t[2] += self_seconds
+
+        return sorted(({'kind': kind, 'name': name, 'count': t[0],
+                        'seconds': t[1], 'self_seconds': t[2]}
+                       for (kind, name), t in totals.items()),
+                      key=lambda s: (-s['self_seconds'], s['kind'],
+                                     s['name']))
+
+    def json(self):
+        """Return the summary and the events as a JSON string"""
+
+        return json.dumps(
+            {'summary': self.summary(),
+             'events': [{'kind': kind, 'name': name, 'seconds': seconds,
+                         'self_seconds': self_seconds}
+                        for kind, name, seconds, self_seconds in self.events]},
+            indent=2, sort_keys=True)
+
+    def table(self):
+        """Return the summary as a table"""
+
+        lines = ['{0:<8} {1:<40} {2:>6} {3:>11} {4:>11}'.format(
+            'kind', 'name', 'count', 'total (ms)', 'self (ms)')]
+        for s in self.summary():
+            lines.append('{0:<8} {1:<40} {2:>6} {3:>11.3f} {4:>11.3f}'.format(
+                s['kind'], s['name'], s['count'], s['seconds'] * 1000,
+                s['self_seconds'] * 1000))
+        return '\n'.join(lines)
+
+class _null_timer(object):
+    """Context manager that does nothing, used when no profile is
+    being recorded"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+_null = _null_timer()
+
+@contextlib.contextmanager
+def record(p=None, callback=None):
+    """Context manager to record a profile of the recipes evaluated and
+    rendered in the current context
+
+    # Arguments
+
+    p: The profile to record into.  If None, a new profile is
+    created.  The profile is returned by the context manager.
+
+    callback: Function called with the kind, the name, and the time
+    in seconds of each event when it completes, if a new profile is
+    created.  The default is None.
+
+    """
+
+    if p is None:
+        p = profile(callback=callback)
+
+    token = _active.set(p)
+    try:
+        yield p
+    finally:
+        _active.reset(token)
+
+def timer(kind, name):
+    """Return a context manager to time an event in the active profile,
+    if any"""
+
+    p = _active.get()
+    if p is None:
+        return _null
+    return p.timer(kind, name)
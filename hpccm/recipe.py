@@ -30,13 +30,52 @@ import traceback
 import hpccm
 
 import hpccm.config
+import hpccm.profile
+import hpccm.verify
 
 from hpccm.common import container_type
 
 from hpccm.Stage import Stage
 
-from hpccm.building_blocks import *
-from hpccm.primitives import *
+import hpccm.building_blocks
+import hpccm.primitives
+
+class _namespace(dict):
+    """Recipe namespace.  The building blocks and primitives are
+    loaded the first time a recipe refers to them."""
+
+    def __missing__(self, key):
+        for package in [hpccm.building_blocks, hpccm.primitives]:
+            if key in package.__all__:
+                value = getattr(package, key)
+                self[key] = value
+                return value
+        raise KeyError(key)
+
+# Path of the main recipe file being processed in the current context
+_recipe_path = hpccm.config._ContextVar('hpccm_recipe_path', default=None) # pylint: disable=protected-access
+
+# Compiled recipe files, keyed by path
+_code_cache = {}
+
+def _compile(recipe_file):
+    """Return the compiled code object for a recipe file.  The code
+    object is cached so that rendering the same recipe repeatedly,
+    e.g., for multiple container formats, only compiles it once.  The
+    cache entry is invalidated if the file is modified."""
+
+    st = os.stat(recipe_file)
+    key = os.path.abspath(recipe_file)
+    stamp = (st.st_mtime, st.st_size)
+
+    cached = _code_cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(recipe_file) as f:
+        code = compile(f.read(), recipe_file, 'exec')
+    _code_cache[key] = (stamp, code)
+    return code
 
 def include(recipe_file, _globals=None, _locals=None, prepend_path=True,
             raise_exceptions=False):
@@ -73,14 +112,16 @@ def include(recipe_file, _globals=None, _locals=None, prepend_path=True,
     # not the recipe file. In order to make including recipes in other
     # recipes using relative paths more intuitive, prepend the path of
     # the base recipe file.
-    if (prepend_path and hasattr(include, 'prepend_path')
-        and not os.path.isabs(recipe_file)):
-        recipe_file = os.path.join(include.prepend_path, recipe_file)
+    path = _recipe_path.get()
+    if path is None:
+        path = getattr(include, 'prepend_path', None)
+    if prepend_path and path is not None and not os.path.isabs(recipe_file):
+        recipe_file = os.path.join(path, recipe_file)
 
     try:
-        with open(recipe_file) as f:
+        with hpccm.profile.timer('include', recipe_file):
             # pylint: disable=exec-used
-            exec(compile(f.read(), recipe_file, 'exec'), _globals, _locals)
+            exec(_compile(recipe_file), _globals, _locals)
     except Exception as e:
         if raise_exceptions:
             raise_from(e, e)
@@ -92,7 +133,9 @@ def recipe(recipe_file, cpu_target=None, ctype=container_type.DOCKER,
            raise_exceptions=False, single_stage=False,
            singularity_version='2.6', userarg=None,
            working_directory='/var/tmp',
-           singularity_tmp_fallback=True):
+           singularity_tmp_fallback=True, optimize_layers=False,
+           hoist_packages=False, fan_out=False, cmake_generator=None,
+           optimization=None, cuda_arch=None, instrument=False):
     """Recipe builder
 
     # Arguments
@@ -127,6 +170,41 @@ def recipe(recipe_file, cpu_target=None, ctype=container_type.DOCKER,
     rejected and will raise an error, requiring the user to modify the
     recipe.
 
+    optimize_layers: If True, merge adjacent compatible instructions
+    into fewer layers, see `hpccm.config.set_optimize_layers`.  The
+    default is False.
+
+    hoist_packages: If True, install the operating system packages of
+    each stage in as few transactions as possible after the base
+    image, see `hpccm.config.set_hoist_packages`.  The default is
+    False.
+
+    fan_out: If True, build independent building blocks in separate
+    stages, so that they may be built in parallel (Docker specific),
+    see `hpccm.config.set_fan_out`.  The default is False.
+
+    cmake_generator: The CMake generator to use for building blocks
+    that build with CMake, e.g., `Ninja`, see
+    `hpccm.config.set_cmake_generator`.  The default is None, i.e.,
+    the CMake default generator.
+
+    optimization: The toolchain optimization profiles, e.g.,
+    `native-target,lto`, see `hpccm.config.set_optimization`.  The
+    default is None, i.e., no optimization profiles.
+
+    cuda_arch: The CUDA GPU architectures to build for, e.g., `80,90`,
+    see `hpccm.config.set_cuda_arch`.  The default is None, i.e., the
+    default GPU architectures of each component.
+
+    instrument: If True, print timestamped markers around the shell
+    commands of each building block when the container image is
+    built, for use with `hpccm-buildstats`, see
+    `hpccm.config.set_instrument`.  The default is False.
+
+    The configuration is stored in `hpccm.config`.  To process
+    multiple recipes concurrently in the same process, e.g., in
+    threads, call `recipe` inside a `hpccm.config.context`.
+
     """
 
     # Make user arguments available
@@ -145,23 +223,46 @@ def recipe(recipe_file, cpu_target=None, ctype=container_type.DOCKER,
     # Set the global container type
     hpccm.config.g_ctype = ctype
 
-    # Set the global Singularity version
-    hpccm.config.g_singularity_version = Version(singularity_version)
-
-    # Set the global working directory
-    hpccm.config.g_wd = working_directory
-
-    # Set Singularity /tmp fallback behavior
-    hpccm.config.g_singularity_tmp_fallback = singularity_tmp_fallback
+    # Set the global configuration from the recipe level options,
+    # which are all keyword arguments of this function
+    options = locals()
+    for name, _, setter in hpccm.config._recipe_options: # pylint: disable=protected-access
+        setter(options[name])
 
     # Any included recipes that are specified using relative paths will
     # need to prepend the path to the main recipe in order to be found.
     # Save the path to the main recipe.
     include.prepend_path = os.path.dirname(recipe_file)
+    token = _recipe_path.set(include.prepend_path)
+
+    # The recipe namespace contains the globals of this module, the
+    # local variables of this function, e.g., Stage0 and USERARG, and
+    # the building blocks and primitives
+    namespace = _namespace(globals())
+    namespace.update(locals())
+    if sys.version_info[0] < 3: # pragma: no cover
+        # Python 2 does not use __missing__ for global name lookups
+        for package in [hpccm.building_blocks, hpccm.primitives]:
+            namespace.update((k, getattr(package, k)) for k in package.__all__)
+
+    # Load in the recipe file.  Git repositories are verified
+    # concurrently after the recipe is evaluated, rather than one at a
+    # time while it is evaluated.
+    verifier = hpccm.verify.verifier()
+    try:
+        with hpccm.verify.deferred(verifier, run=False):
+            include(recipe_file, _locals=namespace, _globals=namespace,
+                    prepend_path=False, raise_exceptions=raise_exceptions)
+    finally:
+        _recipe_path.reset(token)
 
-    # Load in the recipe file
-    include(recipe_file, _locals=locals(), _globals=globals(),
-            prepend_path=False, raise_exceptions=raise_exceptions)
+    try:
+        verifier.run()
+    except RuntimeError as e:
+        if raise_exceptions:
+            raise
+        logging.error(e)
+        exit(1)
 
     # Only process the first stage of a recipe
     if single_stage:
@@ -192,6 +293,7 @@ def recipe(recipe_file, cpu_target=None, ctype=container_type.DOCKER,
     for index, stage in enumerate(stages):
         if index >= 1:
             r.append('')
-        r.append(str(stage))
+        with hpccm.profile.timer('stage', 'Stage{}'.format(index)):
+            r.append(str(stage))
 
     return '\n'.join(r)
@@ -0,0 +1,327 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name
+
+"""Recipe rendering server and client
+
+The server keeps HPCCM imported and renders recipes on request, so
+the cost of starting Python and importing HPCCM is only paid once.
+Requests are processed concurrently, each in its own configuration
+context.
+
+The protocol is HTTP, over TCP or a Unix domain socket.  A `POST` to
+`/render` with a JSON object containing either `recipe` (path to a
+recipe file on the server host) or `recipe_text` (recipe source), and
+optionally `format`, `cpu_target`, `profile`, `single_stage`,
+`userarg`, and the recipe level configuration options of
+`hpccm.recipe`, e.g., `optimize_layers`, returns a JSON object with
+the container specification in `spec` and any warnings in
+`warnings`.  If `profile` is true, the object also contains the
+timings of the building blocks and included recipes in `profile`,
+see `hpccm.profile`.  If the recipe cannot be rendered, the response
+status is 400 and the JSON object contains `error`.
+
+Note that recipes are Python code executed by the server, so only
+listen on addresses that are restricted to trusted users.
+"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import traceback
+
+from six.moves import BaseHTTPServer
+from six.moves import http_client
+from six.moves import socketserver
+
+import hpccm
+import hpccm.config
+import hpccm.profile
+
+from hpccm.common import container_type
+from hpccm.recipe import _code_cache, recipe
+from hpccm.version import __version__
+
+# Default server address
+DEFAULT_ADDRESS = '127.0.0.1:8686'
+
+class _capture(logging.Handler):
+    """Collect the log messages emitted by the current thread"""
+
+    def __init__(self):
+        super(_capture, self).__init__(logging.WARNING)
+        self.messages = []
+        self.__thread = threading.current_thread().ident
+
+    def emit(self, record):
+        if record.thread == self.__thread:
+            self.messages.append('{0}: {1}'.format(record.levelname,
+                                                   record.getMessage()))
+
+def render(request):
+    """Render a recipe request
+
+    # Arguments
+
+    request: dictionary containing either `recipe` or `recipe_text`,
+    and optionally `format`, `cpu_target`, `profile`, `single_stage`,
+    `userarg`, and the recipe level configuration options of
+    `hpccm.recipe`, e.g., `optimize_layers`.
+
+    # Returns
+
+    A dictionary with the container specification in `spec` and a list
+    of the warning messages in `warnings`.  If `profile` is true, the
+    summary of the timings is in `profile`, see
+    `hpccm.profile.profile.summary`.
+
+    # Raises
+
+    RuntimeError: invalid request
+
+    """
+
+    if not isinstance(request, dict):
+        raise RuntimeError('invalid request')
+
+    tmpdir = None
+    recipe_file = request.get('recipe')
+    if request.get('recipe_text') is not None:
+        tmpdir = tempfile.mkdtemp(prefix='hpccm-')
+        recipe_file = os.path.join(tmpdir, 'recipe.py')
+        with open(recipe_file, 'w') as f:
+            f.write(request['recipe_text'])
+    elif not recipe_file:
+        raise RuntimeError('no recipe specified')
+
+    fmt = request.get('format', 'docker')
+    try:
+        ctype = container_type[fmt.upper()]
+    except KeyError:
+        raise RuntimeError('Unrecognized format: {}'.format(fmt))
+
+    options = dict((name, request.get(name, default))
+                   for name, default, _ in hpccm.config._recipe_options) # pylint: disable=protected-access
+
+    handler = _capture()
+    logging.getLogger().addHandler(handler)
+    try:
+        with hpccm.config.context(), hpccm.profile.record() as timings:
+            spec = recipe(
+                recipe_file,
+                cpu_target=request.get('cpu_target'),
+                ctype=ctype,
+                raise_exceptions=True,
+                single_stage=request.get('single_stage', False),
+                userarg=request.get('userarg'),
+                **options)
+    finally:
+        logging.getLogger().removeHandler(handler)
+        if tmpdir:
+            _code_cache.pop(os.path.abspath(recipe_file), None)
+            shutil.rmtree(tmpdir)
+
+    response = {'spec': spec, 'warnings': handler.messages}
+    if request.get('profile'):
+        response['profile'] = timings.summary()
+    return response
+
+class _handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """HTTP request handler"""
+
+    def __reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # The client address is not a tuple for Unix domain sockets
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return 'unix'
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        logging.info('{0} {1}'.format(self.address_string(), format % args))
+
+    def do_GET(self): # pylint: disable=invalid-name
+        if self.path.rstrip('/') in ['', '/version']:
+            self.__reply(200, {'version': __version__})
+        else:
+            self.__reply(404, {'error': 'not found'})
+
+    def do_POST(self): # pylint: disable=invalid-name
+        if self.path.rstrip('/') != '/render':
+            self.__reply(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            self.__reply(200, render(request))
+        except Exception as e: # pylint: disable=broad-except
+            logging.debug(traceback.format_exc())
+            self.__reply(400, {'error': '{0}: {1}'.format(
+                type(e).__name__, e)})
+
+class _tcp_server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+# Unix domain sockets are not available on all platforms, e.g.,
+# Windows
+if hasattr(socket, 'AF_UNIX'):
+    class _unix_server(socketserver.ThreadingMixIn,
+                       socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def server_bind(self):
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+            socketserver.UnixStreamServer.server_bind(self)
+
+def _parse_address(address):
+    """Return a Unix domain socket path, or a (host, port) tuple"""
+
+    if address.startswith('unix:'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError('Unix domain sockets are not supported on '
+                               'this platform: {}'.format(address))
+        return address[len('unix:'):]
+
+    address = address.replace('http://', '').rstrip('/')
+    host, _, port = address.rpartition(':')
+    return (host or '127.0.0.1', int(port))
+
+def server(address=DEFAULT_ADDRESS):
+    """Return a server instance listening on the specified address,
+    either `host:port` or `unix:/path/to/socket`.  Call
+    `serve_forever()` on the returned instance to process requests."""
+
+    address = _parse_address(address)
+    if isinstance(address, tuple):
+        return _tcp_server(address, _handler)
+    return _unix_server(address, _handler)
+
+def warm():
+    """Import everything that is loaded lazily, so that the first
+    request is as fast as subsequent requests"""
+
+    import archspec.cpu
+    len(archspec.cpu.TARGETS)
+    for name in hpccm.building_blocks.__all__:
+        getattr(hpccm.building_blocks, name)
+    for name in hpccm.primitives.__all__:
+        getattr(hpccm.primitives, name)
+
+class _unix_connection(http_client.HTTPConnection):
+    """HTTP connection over a Unix domain socket"""
+
+    def __init__(self, path, timeout=None):
+        http_client.HTTPConnection.__init__(self, 'localhost',
+                                            timeout=timeout)
+        self.__path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.__path)
+
+def client(request, address=DEFAULT_ADDRESS, timeout=300):
+    """Send a render request to a server
+
+    # Arguments
+
+    request: dictionary describing the request, see `render`.  A
+    relative `recipe` path is converted to an absolute path.
+
+    address: the server address, either `host:port` or
+    `unix:/path/to/socket`.
+
+    timeout: network timeout in seconds.
+
+    # Returns
+
+    The response dictionary, see `render`.
+
+    # Raises
+
+    RuntimeError: the server returned an error
+
+    """
+
+    if request.get('recipe'):
+        request = dict(request, recipe=os.path.abspath(request['recipe']))
+
+    address = _parse_address(address)
+    if isinstance(address, tuple):
+        conn = http_client.HTTPConnection(address[0], address[1],
+                                          timeout=timeout)
+    else:
+        conn = _unix_connection(address, timeout=timeout)
+
+    try:
+        conn.request('POST', '/render', body=json.dumps(request),
+                     headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        body = json.loads(response.read().decode('utf-8'))
+    finally:
+        conn.close()
+
+    if response.status != 200:
+        raise RuntimeError(body.get('error', 'HTTP {}'.format(
+            response.status)))
+
+    return body
+
+def main(argv=None): # pragma: no cover
+    parser = argparse.ArgumentParser(
+        prog='hpccm serve',
+        description='HPC Container Maker recipe rendering server')
+    parser.add_argument('--listen', type=str, default=DEFAULT_ADDRESS,
+                        help='address to listen on, host:port or ' +
+                        'unix:/path/to/socket (default: {})'.format(
+                            DEFAULT_ADDRESS))
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        default=False, help='log requests')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(format='%(levelname)s: %(message)s',
+                        level=logging.INFO if args.verbose else logging.WARNING)
+
+    warm()
+    s = server(args.listen)
+    logging.warning('listening on {}'.format(args.listen))
+    try:
+        s.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        s.server_close()
+        if isinstance(s.server_address, str) and os.path.exists(
+                s.server_address):
+            os.remove(s.server_address)
@@ -24,10 +24,16 @@ from six.moves import shlex_quote
 
 import copy
 import posixpath
+import re
 
-import hpccm.base_object
+from packaging.version import Version
 
-class CMakeBuild(hpccm.base_object):
+import hpccm.config
+
+from hpccm.templates.compiler_cache import compiler_cache
+from hpccm.toolchain import toolchain as default_toolchain
+
+class CMakeBuild(compiler_cache):
     """Template for cmake workflows"""
 
     def __init__(self, **kwargs):
@@ -37,7 +43,10 @@ class CMakeBuild(hpccm.base_object):
 
         self.__build_directory = None
         self.cmake_opts = kwargs.get('opts', [])
-        self.parallel = kwargs.get('parallel', '$(nproc)')
+        self.cuda_arch = kwargs.get('cuda_arch', None)
+        self.generator = kwargs.get('generator', None)
+        self.parallel = kwargs.get('parallel', None)
+        self.parallel_memory = kwargs.get('parallel_memory', None)
         self.prefix = kwargs.get('prefix', '/usr/local')
 
         # Some components complain if some compiler variables are
@@ -52,8 +61,53 @@ class CMakeBuild(hpccm.base_object):
         """Generate cmake build command line string"""
         if not parallel:
             parallel = self.parallel
-        return 'cmake --build {0} --target {1} -- -j{2}'.format(
-            self.__build_directory, target, parallel)
+        parallel = hpccm.config.get_parallel(parallel,
+                                             memory=self.parallel_memory)
+        if self.cmake_generator():
+            # Let CMake pass the number of jobs to the build tool
+            cmd = 'cmake --build {0} --target {1} --parallel {2}'.format(
+                self.__build_directory, target, parallel)
+        else:
+            cmd = 'cmake --build {0} --target {1} -- -j{2}'.format(
+                self.__build_directory, target, parallel)
+
+        # Report the compiler cache statistics of the build.  The
+        # install target is preceded by a build step that already
+        # reported them.
+        stats = self.compiler_cache_stats_step()
+        if stats and target != 'install':
+            cmd = '{0} && {1}'.format(cmd, stats)
+
+        return cmd
+
+    def cmake_generator(self):
+        """Return the CMake generator, or None for the CMake default
+        generator"""
+        return hpccm.config.get_cmake_generator(self.generator)
+
+    def cmake_generator_ospackages(self):
+        """Return the list of OS packages providing the build tool of
+        the CMake generator"""
+        if self.cmake_generator() in ['Ninja', 'Ninja Multi-Config']:
+            return ['ninja-build']
+        return []
+
+    def cmake_generator_packages(self):
+        """Return the `packages` building block that installs the build
+        tool of the CMake generator, or None if no OS packages are
+        needed"""
+
+        ospackages = self.cmake_generator_ospackages()
+        if not ospackages:
+            return None
+
+        # Imported here since the building blocks import the templates
+        from hpccm.building_blocks.packages import packages
+
+        # ninja-build is in EPEL for CentOS 7, and in the PowerTools
+        # (CRB) repository for later versions
+        return packages(epel=hpccm.config.g_linux_version < Version('8.0'),
+                        ospackages=ospackages, powertools=True)
 
     def configure_step(self, build_directory='build', directory=None,
                        environment=[], opts=None, toolchain=None):
@@ -73,6 +127,12 @@ class CMakeBuild(hpccm.base_object):
         # Cache this for the build step
         self.__build_directory = build_directory
 
+        # Merge the compiler flags of the optimization profiles, if any
+        if not toolchain and hpccm.config.get_optimization():
+            toolchain = default_toolchain()
+        if toolchain:
+            toolchain = toolchain.optimized()
+
         e = copy.copy(environment)
         if toolchain:
             if toolchain.CC and self.toolchain_control.get('CC'):
@@ -130,10 +190,28 @@ class CMakeBuild(hpccm.base_object):
             configure_opts = ' '.join(opts)
             configure_opts += ' '
 
+        # CUDA GPU architectures, unless specified explicitly
+        cuda_arch = hpccm.config.get_cuda_arch(self.cuda_arch)
+        if cuda_arch and not re.search(r'-D\s*CMAKE_CUDA_ARCHITECTURES\b',
+                                       configure_opts):
+            configure_opts += '-DCMAKE_CUDA_ARCHITECTURES="{}" '.format(
+                ';'.join(cuda_arch))
+
+        launcher = self.compiler_cache_launcher()
+        if launcher:
+            for lang in ['C', 'CXX', 'CUDA', 'Fortran']:
+                configure_opts += '-DCMAKE_{0}_COMPILER_LAUNCHER={1} '.format(
+                    lang, launcher)
+
         if self.prefix:
             configure_opts = '-DCMAKE_INSTALL_PREFIX={0:s} {1}'.format(
                 self.prefix, configure_opts)
 
+        generator = self.cmake_generator()
+        if generator:
+            configure_opts = '-G {0} {1}'.format(shlex_quote(generator),
+                                                 configure_opts)
+
         cmd = '{0}{1}cmake {2}{3}'.format(
             change_directory, configure_env, configure_opts, src_directory)
 
@@ -143,4 +221,10 @@ class CMakeBuild(hpccm.base_object):
                 change_directory, configure_env, configure_opts,
                 src_directory).strip())
 
-        return cmd.strip() # trim whitespace
+        # Install and set up the compiler cache, if enabled
+        cmd = cmd.strip() # trim whitespace
+        setup = self.compiler_cache_setup_step()
+        if setup:
+            cmd = '{0} && {1}'.format(setup, cmd)
+
+        return cmd
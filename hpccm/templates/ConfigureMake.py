@@ -24,9 +24,12 @@ from six.moves import shlex_quote
 
 import copy
 
-import hpccm.base_object
+import hpccm.config
 
-class ConfigureMake(hpccm.base_object):
+from hpccm.templates.compiler_cache import compiler_cache
+from hpccm.toolchain import toolchain as default_toolchain
+
+class ConfigureMake(compiler_cache):
     """Template for autotools configure / make / make install workflow"""
 
     def __init__(self, **kwargs):
@@ -35,7 +38,8 @@ class ConfigureMake(hpccm.base_object):
         super(ConfigureMake, self).__init__(**kwargs)
 
         self.configure_opts = kwargs.get('opts', [])
-        self.parallel = kwargs.get('parallel', '$(nproc)')
+        self.parallel = kwargs.get('parallel', None)
+        self.parallel_memory = kwargs.get('parallel_memory', None)
         self.prefix = kwargs.get('prefix', '/usr/local')
 
         # Some components complain if some compiler variables are
@@ -63,12 +67,23 @@ class ConfigureMake(hpccm.base_object):
         """Generate make command line string"""
         if not parallel:
             parallel = self.parallel
-        return 'make -j{}'.format(parallel)
+        parallel = hpccm.config.get_parallel(parallel,
+                                             memory=self.parallel_memory)
+        cmd = 'make -j{}'.format(parallel)
+
+        # Report the compiler cache statistics of the build
+        stats = self.compiler_cache_stats_step()
+        if stats:
+            cmd = '{0} && {1}'.format(cmd, stats)
+
+        return cmd
 
     def check_step(self, parallel=None):
         """Generate make check command line string"""
         if not parallel:
             parallel = self.parallel
+        parallel = hpccm.config.get_parallel(parallel,
+                                             memory=self.parallel_memory)
         return 'make -j{} check'.format(parallel)
 
     def configure_step(self, build_directory=None, directory=None,
@@ -86,10 +101,17 @@ class ConfigureMake(hpccm.base_object):
             else:
                 change_directory = 'cd {} && '.format(directory)
 
+        # Merge the compiler flags of the optimization profiles, if any
+        if not toolchain and hpccm.config.get_optimization():
+            toolchain = default_toolchain()
+        if toolchain:
+            toolchain = toolchain.optimized()
+
         e = copy.copy(environment)
         if toolchain:
             if toolchain.CC and self.toolchain_control.get('CC'):
-                e.append('CC={}'.format(toolchain.CC))
+                e.append('CC={}'.format(self.compiler_cache_wrap(
+                    toolchain.CC)))
 
             if toolchain.CFLAGS:
                 e.append('CFLAGS={}'.format(shlex_quote(
@@ -100,20 +122,24 @@ class ConfigureMake(hpccm.base_object):
                     toolchain.CPPFLAGS)))
 
             if toolchain.CXX and self.toolchain_control.get('CXX'):
-                e.append('CXX={}'.format(toolchain.CXX))
+                e.append('CXX={}'.format(self.compiler_cache_wrap(
+                    toolchain.CXX)))
 
             if toolchain.CXXFLAGS:
                 e.append('CXXFLAGS={}'.format(shlex_quote(
                     toolchain.CXXFLAGS)))
 
             if toolchain.F77 and self.toolchain_control.get('F77'):
-                e.append('F77={}'.format(toolchain.F77))
+                e.append('F77={}'.format(self.compiler_cache_wrap(
+                    toolchain.F77)))
 
             if toolchain.F90 and self.toolchain_control.get('F90'):
-                e.append('F90={}'.format(toolchain.F90))
+                e.append('F90={}'.format(self.compiler_cache_wrap(
+                    toolchain.F90)))
 
             if toolchain.FC and self.toolchain_control.get('FC'):
-                e.append('FC={}'.format(toolchain.FC))
+                e.append('FC={}'.format(self.compiler_cache_wrap(
+                    toolchain.FC)))
 
             if toolchain.FCFLAGS:
                 e.append('FCFLAGS={}'.format(shlex_quote(
@@ -172,10 +198,18 @@ class ConfigureMake(hpccm.base_object):
                 change_directory, configure_env, configure_opts,
                 src_directory).strip())
 
-        return cmd.strip() # trim whitespace
+        # Install and set up the compiler cache, if enabled
+        cmd = cmd.strip() # trim whitespace
+        setup = self.compiler_cache_setup_step()
+        if setup:
+            cmd = '{0} && {1}'.format(setup, cmd)
+
+        return cmd
 
     def install_step(self, parallel=None):
         """Generate make install command line string"""
         if not parallel:
             parallel = self.parallel
+        parallel = hpccm.config.get_parallel(parallel,
+                                             memory=self.parallel_memory)
         return 'make -j{} install'.format(parallel)
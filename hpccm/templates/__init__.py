@@ -17,6 +17,7 @@ from __future__ import absolute_import
 from hpccm.templates.CMakeBuild import CMakeBuild
 from hpccm.templates.ConfigureMake import ConfigureMake
 from hpccm.templates.annotate import annotate
+from hpccm.templates.compiler_cache import compiler_cache
 from hpccm.templates.downloader import downloader
 from hpccm.templates.envvars import envvars
 from hpccm.templates.git import git
@@ -0,0 +1,132 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""compiler_cache template"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+from six.moves import shlex_quote
+
+import hpccm.base_object
+import hpccm.config
+
+from hpccm.common import container_type
+
+class compiler_cache(hpccm.base_object):
+    """Template for caching compiler output between builds with
+    [ccache](https://ccache.dev) or
+    [sccache](https://github.com/mozilla/sccache)"""
+
+    def __init__(self, **kwargs):
+        """Initialize template"""
+
+        super(compiler_cache, self).__init__(**kwargs)
+
+        self.compiler_cache = kwargs.get('compiler_cache', None)
+
+        # Building blocks that build compiler wrappers, e.g., mpicc,
+        # must not embed the compiler cache command in the wrappers
+        self.__wrap = kwargs.get('_compiler_cache_wrap', True)
+
+    def compiler_cache_launcher(self):
+        """Return the compiler cache command, or None if the compiler
+        cache is disabled"""
+        launcher = hpccm.config.get_compiler_cache(self.compiler_cache)
+        if launcher == 'sccache' and not self.__wrap:
+            # sccache has no masquerade directory, so only compilers
+            # prefixed by the sccache command are cached
+            return None
+        return launcher
+
+    def compiler_cache_mount(self):
+        """Return the Dockerfile RUN argument to mount the compiler cache
+        directory, or an empty string if the compiler cache is disabled
+        (Docker specific)"""
+        launcher = self.compiler_cache_launcher()
+        if not launcher or hpccm.config.g_ctype != container_type.DOCKER:
+            return ''
+        return '--mount=type=cache,target={}'.format(
+            hpccm.config.get_compiler_cache_directory(launcher))
+
+    def compiler_cache_ospackages(self):
+        """Return the list of OS packages providing the compiler cache"""
+        if self.compiler_cache_launcher() == 'ccache':
+            return ['ccache']
+        return []
+
+    def compiler_cache_packages(self):
+        """Return the `packages` building block that installs the
+        compiler cache, or None if no OS packages are needed"""
+
+        ospackages = self.compiler_cache_ospackages()
+        if not ospackages:
+            return None
+
+        # Imported here since the building blocks import the templates
+        from hpccm.building_blocks.packages import packages
+
+        # ccache is in EPEL for RHEL-based distributions
+        return packages(epel=True, ospackages=ospackages)
+
+    def compiler_cache_wrap(self, compiler):
+        """Return the compiler command line prefixed by the compiler
+        cache command, quoted for use in a variable assignment.  ccache
+        wraps the compilers using its masquerade directory instead, so
+        the compiler is returned unchanged."""
+        launcher = self.compiler_cache_launcher()
+        if launcher != 'sccache':
+            return compiler
+        return shlex_quote('{0} {1}'.format(launcher, compiler))
+
+    def compiler_cache_setup_step(self):
+        """Generate the command line string to point the compiler cache
+        to the cache directory and reset the statistics.  ccache is
+        installed from the OS packages returned by
+        `compiler_cache_ospackages`.  sccache must already be installed
+        in the container image."""
+
+        launcher = self.compiler_cache_launcher()
+        if not launcher:
+            return ''
+
+        directory = hpccm.config.get_compiler_cache_directory(launcher)
+
+        if launcher == 'sccache':
+            return ' && '.join(
+                ['(command -v sccache >/dev/null 2>&1 || '
+                 '(echo "sccache is not installed" >&2 && exit 1))',
+                 'export SCCACHE_DIR={}'.format(directory),
+                 'sccache --zero-stats'])
+
+        # The masquerade directories wrap the system compilers,
+        # including when invoked by compiler wrappers like mpicc
+        return ' && '.join(
+            ['export CCACHE_DIR={}'.format(directory),
+             'export PATH=/usr/lib/ccache:/usr/lib64/ccache:$PATH',
+             'ccache -z'])
+
+    def compiler_cache_stats_step(self):
+        """Generate the command line string to report the compiler cache
+        statistics"""
+
+        launcher = self.compiler_cache_launcher()
+        if launcher == 'sccache':
+            return 'sccache --show-stats'
+        elif launcher:
+            return 'ccache -s'
+        return ''
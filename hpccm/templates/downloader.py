@@ -29,6 +29,12 @@ import hpccm.config
 
 from hpccm.common import container_type
 
+# Package file names of tarballs, the group is the name without the
+# suffix
+_tarball = re.compile(r'(.*)(?:(?:\.tar)|(?:\.tar\.gz)|(?:\.txz)'
+                      r'|(?:\.tgz)|(?:\.tar\.bz2)|(?:\.tar\.xz)'
+                      r'|(?:\.tar\.zst)|(?:\.tzst))$')
+
 class downloader(hpccm.base_object):
     """Template for downloading source code"""
 
@@ -38,14 +44,28 @@ class downloader(hpccm.base_object):
         self.branch = kwargs.get('branch', None)
         self.commit = kwargs.get('commit', None)
         self.package = kwargs.get('package', None)
+        self.parallel_decompress = kwargs.get('parallel_decompress', None)
         self.repository = kwargs.get('repository', None)
+        self.sha256 = kwargs.get('sha256', None)
+        self.source_cache = kwargs.get('source_cache', None)
         self.src_directory = None
+        self.stream = kwargs.get('stream', False)
         self.url = kwargs.get('url', None)
         self.wget_no_check_certificate = kwargs.get('no_check_certificate',
                                                     False)
 
         super(downloader, self).__init__(**kwargs)
 
+    def download_mount(self):
+        """Return the Dockerfile RUN argument to mount the source cache
+        used by `download_step`, or an empty string if the source cache
+        is not used (Docker specific)."""
+
+        if not self.url:
+            return ''
+
+        return hpccm.templates.wget().cache_mount(self.source_cache)
+
     def download_step(self, allow_unknown_filetype=True, recursive=False,
                       unpack=True, wd=hpccm.config.g_wd):
         """Get source code"""
@@ -63,15 +83,40 @@ class downloader(hpccm.base_object):
         commands = []
 
         if self.url:
-            # Download package
-            commands.append(hpccm.templates.wget().download_step(
-                url=self.url, directory=wd,
-                no_check_certificate=self.wget_no_check_certificate))
-
-            if unpack:
+            cache = hpccm.config.get_source_cache(self.source_cache)
+            if cache and unpack:
+                # Download package into the source cache, unless
+                # already present, and unpack it directly from there
+                w = hpccm.templates.wget()
+                commands.append(w.cache_step(
+                    url=self.url, cache=cache, sha256=self.sha256,
+                    no_check_certificate=self.wget_no_check_certificate))
                 commands.append(self.__unpack(
                     self.url, wd,
-                    allow_unknown_filetype=allow_unknown_filetype))
+                    allow_unknown_filetype=allow_unknown_filetype,
+                    archive=w.cache_path(self.url, cache=cache,
+                                         sha256=self.sha256)))
+            elif (self.stream and unpack and
+                  _tarball.search(posixpath.basename(self.url))):
+                # Download and unpack the package in one pass, without
+                # writing the package to disk
+                commands.append('mkdir -p {0} && {1}'.format(
+                    wd, hpccm.templates.wget().stream_step(
+                        url=self.url,
+                        command=self.__unpack(self.url, wd, stream=True),
+                        no_check_certificate=self.wget_no_check_certificate,
+                        sha256=self.sha256)))
+            else:
+                # Download package
+                commands.append(hpccm.templates.wget().download_step(
+                    url=self.url, directory=wd, cache=cache,
+                    no_check_certificate=self.wget_no_check_certificate,
+                    sha256=self.sha256))
+
+                if unpack:
+                    commands.append(self.__unpack(
+                        self.url, wd,
+                        allow_unknown_filetype=allow_unknown_filetype))
 
             if callable(annotate):
                 self.add_annotation('url', self.url)
@@ -113,12 +158,17 @@ class downloader(hpccm.base_object):
         else:
             raise RuntimeError('Unknown container type')
 
-    def __unpack(self, package, wd, allow_unknown_filetype=True):
-        """Unpack package and set source directory"""
+    def __unpack(self, package, wd, allow_unknown_filetype=True,
+                 archive=None, stream=False):
+        """Unpack package and set source directory.  The archive is
+        assumed to be in the working directory unless its location
+        is explicitly specified.  If `stream` is True, the tarball is
+        read from standard input."""
 
-        match_tar = re.search(r'(.*)(?:(?:\.tar)|(?:\.tar\.gz)|(?:\.txz)'
-                              r'|(?:\.tgz)|(?:\.tar\.bz2)|(?:\.tar\.xz))$',
-                              posixpath.basename(package))
+        if not archive:
+            archive = posixpath.join(wd, posixpath.basename(package))
+
+        match_tar = _tarball.search(posixpath.basename(package))
 
         match_zip = re.search(r'(.*)(?:(?:\.zip))$',
                               posixpath.basename(package))
@@ -127,11 +177,11 @@ class downloader(hpccm.base_object):
             # Set directory where to find source
             self.src_directory = posixpath.join(wd, match_tar.group(1))
             return hpccm.templates.tar().untar_step(
-                posixpath.join(wd, posixpath.basename(package)), directory=wd)
+                archive, directory=wd, parallel=self.parallel_decompress,
+                stream=stream)
         elif match_zip:
             self.src_directory = posixpath.join(wd, match_zip.group(1))
-            return hpccm.templates.zipfile().unzip_step(
-                posixpath.join(wd, posixpath.basename(package)), directory=wd)
+            return hpccm.templates.zipfile().unzip_step(archive, directory=wd)
         elif allow_unknown_filetype:
             # Unclear what the file type is.  For instance, this can
             # happen if a site uses a URL redirector and the shortened
@@ -143,6 +193,6 @@ class downloader(hpccm.base_object):
             logging.warning('unrecognized package format')
             self.src_directory = None
             return hpccm.templates.tar().untar_step(
-                posixpath.join(wd, posixpath.basename(package)), directory=wd)
+                archive, directory=wd, parallel=self.parallel_decompress)
         else:
             raise RuntimeError('unrecognized package format')
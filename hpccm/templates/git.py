@@ -23,9 +23,11 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import posixpath
 import re
-import subprocess
 
 import hpccm.base_object
+import hpccm.config
+import hpccm.fetch
+import hpccm.verify
 
 class git(hpccm.base_object):
     """Template for working with git repositories"""
@@ -37,25 +39,12 @@ class git(hpccm.base_object):
 
         self.git_opts = kwargs.get('opts', ['--depth=1'])
 
-    def __verify(self, repository, branch=None):
-        """Verify that the specific git branch and the remote repositories exist"""
-
-        cmd = 'git ls-remote --exit-code --heads {0}'.format(repository)
-        if branch is not None: cmd = 'git ls-remote --exit-code {0} | grep "{1}"'.format(repository, branch)
-
-        p = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE,stderr=subprocess.PIPE)
-        stdout,stderr = p.communicate()
-
-        if p.returncode != 0:
-            return 'git repository "{}" or branch "{}" do not exist\n  cmd: "{}"\n  stdout: "{}"\n  stderr: "{}"'.format(
-                repository, branch, cmd, stdout, stderr
-            )
-
-        return None
-
     def clone_step(self, branch=None, commit=None, directory='', path='/tmp',
-                   repository=None, verify=None, lfs=False, recursive=False):
-        """Clone a git repository"""
+                   repository=None, verify=None, lfs=False, recursive=False,
+                   shallow=None, filter_spec=None, jobs=None):
+        """Clone a git repository.  If `shallow`, `filter_spec`, or
+        `jobs` is None, the global setting is used, see
+        `hpccm.config.set_git_clone`."""
 
         if not repository:
             logging.warning('No git repository specified')
@@ -72,9 +61,22 @@ class git(hpccm.base_object):
             # below.
             directory = posixpath.splitext(posixpath.basename(repository))[0]
 
+        hpccm.fetch.record_repository(repository, branch=branch,
+                                      commit=commit, recursive=recursive)
+
+        if shallow is None:
+            shallow = hpccm.config.g_git_shallow
+        if filter_spec is None:
+            filter_spec = hpccm.config.g_git_filter
+        if jobs is None:
+            jobs = hpccm.config.g_git_jobs
+
         # Copy so not to modify the member variable
         opts = list(self.git_opts)
 
+        if filter_spec:
+            opts.append('--filter={}'.format(filter_spec))
+
         # Commit has precedence over branch
         if branch and not commit:
             opts.append('--branch {}'.format(branch))
@@ -82,6 +84,10 @@ class git(hpccm.base_object):
         # recursive clone with submodules
         if recursive:
             opts.append('--recursive')
+            if shallow:
+                opts.append('--shallow-submodules')
+            if jobs:
+                opts.append('--jobs {}'.format(jobs))
 
         opt_string = ' '.join(opts)
 
@@ -90,20 +96,41 @@ class git(hpccm.base_object):
             # '--depth' if present
             opt_string = re.sub(r'--depth=\d+\s*', '', opt_string).strip()
 
-        # Verify the commit / branch is valid
+        # Verify the commit / branch is valid.  When rendering a
+        # recipe, the verification is deferred until the recipe is
+        # rendered.
         if verify == True or verify == 'fatal':
-            error = self.__verify(repository, branch)
-            if error is not None:
-                if verify == 'fatal':
-                    raise RuntimeError(error)
-                else:
-                    logging.warning(error)
+            hpccm.verify.request(repository, branch=branch,
+                                 fatal=(verify == 'fatal'))
 
         # If lfs=True use `git lfs clone`
         lfs_string = " "
         if lfs:
           lfs_string = " lfs "
 
+        if commit and shallow and not lfs:
+            clone = self.__fetch_commit(commit, posixpath.join(path, directory),
+                                        repository, filter_spec=filter_spec,
+                                        jobs=jobs, recursive=recursive)
+        else:
+            clone = self.__clone(commit, directory, path, repository,
+                                 lfs_string, opt_string)
+
+        # Add labels if the caller inherits from the labels template
+        if callable(getattr(self, 'add_annotation', None)):
+            self.add_annotation('repository', repository)
+            if branch:
+                self.add_annotation('branch', branch)
+            if commit:
+                self.add_annotation('commit', commit)
+
+        return ' && '.join(clone)
+
+    def __clone(self, commit, directory, path, repository, lfs_string,
+                opt_string):
+        """Return the commands to clone a repository, and to check out
+        the commit, if any"""
+
         # Ensure the path exists
         # Would prefer to use 'git -C', but the ancient git included
         # with CentOS7 does not support that option.
@@ -118,12 +145,29 @@ class git(hpccm.base_object):
                           'git checkout {0}'.format(commit),
                           'cd -'])
 
-        # Add labels if the caller inherits from the labels template
-        if callable(getattr(self, 'add_annotation', None)):
-            self.add_annotation('repository', repository)
-            if branch:
-                self.add_annotation('branch', branch)
-            if commit:
-                self.add_annotation('commit', commit)
+        return clone
 
-        return ' && '.join(clone)
+    def __fetch_commit(self, commit, directory, repository, filter_spec=None,
+                       jobs=None, recursive=False):
+        """Return the commands to fetch only the commit of a repository
+        and check it out.  If the server does not allow fetching the
+        commit, e.g., since it is abbreviated, fetch the full history
+        instead."""
+
+        filter_opt = ' --filter={}'.format(filter_spec) if filter_spec else ''
+
+        fetch = ['mkdir -p {0}'.format(directory),
+                 'cd {0}'.format(directory),
+                 'git init',
+                 'git remote add origin {0}'.format(repository),
+                 '(git fetch --depth=1{0} origin {1} || '
+                 'git fetch{0} --tags origin)'.format(filter_opt, commit),
+                 'git checkout {0}'.format(commit)]
+
+        if recursive:
+            fetch.append('git submodule update --init --recursive '
+                         '--depth=1{0}'.format(
+                             ' --jobs {}'.format(jobs) if jobs else ''))
+
+        fetch.append('cd -')
+        return fetch
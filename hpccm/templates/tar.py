@@ -24,47 +24,75 @@ import logging # pylint: disable=unused-import
 import re
 
 import hpccm.base_object
+import hpccm.config
+
+# Tar option and decompressor of each compression format.  The
+# multi-threaded decompressors that are not always installed fall
+# back to the single-threaded decompressor when the container image
+# is built.
+_formats = [
+    (r'\.(?:tar\.bz2|tbz)$', '-j',
+     '$(command -v lbzip2 || command -v pbzip2 || echo bzip2)'),
+    (r'\.(?:tar\.gz|tgz)$', '-z', '$(command -v pigz || echo gzip)'),
+    (r'\.(?:tar\.xz|txz)$', '-J', 'xz -T0'),
+    (r'\.(?:tar\.zst|tzst)$', '--use-compress-program=zstd', 'zstd -T0')]
 
 class tar(hpccm.base_object):
-    """tar template"""
+    """tar template
+
+    # Parameters
+
+    parallel_decompress: Boolean flag to specify whether to use
+    multi-threaded decompressors, if available.  The default is the
+    global setting, see `hpccm.config.set_parallel_decompress`.
+
+    """
 
     def __init__(self, **kwargs):
         """Initialize tar template"""
 
         super(tar, self).__init__(**kwargs)
 
-    def untar_step(self, tarball=None, directory=None, args=None):
-        """Generate untar command line string"""
+        self.parallel_decompress = kwargs.get('parallel_decompress', None)
+
+    def untar_step(self, tarball=None, directory=None, args=None,
+                   stream=False, parallel=None):
+        """Generate untar command line string.  If `stream` is True,
+        the tarball is read from standard input, `tarball` is only
+        used to select the decompressor, and the directory is not
+        created.  If `parallel` is None, the `parallel_decompress`
+        parameter or the global setting selects whether to use
+        multi-threaded decompressors."""
 
         if not tarball:
             logging.error('tarball is not defined')
             return ''
 
-        opts = ['-x', '-f {}'.format(tarball)]
+        if parallel is None:
+            parallel = self.parallel_decompress
+        if parallel is None:
+            parallel = hpccm.config.g_parallel_decompress
+
+        opts = ['-x', '-f {}'.format('-' if stream else tarball)]
         if directory:
             opts.append('-C {}'.format(directory))
 
-        if re.search(r'\.tar\.bz2$', tarball):
-            opts.append('-j')
-        elif re.search(r'\.tar\.gz$', tarball):
-            opts.append('-z')
-        elif re.search(r'\.tgz$', tarball):
-            opts.append('-z')
-        elif re.search(r'\.tar\.xz$', tarball):
-            opts.append('-J')
-        elif re.search(r'\.txz$', tarball):
-            opts.append('-J')
-        elif re.search(r'\.tbz$', tarball):
-            opts.append('-j')
-        elif re.search(r'\.tar$', tarball):
-            pass
+        for suffix, opt, program in _formats:
+            if re.search(suffix, tarball):
+                if parallel:
+                    opts.append('--use-compress-program="{}"'.format(
+                        program))
+                else:
+                    opts.append(opt)
+                break
         else:
-            logging.warning('File type not recognized, trying anyway...')
+            if not re.search(r'\.tar$', tarball):
+                logging.warning('File type not recognized, trying anyway...')
 
         if args:
             opts.extend(args)
 
-        if directory:
+        if directory and not stream:
             return 'mkdir -p {0} && tar {1}'.format(directory, ' '.join(opts))
         else:
             return 'tar {}'.format(' '.join(opts))
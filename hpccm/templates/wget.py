@@ -20,9 +20,17 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 from __future__ import print_function
 
+import hashlib
 import logging # pylint: disable=unused-import
+import posixpath
+
+from six.moves import shlex_quote
 
 import hpccm.base_object
+import hpccm.config
+import hpccm.fetch
+
+from hpccm.common import container_type
 
 class wget(hpccm.base_object):
     """wget template"""
@@ -34,14 +42,134 @@ class wget(hpccm.base_object):
 
         self.wget_opts = kwargs.get('opts', ['-q', '-nc'])
 
+    def cache_path(self, url, cache=None, sha256=None):
+        """Return the location of the download in the source cache.  If
+        a SHA-256 checksum is specified, the cache location is based
+        on the checksum so that identical content downloaded from
+        different URLs is only stored once.  Otherwise the cache
+        location is based on the URL."""
+
+        cache = hpccm.config.get_source_cache(cache)
+
+        if sha256:
+            key = posixpath.join('sha256', sha256)
+        else:
+            key = posixpath.join(
+                'url', hashlib.sha256(url.encode('utf-8')).hexdigest()[:16])
+
+        return posixpath.join(cache, key, posixpath.basename(url))
+
+    def cache_mount(self, cache=None):
+        """Return the Dockerfile RUN argument to mount the source cache
+        used by `cache_step`, or an empty string if the source cache is
+        disabled (Docker specific)."""
+
+        cache = hpccm.config.get_source_cache(cache)
+        if not cache or hpccm.config.g_ctype != container_type.DOCKER:
+            return ''
+
+        return '--mount=type=cache,target={}'.format(cache)
+
+    def cache_step(self, url=None, cache=None, referer=None, sha256=None,
+                   no_check_certificate=False):
+        """Generate the command line string to download a file into the
+        source cache, unless a valid copy is already present."""
+
+        if not url:
+            logging.error('url is not defined')
+            return ''
+
+        hpccm.fetch.record_url(url, sha256=sha256)
+
+        cached = self.cache_path(url, cache=cache, sha256=sha256)
+
+        # The cached file is replaced atomically so that concurrent
+        # builds sharing the cache never see a partial download.
+        # '-nc' conflicts with downloading to a temporary file.
+        opts = [x for x in self.wget_opts if x != '-nc']
+        if no_check_certificate is True:
+            opts.append('--no-check-certificate')
+        if referer:
+            opts.append('--referer {}'.format(referer))
+
+        fetch = ['t=$(mktemp {}.XXXXXX)'.format(cached),
+                 'wget {0} -O $t {1}'.format(' '.join(opts), url)]
+        if sha256:
+            fetch.append('echo "{0}  $t" | sha256sum -c -'.format(sha256))
+            valid = 'echo "{0}  {1}" | sha256sum -c --status'.format(
+                sha256, cached)
+        else:
+            valid = '[ -s {} ]'.format(cached)
+        fetch.append('mv $t {}'.format(cached))
+
+        # Add annotation if the caller inherits from the annotate template
+        if callable(getattr(self, 'add_annotation', None)):
+            self.add_annotation('url', url)
+
+        return 'mkdir -p {0} && if ! {1}; then {2}; fi'.format(
+            posixpath.dirname(cached), valid, ' && '.join(fetch))
+
+    def stream_step(self, url=None, command=None, referer=None, sha256=None,
+                    no_check_certificate=False):
+        """Generate the command line string to download a file and pipe
+        it into a command, e.g., to unpack it, without writing the file
+        to disk.  If a SHA-256 checksum is specified, the download is
+        verified as it is piped into the command.  The pipeline is run
+        by bash so that it fails if any part of it fails."""
+
+        if not url:
+            logging.error('url is not defined')
+            return ''
+
+        hpccm.fetch.record_url(url, sha256=sha256)
+
+        # '-nc' conflicts with writing to standard output
+        opts = [x for x in self.wget_opts if x != '-nc']
+        if no_check_certificate is True:
+            opts.append('--no-check-certificate')
+        if referer:
+            opts.append('--referer {}'.format(referer))
+
+        download = 'wget {0} -O - {1}'.format(' '.join(opts), url)
+        if sha256:
+            # The download is copied to file descriptor 3, which is
+            # connected to sha256sum
+            pipeline = ('{{ {0} | tee /dev/fd/3 | {1}; }} 3>&1 | '
+                        'sha256sum -c <(echo "{2}  -")'.format(
+                            download, command, sha256))
+        else:
+            pipeline = '{0} | {1}'.format(download, command)
+
+        # Add annotation if the caller inherits from the annotate template
+        if callable(getattr(self, 'add_annotation', None)):
+            self.add_annotation('url', url)
+
+        return 'bash -o pipefail -c {}'.format(shlex_quote(pipeline))
+
     def download_step(self, outfile=None, referer=None, url=None,
-                      directory='/tmp', no_check_certificate=False):
+                      directory='/tmp', no_check_certificate=False,
+                      cache=None, sha256=None):
         """Generate wget command line string"""
 
         if not url:
             logging.error('url is not defined')
             return ''
 
+        # Use the source cache if enabled, and then copy the file from
+        # the cache to the expected location
+        cache = hpccm.config.get_source_cache(cache)
+        if cache:
+            dest = outfile if outfile else posixpath.join(
+                directory, posixpath.basename(url))
+            return '{0} && mkdir -p {1} && cp {2} {3}'.format(
+                self.cache_step(url=url, cache=cache, referer=referer,
+                                sha256=sha256,
+                                no_check_certificate=no_check_certificate),
+                directory,
+                self.cache_path(url, cache=cache, sha256=sha256), dest)
+
+        hpccm.fetch.record_url(url, sha256=sha256)
+
         # Copy so not to modify the member variable
         opts = self.wget_opts
 
@@ -61,5 +189,13 @@ class wget(hpccm.base_object):
             self.add_annotation('url', url)
 
         # Ensure the directory exists
-        return 'mkdir -p {1} && wget {0} -P {1} {2}'.format(opt_string,
-                                                            directory, url)
+        cmd = 'mkdir -p {1} && wget {0} -P {1} {2}'.format(opt_string,
+                                                           directory, url)
+
+        # Verify the download
+        if sha256:
+            cmd += ' && echo "{0}  {1}" | sha256sum -c -'.format(
+                sha256, outfile if outfile else posixpath.join(
+                    directory, posixpath.basename(url)))
+
+        return cmd
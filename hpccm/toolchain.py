@@ -20,10 +20,60 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 from __future__ import print_function
 
+import logging # pylint: disable=unused-import
+import posixpath
+import re
+
+import hpccm.config
+
+# Compiler family, as recognized by archspec, of each compiler
+# command.  Any other compiler, e.g., gcc or an MPI compiler wrapper,
+# is assumed to be GNU.
+_families = [(re.compile(r'(nvc|nvc\+\+|nvfortran|pgcc|pgc\+\+|pgfortran)$'),
+              'nvhpc'),
+             (re.compile(r'(icx|icpx|ifx)$'), 'oneapi'),
+             (re.compile(r'(icc|icpc|ifort)$'), 'intel'),
+             (re.compile(r'(arm|)(clang|clang\+\+|flang|flang-new)(-[\d.]+)?$'),
+              'clang')]
+
+# Compiler flags of the link time and profile guided optimization
+# profiles for each compiler family.  `{0}` is replaced by the
+# profile directory.  GCC LTO objects also contain regular object
+# code so that static libraries created with plain `ar` work.
+_profile_flags = {
+    'lto': {'clang': ['-flto'],
+            'gcc': ['-flto', '-ffat-lto-objects'],
+            'intel': ['-ipo'],
+            'oneapi': ['-flto']},
+    'pgo-generate': {'clang': ['-fprofile-generate={0}'],
+                     'gcc': ['-fprofile-generate={0}'],
+                     'intel': ['-prof-gen', '-prof-dir={0}'],
+                     'oneapi': ['-fprofile-generate={0}']},
+    'pgo-use': {'clang': ['-fprofile-use={0}'],
+                'gcc': ['-fprofile-use={0}', '-fprofile-correction',
+                        '-Wno-missing-profile'],
+                'intel': ['-prof-use', '-prof-dir={0}'],
+                'oneapi': ['-fprofile-use={0}']}}
+
+def _family(compiler):
+    """Return the compiler family of a compiler command"""
+    if compiler:
+        name = posixpath.basename(compiler.split()[0])
+        for regex, family in _families:
+            if regex.match(name):
+                return family
+    return 'gcc'
+
 class toolchain(object):
     """Class for the build toolchain.  Attributes map to the commonly used
        environment variables, e.g, CC is the C compiler, CXX is the
-       C++ compiler."""
+       C++ compiler.
+
+       The `optimization` attribute selects optimization profiles,
+       see `hpccm.config.set_optimization`, and `pgo_directory` is
+       the location of the profile guided optimization data.  They
+       are not environment variables and are only applied by
+       `optimized()`."""
 
     __attrs__ = ['CC', 'CFLAGS', 'CPPFLAGS', 'CUDA_HOME', 'CXX',
                  'CXXFLAGS', 'F77', 'F90', 'FC', 'FCFLAGS', 'FFLAGS',
@@ -48,6 +98,9 @@ class toolchain(object):
         self.LD_LIBRARY_PATH = kwargs.get('LD_LIBRARY_PATH')
         self.LIBS = kwargs.get('LIBS')
 
+        self.optimization = kwargs.get('optimization')
+        self.pgo_directory = kwargs.get('pgo_directory', '/var/tmp/pgo')
+
     def __copy__(self):
         """Copy all the attributes even if __dict__ only returns the pairs
            with non-null values."""
@@ -56,6 +109,8 @@ class toolchain(object):
         for key in self.__attrs__:
           val = getattr(self, key)
           setattr(result, key, val if val else None)
+        result.optimization = self.optimization
+        result.pgo_directory = self.pgo_directory
         return result
 
     def __deepcopy__(self, memo):
@@ -71,3 +126,57 @@ class toolchain(object):
            enables usage like 'environment(variables=var(toolchain))'"""
         return {key: getattr(self, key) for key in self.__attrs__
                 if getattr(self, key)}
+
+    def optimized(self):
+        """Return a copy of the toolchain with the compiler flags of the
+           optimization profiles merged into CFLAGS, CXXFLAGS, FCFLAGS,
+           FFLAGS, and LDFLAGS.  The flags correspond to the compiler
+           family of CC, CXX, and FC respectively, or GNU if not set.
+           Flags that are already present are not added again.  Since
+           setting the flags overrides the default optimization level
+           of autotools, `-O2` is added to compiler flags that were
+           not set.  The toolchain itself is returned if no
+           optimization profile is selected."""
+
+        profiles = hpccm.config.get_optimization(self.optimization)
+        if not profiles:
+            return self
+
+        unsupported = set()
+
+        def _flags(family, linker=False):
+            flags = []
+            for profile in profiles:
+                if profile == 'native-target':
+                    if not linker:
+                        target = hpccm.config.get_cpu_optimization_flags(
+                            family)
+                        if target:
+                            flags.extend(target.split())
+                elif family in _profile_flags[profile]:
+                    flags.extend(f.format(self.pgo_directory)
+                                 for f in _profile_flags[profile][family])
+                else:
+                    unsupported.add((profile, family))
+            return flags
+
+        def _merge(value, flags, default=''):
+            merged = value.split() if value else default.split()
+            merged.extend(f for f in flags if f not in merged)
+            return ' '.join(merged) or None
+
+        result = self.__copy__()
+        result.CFLAGS = _merge(self.CFLAGS, _flags(_family(self.CC)), '-O2')
+        result.CXXFLAGS = _merge(self.CXXFLAGS, _flags(_family(self.CXX)),
+                                 '-O2')
+        fortran = _flags(_family(self.FC))
+        result.FCFLAGS = _merge(self.FCFLAGS, fortran, '-O2')
+        result.FFLAGS = _merge(self.FFLAGS, fortran, '-O2')
+        result.LDFLAGS = _merge(self.LDFLAGS,
+                                _flags(_family(self.CC), linker=True))
+
+        for profile, family in sorted(unsupported):
+            logging.warning('optimization profile "{0}" is not supported '
+                            'for the {1} compilers'.format(profile, family))
+
+        return result
@@ -0,0 +1,368 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name
+
+"""Verification of git remote repositories
+
+The `git` template verifies that a repository and branch exist when
+the `verify` parameter is specified.  While a recipe is evaluated by
+`hpccm.recipe`, the verification requests are collected by a
+`verifier` and resolved concurrently after the recipe is evaluated.
+Otherwise, each request is resolved when it is made.
+
+If enabled with `hpccm.config.set_git_verify_cache`, the commit each
+repository and branch resolves to is recorded in a `cache` file, so
+that later renders do not access the network until the result
+expires.
+
+# Examples
+
+```python
+with hpccm.verify.deferred():
+    git().clone_step(repository='https://github.com/NVIDIA/hpc-container-maker.git',
+                     branch='master', verify='fatal')
+```
+
+"""
+
+from __future__ import absolute_import
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import contextlib
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+
+import hpccm.config
+
+# The verifier currently collecting requests in this context
+_active = hpccm.config._ContextVar('hpccm_verify', default=None) # pylint: disable=protected-access
+
+class cache(object):
+    """On-disk cache of the commits git repositories and branches
+    resolve to
+
+    # Arguments
+
+    path: The cache file.
+
+    ttl: The number of seconds a result is valid.  If None, results
+    do not expire.  The default is 3600.
+
+    """
+
+    def __init__(self, path, ttl=3600):
+        """Initialize cache"""
+
+        self.path = path
+        self.ttl = ttl
+
+        self.__entries = None
+        self.__lock = threading.Lock()
+        self.__updates = {}
+
+    @staticmethod
+    def __key(repository, branch):
+        return '{0} {1}'.format(repository, branch or '')
+
+    def __read(self):
+        """Return the entries of the cache file"""
+
+        try:
+            with open(self.path) as f:
+                return json.load(f).get('entries', {})
+        except (IOError, OSError, ValueError, AttributeError):
+            return {}
+
+    def get(self, repository, branch=None):
+        """Return the commit the repository and branch resolved to, or
+        None if there is no valid result in the cache"""
+
+        with self.__lock:
+            if self.__entries is None:
+                self.__entries = self.__read()
+            entry = self.__entries.get(self.__key(repository, branch))
+
+        if not isinstance(entry, dict):
+            return None
+        if self.ttl is not None and time.time() - entry.get('time', 0) > self.ttl:
+            return None
+        return entry.get('sha', '')
+
+    def put(self, repository, branch, sha):
+        """Record the commit the repository and branch resolved to"""
+
+        entry = {'sha': sha or '', 'time': time.time()}
+        with self.__lock:
+            if self.__entries is None:
+                self.__entries = self.__read()
+            key = self.__key(repository, branch)
+            self.__entries[key] = entry
+            self.__updates[key] = entry
+
+    def save(self):
+        """Write the results recorded since the last save to the cache
+        file, keeping the results recorded concurrently by other
+        processes"""
+
+        with self.__lock:
+            if not self.__updates:
+                return
+
+            entries = self.__read()
+            entries.update(self.__updates)
+
+            try:
+                directory = os.path.dirname(self.path)
+                if directory and not os.path.isdir(directory):
+                    os.makedirs(directory)
+                tmp = '{0}.{1}'.format(self.path, os.getpid())
+                with open(tmp, 'w') as f:
+                    json.dump({'version': 1, 'entries': entries}, f,
+                              indent=2, sort_keys=True)
+                os.rename(tmp, self.path)
+            except (IOError, OSError) as e:
+                logging.warning('unable to write git verification cache '
+                                '{0}: {1}'.format(self.path, e))
+
+            self.__entries = entries
+            self.__updates = {}
+
+def _default_cache():
+    """Return the cache selected by the global settings, if any"""
+
+    path = hpccm.config.get_git_verify_cache()
+    if not path:
+        return None
+    return cache(path, ttl=hpccm.config.g_git_verify_ttl)
+
+def ls_remote(repository, branch=None):
+    """Return a tuple of the commit the repository and branch resolve
+    to and an error message if the repository or branch does not
+    exist
+
+    If no branch is specified, the repository must have at least one
+    branch and the commit is the one of the default branch.  The
+    branch may also be a tag.
+
+    """
+
+    cmd = ['git', 'ls-remote', '--exit-code', repository]
+
+    # Never prompt for credentials
+    env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+
+    try:
+        p = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE)
+        stdout, stderr = p.communicate()
+        returncode = p.returncode
+    except OSError as e:
+        stdout, stderr, returncode = b'', str(e).encode('utf-8'), -1
+
+    stdout = stdout.decode('utf-8', 'replace')
+    stderr = stderr.decode('utf-8', 'replace')
+
+    refs = {}
+    if returncode == 0:
+        for line in stdout.splitlines():
+            fields = line.split()
+            if len(fields) == 2:
+                refs[fields[1]] = fields[0]
+
+    sha = None
+    if branch is None:
+        if any(ref.startswith('refs/heads/') for ref in refs):
+            sha = refs.get('HEAD', '')
+    else:
+        # The commit an annotated tag points to is listed separately
+        for ref in ['refs/heads/{}', 'refs/tags/{}^{{}}', 'refs/tags/{}',
+                    '{}']:
+            if ref.format(branch) in refs:
+                sha = refs[ref.format(branch)]
+                break
+
+    if sha is None:
+        return (None,
+                'git repository "{}" or branch "{}" do not exist\n  cmd: "{}"\n  stdout: "{}"\n  stderr: "{}"'.format(
+                    repository, branch, ' '.join(cmd), stdout, stderr))
+
+    return (sha, None)
+
+def resolve(repository, branch=None, c=None):
+    """Return a tuple of the commit the repository and branch resolve
+    to and an error message if the repository or branch does not
+    exist, using the cache `c`, if any"""
+
+    if c is not None:
+        sha = c.get(repository, branch)
+        if sha is not None:
+            return (sha, None)
+
+    sha, error = ls_remote(repository, branch)
+    if c is not None and error is None:
+        c.put(repository, branch, sha)
+    return (sha, error)
+
+class verifier(object):
+    """Collection of git verification requests that are resolved
+    concurrently
+
+    # Arguments
+
+    c: The cache, or None to disable the cache.  The default, True,
+    selects the cache of the global settings, see
+    `hpccm.config.set_git_verify_cache`.
+
+    jobs: The number of concurrent requests.  The default value is 8.
+
+    """
+
+    def __init__(self, c=True, jobs=8):
+        """Initialize verifier"""
+
+        self.cache = _default_cache() if c is True else c
+        self.jobs = jobs
+
+        # List of (repository, branch, fatal) tuples
+        self.requests = []
+
+    def add(self, repository, branch=None, fatal=False):
+        """Add a verification request"""
+
+        self.requests.append((repository, branch, fatal))
+
+    def run(self):
+        """Resolve the verification requests.  Errors of requests that
+        are not fatal are logged as warnings.
+
+        Returns a dictionary of the resolved commits by repository and
+        branch.
+
+        # Raises
+
+        RuntimeError: a fatal request failed
+
+        """
+
+        from multiprocessing.pool import ThreadPool
+
+        # Resolve each repository and branch once, and fail if any of
+        # its requests is fatal
+        unique = []
+        fatal = {}
+        for repository, branch, f in self.requests:
+            item = (repository, branch)
+            if item not in fatal:
+                unique.append(item)
+            fatal[item] = fatal.get(item, False) or f
+        self.requests = []
+
+        def _resolve(item):
+            return resolve(item[0], branch=item[1], c=self.cache)
+
+        if len(unique) > 1:
+            pool = ThreadPool(max(1, min(self.jobs, len(unique))))
+            try:
+                results = pool.map(_resolve, unique)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [_resolve(item) for item in unique]
+
+        if self.cache is not None:
+            self.cache.save()
+
+        errors = []
+        for item, (_, error) in zip(unique, results):
+            if error is None:
+                continue
+            if fatal[item]:
+                errors.append(error)
+            else:
+                logging.warning(error)
+
+        if errors:
+            raise RuntimeError('\n'.join(errors))
+
+        return dict((item, sha) for item, (sha, _) in zip(unique, results))
+
+@contextlib.contextmanager
+def deferred(v=None, run=True):
+    """Context manager to collect the git verification requests made
+    in the current context and resolve them concurrently when the
+    context exits without an exception
+
+    # Arguments
+
+    v: The verifier to collect the requests into.  If None, a new
+    verifier is created.  The verifier is returned by the context
+    manager.
+
+    run: If False, the requests are not resolved when the context
+    exits, and the caller should call the `run` method of the
+    verifier.  The default is True.
+
+    # Raises
+
+    RuntimeError: a fatal request failed
+
+    """
+
+    if v is None:
+        v = verifier()
+
+    token = _active.set(v)
+    try:
+        yield v
+    finally:
+        _active.reset(token)
+    if run:
+        v.run()
+
+def request(repository, branch=None, fatal=False):
+    """Verify that a git repository and branch exist.  If a verifier
+    is collecting requests in the current context, the request is
+    added to it.  Otherwise the request is resolved immediately.
+
+    # Arguments
+
+    repository: The git repository.
+
+    branch: The branch or tag.  If None, the repository must have at
+    least one branch.
+
+    fatal: If True, raise an exception if the repository or branch
+    does not exist.  Otherwise log a warning.  The default is False.
+
+    # Raises
+
+    RuntimeError: the repository or branch does not exist and `fatal`
+    is True
+
+    """
+
+    v = _active.get()
+    if v is None:
+        v = verifier()
+        v.add(repository, branch=branch, fatal=fatal)
+        v.run()
+    else:
+        v.add(repository, branch=branch, fatal=fatal)
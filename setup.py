@@ -38,9 +38,13 @@ setup(
       "Programming Language :: Python :: 3.5",
       "Programming Language :: Python :: 3.6"
     ],
-    # Make hpccm.cli.main available from the command line as `hpccm`.
+    # Make hpccm.cli.main available from the command line as `hpccm`,
+    # hpccm.fetch.main as `hpccm-fetch`, and hpccm.buildstats.main as
+    # `hpccm-buildstats`.
     install_requires=['archspec', "enum34; python_version < '3.4'", 
                       'packaging', 'six'],
     entry_points={
         'console_scripts': [
-            'hpccm=hpccm.cli:main']})
+            'hpccm=hpccm.cli:main',
+            'hpccm-buildstats=hpccm.buildstats:main',
+            'hpccm-fetch=hpccm.fetch:main']})
@@ -22,6 +22,10 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
+from helpers import centos, centos8, docker, x86_64
+
 from hpccm.templates.CMakeBuild import CMakeBuild
 from hpccm.toolchain import toolchain
 
@@ -113,3 +117,93 @@ class Test_CMakeBuild(unittest.TestCase):
         configure = cm.configure_step(directory='/tmp/src')
         self.assertEqual(configure,
                          'mkdir -p /tmp/src/build && cd /tmp/src/build && cmake -DWITH_BAR=ON /tmp/src')
+
+    @centos
+    @x86_64
+    def test_compiler_cache(self):
+        """Compiler cache as the compiler launcher"""
+        cm = CMakeBuild(compiler_cache='ccache')
+
+        configure = cm.configure_step(directory='/tmp/src',
+                                      toolchain=toolchain(CC='gcc'))
+        self.assertEqual(configure, 'export CCACHE_DIR=/var/cache/hpccm/ccache && export PATH=/usr/lib/ccache:/usr/lib64/ccache:$PATH && ccache -z && mkdir -p /tmp/src/build && cd /tmp/src/build && CC=gcc cmake -DCMAKE_INSTALL_PREFIX=/usr/local -DCMAKE_C_COMPILER_LAUNCHER=ccache -DCMAKE_CXX_COMPILER_LAUNCHER=ccache -DCMAKE_CUDA_COMPILER_LAUNCHER=ccache -DCMAKE_Fortran_COMPILER_LAUNCHER=ccache /tmp/src')
+
+        build = cm.build_step()
+        self.assertEqual(build, 'cmake --build /tmp/src/build --target all -- -j$(nproc) && ccache -s')
+
+        # Statistics are only reported once
+        install = cm.build_step(target='install')
+        self.assertEqual(install, 'cmake --build /tmp/src/build --target install -- -j$(nproc)')
+
+    def test_compiler_cache_invalid(self):
+        """Invalid compiler cache"""
+        cm = CMakeBuild(compiler_cache='distcc')
+        with self.assertRaises(RuntimeError):
+            cm.configure_step(directory='/tmp/src')
+
+    def test_generator(self):
+        """CMake generator"""
+        cm = CMakeBuild(generator='Unix Makefiles', parallel=4)
+
+        configure = cm.configure_step(directory='/tmp/src')
+        self.assertEqual(configure, "mkdir -p /tmp/src/build && cd /tmp/src/build && cmake -G 'Unix Makefiles' -DCMAKE_INSTALL_PREFIX=/usr/local /tmp/src")
+
+        build = cm.build_step()
+        self.assertEqual(build, 'cmake --build /tmp/src/build --target all --parallel 4')
+
+        self.assertEqual(cm.cmake_generator_ospackages(), [])
+        self.assertEqual(CMakeBuild(generator='Ninja').cmake_generator_ospackages(), ['ninja-build'])
+
+    @centos8
+    @docker
+    def test_generator_packages(self):
+        """CMake generator build tool packages"""
+        self.assertEqual(CMakeBuild().cmake_generator_packages(), None)
+
+        p = CMakeBuild(generator='Ninja').cmake_generator_packages()
+        self.assertEqual(str(p),
+r'''RUN yum install -y dnf-utils && \
+    yum-config-manager --set-enabled powertools && \
+    yum install -y \
+        ninja-build && \
+    rm -rf /var/cache/yum/*''')
+
+    def test_generator_global(self):
+        """Global CMake generator"""
+        hpccm.config.set_cmake_generator('Ninja')
+        try:
+            cm = CMakeBuild()
+            configure = cm.configure_step(directory='/tmp/src')
+            self.assertEqual(configure, 'mkdir -p /tmp/src/build && cd /tmp/src/build && cmake -G Ninja -DCMAKE_INSTALL_PREFIX=/usr/local /tmp/src')
+
+            # Explicitly select the default generator
+            cm = CMakeBuild(generator=False)
+            configure = cm.configure_step(directory='/tmp/src')
+            self.assertEqual(configure, 'mkdir -p /tmp/src/build && cd /tmp/src/build && cmake -DCMAKE_INSTALL_PREFIX=/usr/local /tmp/src')
+            self.assertEqual(cm.build_step(), 'cmake --build /tmp/src/build --target all -- -j$(nproc)')
+        finally:
+            hpccm.config.set_cmake_generator(None)
+
+    def test_cuda_arch(self):
+        """CUDA GPU architectures"""
+        cm = CMakeBuild(cuda_arch=['sm_80', '9.0'])
+        configure = cm.configure_step(directory='/tmp/src')
+        self.assertEqual(configure, 'mkdir -p /tmp/src/build && cd /tmp/src/build && cmake -DCMAKE_INSTALL_PREFIX=/usr/local -DCMAKE_CUDA_ARCHITECTURES="80;90" /tmp/src')
+
+        # Explicitly specified
+        configure = cm.configure_step(directory='/tmp/src', opts=['-DCMAKE_CUDA_ARCHITECTURES=native'])
+        self.assertEqual(configure, 'mkdir -p /tmp/src/build && cd /tmp/src/build && cmake -DCMAKE_INSTALL_PREFIX=/usr/local -DCMAKE_CUDA_ARCHITECTURES=native /tmp/src')
+
+    def test_cuda_arch_global(self):
+        """Global CUDA GPU architectures"""
+        hpccm.config.set_cuda_arch('90')
+        try:
+            cm = CMakeBuild()
+            configure = cm.configure_step(directory='/tmp/src')
+            self.assertEqual(configure, 'mkdir -p /tmp/src/build && cd /tmp/src/build && cmake -DCMAKE_INSTALL_PREFIX=/usr/local -DCMAKE_CUDA_ARCHITECTURES="90" /tmp/src')
+
+            cm = CMakeBuild(cuda_arch=False)
+            configure = cm.configure_step(directory='/tmp/src')
+            self.assertEqual(configure, 'mkdir -p /tmp/src/build && cd /tmp/src/build && cmake -DCMAKE_INSTALL_PREFIX=/usr/local /tmp/src')
+        finally:
+            hpccm.config.set_cuda_arch(None)
@@ -22,6 +22,10 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
+from helpers import centos, icelake, ubuntu, x86_64
+
 from hpccm.templates.ConfigureMake import ConfigureMake
 from hpccm.toolchain import toolchain
 
@@ -95,6 +99,45 @@ class Test_ConfigureMake(unittest.TestCase):
         build = cm.build_step()
         self.assertEqual(build, 'make -j7')
 
+    def test_parallel_auto(self):
+        """Parallel count computed at build time"""
+        cm = ConfigureMake(parallel='auto', parallel_memory=2)
+
+        build = cm.build_step()
+        self.assertTrue(build.startswith(
+            "make -j$(awk -v n=$(nproc) -v m=2097152 'function r(f,  l)"))
+        self.assertIn('/sys/fs/cgroup/cpu.max', build)
+        self.assertIn('/sys/fs/cgroup/memory.max', build)
+
+        # Function arguments override constructor
+        build = cm.build_step(parallel=11)
+        self.assertEqual(build, 'make -j11')
+
+    def test_parallel_global(self):
+        """Global parallel count"""
+        hpccm.config.set_parallel('8')
+        try:
+            cm = ConfigureMake()
+            self.assertEqual(cm.build_step(), 'make -j8')
+            self.assertEqual(cm.install_step(), 'make -j8 install')
+
+            cm = ConfigureMake(parallel=2)
+            self.assertEqual(cm.check_step(), 'make -j2 check')
+        finally:
+            hpccm.config.set_parallel('$(nproc)')
+
+    @icelake
+    def test_optimization(self):
+        """Toolchain optimization profiles"""
+        hpccm.config.set_optimization('native-target')
+        try:
+            cm = ConfigureMake()
+            configure = cm.configure_step()
+            self.assertEqual(configure,
+                             'CFLAGS=\'-O2 -march=icelake-client -mtune=icelake-client\' CXXFLAGS=\'-O2 -march=icelake-client -mtune=icelake-client\' FCFLAGS=\'-O2 -march=icelake-client -mtune=icelake-client\' FFLAGS=\'-O2 -march=icelake-client -mtune=icelake-client\' ./configure --prefix=/usr/local')
+        finally:
+            hpccm.config.set_optimization(None)
+
     def test_prefix(self):
         """Prefix specified"""
         cm = ConfigureMake(prefix='/my/prefix')
@@ -135,3 +178,62 @@ class Test_ConfigureMake(unittest.TestCase):
         ex_configure = cm.configure_step(environment=env,
                                          export_environment=True, toolchain=tc)
         self.assertEqual(ex_configure, 'export OMPI_CC=mycc OMPI_CXX=mycxx OMPI_FC=myfc CC=mpicc CXX=mpicxx FC=mpifc && ./configure --prefix=/usr/local')
+
+    @ubuntu
+    def test_compiler_cache_ccache(self):
+        """ccache compiler cache"""
+        cm = ConfigureMake(compiler_cache=True)
+
+        tc = toolchain(CC='mpicc', FC='gfortran')
+
+        configure = cm.configure_step(toolchain=tc)
+        self.assertEqual(configure, "export CCACHE_DIR=/var/cache/hpccm/ccache && export PATH=/usr/lib/ccache:/usr/lib64/ccache:$PATH && ccache -z && CC=mpicc FC=gfortran ./configure --prefix=/usr/local")
+
+        build = cm.build_step()
+        self.assertEqual(build, 'make -j$(nproc) && ccache -s')
+
+        install = cm.install_step()
+        self.assertEqual(install, 'make -j$(nproc) install')
+
+    @centos
+    @x86_64
+    def test_compiler_cache_sccache(self):
+        """sccache compiler cache"""
+        cm = ConfigureMake(compiler_cache='sccache')
+
+        # sccache must already be installed
+        configure = cm.configure_step(toolchain=toolchain(CC='gcc'))
+        self.assertEqual(configure, """(command -v sccache >/dev/null 2>&1 || (echo "sccache is not installed" >&2 && exit 1)) && export SCCACHE_DIR=/var/cache/hpccm/sccache && sccache --zero-stats && CC='sccache gcc' ./configure --prefix=/usr/local""")
+
+        build = cm.build_step()
+        self.assertEqual(build, 'make -j$(nproc) && sccache --show-stats')
+
+        # sccache is not an OS package
+        self.assertEqual(cm.compiler_cache_packages(), None)
+
+    @ubuntu
+    def test_compiler_cache_no_wrap(self):
+        """Compiler cache for compiler wrappers"""
+        tc = toolchain(CC='gcc-9')
+
+        cm = ConfigureMake(compiler_cache='ccache', _compiler_cache_wrap=False)
+        self.assertEqual(cm.configure_step(toolchain=tc), 'export CCACHE_DIR=/var/cache/hpccm/ccache && export PATH=/usr/lib/ccache:/usr/lib64/ccache:$PATH && ccache -z && CC=gcc-9 ./configure --prefix=/usr/local')
+
+        cm = ConfigureMake(compiler_cache='sccache', _compiler_cache_wrap=False)
+        self.assertEqual(cm.configure_step(toolchain=tc),
+                         'CC=gcc-9 ./configure --prefix=/usr/local')
+        self.assertEqual(cm.build_step(), 'make -j$(nproc)')
+
+    def test_compiler_cache_global(self):
+        """Global compiler cache setting"""
+        hpccm.config.set_compiler_cache('ccache')
+        try:
+            cm = ConfigureMake()
+            self.assertEqual(cm.build_step(), 'make -j$(nproc) && ccache -s')
+
+            cm = ConfigureMake(compiler_cache=False)
+            self.assertEqual(cm.build_step(), 'make -j$(nproc)')
+            self.assertEqual(cm.configure_step(),
+                             './configure --prefix=/usr/local')
+        finally:
+            hpccm.config.set_compiler_cache(None)
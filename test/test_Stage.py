@@ -187,3 +187,32 @@ r'''# Boost
     export LD_LIBRARY_PATH=/usr/local/boost/lib:$LD_LIBRARY_PATH
 %post
     export LD_LIBRARY_PATH=/usr/local/boost/lib:$LD_LIBRARY_PATH''')
+
+    @centos
+    @docker
+    def test_runtime_repeated(self):
+        """Runtime instructions are not duplicated by repeated calls"""
+        s0 = Stage()
+        s0 += gnu()
+        rt = s0.runtime()
+        self.assertEqual(s0.runtime(), rt)
+        self.assertEqual(rt.count('GNU compiler runtime'), 1)
+
+    @docker
+    def test_str_cache(self):
+        """Rendered string reflects added layers"""
+        s = Stage()
+        s += shell(commands=['echo a'])
+        self.assertEqual(str(s), 'RUN echo a')
+        s += shell(commands=['echo b'])
+        self.assertEqual(str(s), 'RUN echo a\n\nRUN echo b')
+
+    @docker
+    def test_str_mutated(self):
+        """Rendered string reflects changes to primitives"""
+        s = Stage()
+        sh = shell(commands=['a'])
+        s += sh
+        self.assertEqual(str(s), 'RUN a')
+        sh.commands.append('b')
+        self.assertEqual(str(s), 'RUN a && \\\n    b')
@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import centos, docker, ubuntu
 
 from hpccm.building_blocks.amgx import amgx
@@ -113,3 +115,15 @@ RUN mkdir -p /var/tmp && cd /var/tmp && git clone --depth=1 --branch master http
 ENV CPATH=/usr/local/amgx/include:$CPATH \
     LD_LIBRARY_PATH=/usr/local/amgx/lib:$LD_LIBRARY_PATH \
     LIBRARY_PATH=/usr/local/amgx/lib:$LIBRARY_PATH''')
+
+    @ubuntu
+    @docker
+    def test_cuda_arch(self):
+        """Global CUDA GPU architectures"""
+        hpccm.config.set_cuda_arch(['80', '90'])
+        try:
+            s = str(amgx())
+            self.assertIn('-DCUDA_ARCH="80;90"', s)
+            self.assertIn('-DCMAKE_CUDA_ARCHITECTURES="80;90"', s)
+        finally:
+            hpccm.config.set_cuda_arch(None)
@@ -22,7 +22,7 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
-from helpers import docker, ubuntu
+from helpers import docker, singularity, ubuntu
 
 from hpccm.building_blocks.apt_get import apt_get
 
@@ -89,3 +89,28 @@ r'''RUN apt-get update -y && \
     find /var/tmp/apt_get_download -regextype posix-extended -type f -regex "/var/tmp/apt_get_download/(libibverbs1).*deb" -exec dpkg --extract {} /usr/local/ofed \; && \
     rm -rf /var/tmp/apt_get_download && \
     rm -rf /var/lib/apt/lists/*''')
+
+    @ubuntu
+    @docker
+    def test_cache(self):
+        """Package cache"""
+        a = apt_get(cache=True, ospackages=['gcc', 'make'])
+        self.assertEqual(str(a),
+r'''RUN --mount=type=cache,target=/var/cache/apt,sharing=locked --mount=type=cache,target=/var/lib/apt,sharing=locked rm -f /etc/apt/apt.conf.d/docker-clean && \
+    echo 'Binary::apt::APT::Keep-Downloaded-Packages "true";' > /etc/apt/apt.conf.d/keep-cache && \
+    apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        gcc \
+        make''')
+
+    @ubuntu
+    @singularity
+    def test_cache_singularity(self):
+        """Package cache is ignored for Singularity"""
+        a = apt_get(cache=True, ospackages=['gcc'])
+        self.assertEqual(str(a),
+r'''%post
+    apt-get update -y
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        gcc
+    rm -rf /var/lib/apt/lists/*''')
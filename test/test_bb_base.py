@@ -24,7 +24,10 @@ import unittest
 
 from helpers import centos, docker, ubuntu
 
-from hpccm.building_blocks.base import bb_base
+import hpccm.config
+
+from hpccm.common import container_type
+from hpccm.building_blocks.base import bb_base, render_pass
 from hpccm.primitives import shell
 
 class Test_bb_base(unittest.TestCase):
@@ -88,3 +91,50 @@ class Test_bb_base(unittest.TestCase):
         b.rt += shell(commands=['echo r2'])
         self.assertEqual(len(b.rt), 2)
         self.assertEqual(str(b.rt), 'RUN echo r1\nRUN echo r2')
+
+    @ubuntu
+    @docker
+    def test_render_pass(self):
+        """Building blocks are rendered once per render pass"""
+
+        calls = []
+        class counting_shell(shell):
+            def __str__(self):
+                calls.append(self)
+                return super(counting_shell, self).__str__()
+
+        child = bb_base()
+        child += counting_shell(commands=['echo a'])
+        b = bb_base()
+        b += child
+
+        with render_pass():
+            self.assertEqual(str(b), 'RUN echo a')
+            self.assertEqual(str(b), 'RUN echo a')
+            self.assertEqual(len(calls), 1)
+
+        # Rendered again outside of a render pass
+        self.assertEqual(str(b), 'RUN echo a')
+        self.assertEqual(len(calls), 2)
+
+    @ubuntu
+    @docker
+    def test_render_mutated(self):
+        """Changes to primitives are rendered"""
+        sh = shell(commands=['echo a'])
+        b = bb_base()
+        b += sh
+        self.assertEqual(str(b), 'RUN echo a')
+        sh.commands.append('echo b')
+        self.assertEqual(str(b), 'RUN echo a && \\\n    echo b')
+
+    @ubuntu
+    @docker
+    def test_render_cache_config(self):
+        """Rendered string follows configuration changes"""
+        b = bb_base()
+        b += shell(commands=['echo a'])
+        self.assertEqual(str(b), 'RUN echo a')
+        with hpccm.config.context(ctype=container_type.SINGULARITY):
+            self.assertEqual(str(b), '%post\n    cd /\n    echo a')
+        self.assertEqual(str(b), 'RUN echo a')
@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import centos, docker, ubuntu
 
 from hpccm.building_blocks.boost import boost
@@ -119,6 +121,32 @@ RUN mkdir -p /var/tmp && wget -q -nc -P /var/tmp https://sourceforge.net/project
     rm -rf /var/tmp/boost_1_57_0.tar.bz2 /var/tmp/boost_1_57_0
 ENV LD_LIBRARY_PATH=/usr/local/boost/lib:$LD_LIBRARY_PATH''')
 
+    @ubuntu
+    @docker
+    def test_source_cache(self):
+        """Source cache mounted for the download"""
+        hpccm.config.set_source_cache('/cache')
+        try:
+            b = boost()
+            self.assertEqual(str(b),
+r'''# Boost version 1.87.0
+RUN apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        bzip2 \
+        libbz2-dev \
+        tar \
+        wget \
+        zlib1g-dev && \
+    rm -rf /var/lib/apt/lists/*
+RUN --mount=type=cache,target=/cache mkdir -p /cache/url/cf7b058069654117 && if ! [ -s /cache/url/cf7b058069654117/boost_1_87_0.tar.bz2 ]; then t=$(mktemp /cache/url/cf7b058069654117/boost_1_87_0.tar.bz2.XXXXXX) && wget -q -O $t https://archives.boost.io/release/1.87.0/source/boost_1_87_0.tar.bz2 && mv $t /cache/url/cf7b058069654117/boost_1_87_0.tar.bz2; fi && mkdir -p /var/tmp && cp /cache/url/cf7b058069654117/boost_1_87_0.tar.bz2 /var/tmp/boost_1_87_0.tar.bz2 && \
+    mkdir -p /var/tmp && tar -x -f /var/tmp/boost_1_87_0.tar.bz2 -C /var/tmp -j && \
+    cd /var/tmp/boost_1_87_0 && ./bootstrap.sh --prefix=/usr/local/boost --without-libraries=python && \
+    ./b2 -j$(nproc) -q install && \
+    rm -rf /var/tmp/boost_1_87_0.tar.bz2 /var/tmp/boost_1_87_0
+ENV LD_LIBRARY_PATH=/usr/local/boost/lib:$LD_LIBRARY_PATH''')
+        finally:
+            hpccm.config.set_source_cache(None)
+
     @ubuntu
     @docker
     def test_ldconfig(self):
@@ -0,0 +1,92 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Test cases for the buildstats module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import logging # pylint: disable=unused-import
+import re
+import subprocess
+import unittest
+
+from hpccm.buildstats import marker, parse, table
+
+class Test_buildstats(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+    def test_marker(self):
+        """The marker command prints the marker"""
+        output = subprocess.check_output(
+            ['sh', '-c', marker('fftw', 'download')]).decode('utf-8')
+        self.assertTrue(re.match(r'^hpccm-mark fftw download \d+\n$', output))
+
+    def test_docker(self):
+        """Docker BuildKit plain progress output"""
+        log = r'''#7 [devel 2/4] RUN printf 'hpccm-mark %s %s %s\n' openmpi download "$(date +%s)" &&     wget -q https://a.com/openmpi.tar.bz2
+#7 0.254 hpccm-mark openmpi download 1000
+#8 [devel-fftw 1/1] RUN printf 'hpccm-mark %s %s %s\n' fftw download "$(date +%s)"
+#8 0.301 hpccm-mark fftw download 1001
+#7 2.517 hpccm-mark openmpi compile 1012
+#8 3.112 hpccm-mark fftw compile 1004
+#7 4.001 checking for gcc... gcc
+#8 60.12 hpccm-mark fftw end 1061
+#7 345.7 hpccm-mark openmpi other 1345
+#7 346.1 hpccm-mark openmpi end 1346
+#7 DONE 346.2s
+#9 [devel 3/4] RUN printf 'hpccm-mark %s %s %s\n' openmpi packages "$(date +%s)"
+#9 0.102 hpccm-mark openmpi packages 1400
+#9 20.31 hpccm-mark openmpi end 1420
+'''
+        stats = parse(log.splitlines())
+        self.assertEqual(stats['openmpi'],
+                         {'count': 2, 'wall': 366, 'download': 12,
+                          'packages': 20, 'compile': 333, 'other': 1})
+        self.assertEqual(stats['fftw'],
+                         {'count': 1, 'wall': 60, 'download': 3,
+                          'packages': 0, 'compile': 57, 'other': 0})
+
+        t = table(stats).splitlines()
+        self.assertEqual(len(t), 4)
+        self.assertTrue(t[1].startswith('openmpi '))
+        self.assertTrue(t[1].endswith(
+            '0:06:06   0:00:12   0:00:20   0:05:33   0:00:01'))
+        self.assertTrue(t[3].startswith('total '))
+
+    def test_singularity(self):
+        """Shell traces are not markers"""
+        log = r'''+ printf 'hpccm-mark %s %s %s\n' gnu packages 2000
+hpccm-mark gnu packages 2000
++ apt-get update -y
++ printf 'hpccm-mark %s %s %s\n' gnu end 2042
+hpccm-mark gnu end 2042
+'''
+        self.assertEqual(parse(log.splitlines()),
+                         {'gnu': {'count': 1, 'wall': 42, 'download': 0,
+                                  'packages': 42, 'compile': 0,
+                                  'other': 0}})
+
+    def test_incomplete(self):
+        """Instructions that did not complete are not included"""
+        log = ['hpccm-mark gnu packages 2000',
+               'hpccm-mark gnu end 2010',
+               'hpccm-mark fftw download 2010',
+               'hpccm-mark fftw compile 2020',
+               'ERROR: failed to solve']
+        self.assertEqual(list(parse(log)), ['gnu'])
@@ -21,6 +21,7 @@ from __future__ import print_function
 
 from packaging.version import Version
 import logging # pylint: disable=unused-import
+import threading
 import unittest
 
 from helpers import bash, broadwell, centos, docker, icelake, singularity, thunderx2, ubuntu, zen2
@@ -266,3 +267,167 @@ class Test_config(unittest.TestCase):
         """Test CPU feature flags"""
         self.assertTrue(hpccm.config.test_cpu_feature_flag('avx2'))
         self.assertFalse(hpccm.config.test_cpu_feature_flag('foo'))
+
+    def test_cmake_generator(self):
+        """Set and get the CMake generator"""
+        self.assertEqual(hpccm.config.get_cmake_generator(), None)
+        self.assertEqual(hpccm.config.get_cmake_generator('Ninja'), 'Ninja')
+
+        hpccm.config.set_cmake_generator()
+        try:
+            self.assertEqual(hpccm.config.get_cmake_generator(), 'Ninja')
+            self.assertEqual(hpccm.config.get_cmake_generator(False), None)
+        finally:
+            hpccm.config.set_cmake_generator(None)
+
+    def test_optimization(self):
+        """Set and get the toolchain optimization profiles"""
+        self.assertEqual(hpccm.config.get_optimization(), [])
+        self.assertEqual(hpccm.config.get_optimization('native-target,lto'),
+                         ['native-target', 'lto'])
+        self.assertEqual(hpccm.config.get_optimization(['pgo-use']),
+                         ['pgo-use'])
+        with self.assertRaises(RuntimeError):
+            hpccm.config.get_optimization('O3')
+        with self.assertRaises(RuntimeError):
+            hpccm.config.get_optimization('pgo-generate,pgo-use')
+
+        hpccm.config.set_optimization('lto')
+        try:
+            self.assertEqual(hpccm.config.get_optimization(), ['lto'])
+            self.assertEqual(hpccm.config.get_optimization(False), [])
+            with self.assertRaises(RuntimeError):
+                hpccm.config.set_optimization('native')
+            self.assertEqual(hpccm.config.get_optimization(), ['lto'])
+        finally:
+            hpccm.config.set_optimization(None)
+
+    def test_cuda_arch(self):
+        """Set and get the CUDA GPU architectures"""
+        self.assertEqual(hpccm.config.get_cuda_arch(), [])
+        self.assertEqual(hpccm.config.get_cuda_arch('9.0,sm_80'),
+                         ['80', '90'])
+        self.assertEqual(hpccm.config.get_cuda_arch(
+            ['compute_90a', 100, '8.6', '86']), ['86', '90a', '100'])
+        with self.assertRaises(RuntimeError):
+            hpccm.config.get_cuda_arch('ampere')
+
+        hpccm.config.set_cuda_arch('80')
+        try:
+            self.assertEqual(hpccm.config.get_cuda_arch(), ['80'])
+            self.assertEqual(hpccm.config.get_cuda_arch(False), [])
+            with self.assertRaises(RuntimeError):
+                hpccm.config.set_cuda_arch('sm80')
+            self.assertEqual(hpccm.config.get_cuda_arch(), ['80'])
+        finally:
+            hpccm.config.set_cuda_arch(None)
+
+    def test_compiler_cache(self):
+        """Set and get the compiler cache"""
+        self.assertEqual(hpccm.config.get_compiler_cache(), None)
+        self.assertEqual(hpccm.config.get_compiler_cache(True), 'ccache')
+        self.assertEqual(hpccm.config.get_compiler_cache('sccache'),
+                         'sccache')
+        with self.assertRaises(RuntimeError):
+            hpccm.config.get_compiler_cache('distcc')
+
+        hpccm.config.set_compiler_cache('sccache')
+        try:
+            self.assertEqual(hpccm.config.get_compiler_cache(), 'sccache')
+            self.assertEqual(hpccm.config.get_compiler_cache(True), 'sccache')
+            self.assertEqual(hpccm.config.get_compiler_cache(False), None)
+        finally:
+            hpccm.config.set_compiler_cache(None)
+
+        with self.assertRaises(RuntimeError):
+            hpccm.config.set_compiler_cache('distcc')
+
+    def test_parallel(self):
+        """Set and get the number of parallel build jobs"""
+        self.assertEqual(hpccm.config.get_parallel(), '$(nproc)')
+        self.assertEqual(hpccm.config.get_parallel(4), 4)
+        self.assertIn('-v m=1048576 ', hpccm.config.get_parallel('auto'))
+        self.assertIn('-v m=3145728 ',
+                      hpccm.config.get_parallel('auto', memory=3))
+
+        hpccm.config.set_parallel('auto', memory=0.5)
+        try:
+            self.assertIn('-v m=524288 ', hpccm.config.get_parallel())
+            self.assertIn('-v m=4194304 ',
+                          hpccm.config.get_parallel(memory=4))
+            self.assertEqual(hpccm.config.get_parallel('$(nproc)'),
+                             '$(nproc)')
+        finally:
+            hpccm.config.set_parallel('$(nproc)', memory=1)
+
+    def test_source_cache(self):
+        """Set and get the source cache"""
+        self.assertEqual(hpccm.config.get_source_cache(), None)
+        self.assertEqual(hpccm.config.get_source_cache(True),
+                         '/var/cache/hpccm/sources')
+        self.assertEqual(hpccm.config.get_source_cache('/foo'), '/foo')
+
+        hpccm.config.set_source_cache('/cache')
+        try:
+            self.assertEqual(hpccm.config.get_source_cache(), '/cache')
+            self.assertEqual(hpccm.config.get_source_cache(True), '/cache')
+            self.assertEqual(hpccm.config.get_source_cache(False), None)
+        finally:
+            hpccm.config.set_source_cache(None)
+
+    @docker
+    @ubuntu
+    def test_context(self):
+        """Context local configuration"""
+        with hpccm.config.context(ctype='singularity',
+                                  linux_distro='centos8', wd='/foo'):
+            self.assertEqual(hpccm.config.g_ctype,
+                             hpccm.container_type.SINGULARITY)
+            self.assertEqual(hpccm.config.g_linux_distro,
+                             hpccm.linux_distro.CENTOS)
+            self.assertEqual(hpccm.config.g_linux_version, Version('8.0'))
+            self.assertEqual(hpccm.config.g_wd, '/foo')
+            self.assertEqual(hpccm.config.get_format(), 'singularity')
+
+            # Changes inside the context are local to the context
+            hpccm.config.set_cpu_architecture('aarch64')
+            with hpccm.config.context(wd='/bar'):
+                self.assertEqual(hpccm.config.get_cpu_architecture(),
+                                 'aarch64')
+                self.assertEqual(hpccm.config.g_wd, '/bar')
+            self.assertEqual(hpccm.config.g_wd, '/foo')
+
+        self.assertEqual(hpccm.config.g_ctype, hpccm.container_type.DOCKER)
+        self.assertEqual(hpccm.config.g_linux_distro,
+                         hpccm.linux_distro.UBUNTU)
+        self.assertEqual(hpccm.config.g_cpu_arch, hpccm.cpu_arch.X86_64)
+        self.assertEqual(hpccm.config.g_wd, '/var/tmp')
+
+    def test_context_invalid(self):
+        """Unrecognized context variable"""
+        with self.assertRaises(RuntimeError):
+            with hpccm.config.context(foo='bar'):
+                pass
+
+    @docker
+    def test_context_threads(self):
+        """Contexts are isolated between threads"""
+        barrier = threading.Event()
+        results = {}
+
+        def worker(fmt):
+            with hpccm.config.context(ctype=fmt):
+                barrier.wait()
+                results[fmt] = hpccm.config.get_format()
+
+        threads = [threading.Thread(target=worker, args=(f,))
+                   for f in ['bash', 'singularity']]
+        for t in threads:
+            t.start()
+        barrier.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, {'bash': 'bash',
+                                   'singularity': 'singularity'})
+        self.assertEqual(hpccm.config.get_format(), 'docker')
@@ -121,6 +121,80 @@ r'''mkdir -p /var/tmp && cd /var/tmp && git clone --depth=1 --branch dev --recur
 r'''mkdir -p /tmp/git && cd /tmp/git && git clone  https://github.com/foo/bar bar && cd - && cd /tmp/git/bar && git checkout deadbeef && cd -''')
         self.assertEqual(d.src_directory, '/tmp/git/bar')
 
+    @docker
+    def test_source_cache(self):
+        """Download into the source cache"""
+        d = downloader(source_cache='/cache', sha256='abc123',
+                       url='http://mysite.com/foo.tgz')
+        self.assertEqual(d.download_step(),
+r'''mkdir -p /cache/sha256/abc123 && if ! echo "abc123  /cache/sha256/abc123/foo.tgz" | sha256sum -c --status; then t=$(mktemp /cache/sha256/abc123/foo.tgz.XXXXXX) && wget -q -O $t http://mysite.com/foo.tgz && echo "abc123  $t" | sha256sum -c - && mv $t /cache/sha256/abc123/foo.tgz; fi && \
+    mkdir -p /var/tmp && tar -x -f /cache/sha256/abc123/foo.tgz -C /var/tmp -z''')
+        self.assertEqual(d.src_directory, '/var/tmp/foo')
+        self.assertEqual(d.download_mount(),
+                         '--mount=type=cache,target=/cache')
+
+        d = downloader(package='foo.tgz', source_cache='/cache')
+        self.assertEqual(d.download_mount(), '')
+
+    @docker
+    def test_url_zstd(self):
+        """Zstandard compressed tarball"""
+        d = downloader(url='http://mysite.com/foo.tar.zst')
+        self.assertEqual(d.download_step(),
+r'''mkdir -p /var/tmp && wget -q -nc -P /var/tmp http://mysite.com/foo.tar.zst && \
+    mkdir -p /var/tmp && tar -x -f /var/tmp/foo.tar.zst -C /var/tmp --use-compress-program=zstd''')
+        self.assertEqual(d.src_directory, '/var/tmp/foo')
+
+    @docker
+    def test_parallel_decompress(self):
+        """Multi-threaded decompressor"""
+        d = downloader(parallel_decompress=True,
+                       url='http://mysite.com/foo.tgz')
+        self.assertEqual(d.download_step(),
+r'''mkdir -p /var/tmp && wget -q -nc -P /var/tmp http://mysite.com/foo.tgz && \
+    mkdir -p /var/tmp && tar -x -f /var/tmp/foo.tgz -C /var/tmp --use-compress-program="$(command -v pigz || echo gzip)"''')
+        self.assertEqual(d.src_directory, '/var/tmp/foo')
+
+    @docker
+    def test_stream(self):
+        """Download and unpack in one pass"""
+        d = downloader(stream=True, url='http://mysite.com/foo.tgz')
+        self.assertEqual(d.download_step(),
+                         "mkdir -p /var/tmp && bash -o pipefail -c 'wget -q -O - http://mysite.com/foo.tgz | tar -x -f - -C /var/tmp -z'")
+        self.assertEqual(d.src_directory, '/var/tmp/foo')
+
+    @docker
+    def test_stream_sha256(self):
+        """Download and unpack in one pass with checksum verification"""
+        d = downloader(sha256='abc123', stream=True,
+                       url='http://mysite.com/foo.tar.bz2')
+        self.assertEqual(d.download_step(wd='/tmp'),
+                         """mkdir -p /tmp && bash -o pipefail -c '{ wget -q -O - http://mysite.com/foo.tar.bz2 | tee /dev/fd/3 | tar -x -f - -C /tmp -j; } 3>&1 | sha256sum -c <(echo "abc123  -")'""")
+        self.assertEqual(d.src_directory, '/tmp/foo')
+
+    @docker
+    def test_stream_fallback(self):
+        """Packages that cannot be streamed are downloaded as usual"""
+        d = downloader(stream=True, url='http://mysite.com/foo.zip')
+        self.assertEqual(d.download_step(),
+r'''mkdir -p /var/tmp && wget -q -nc -P /var/tmp http://mysite.com/foo.zip && \
+    mkdir -p /var/tmp && unzip -d /var/tmp /var/tmp/foo.zip''')
+
+        d = downloader(stream=True, url='http://mysite.com/foo.tgz')
+        self.assertEqual(d.download_step(unpack=False),
+                         'mkdir -p /var/tmp && wget -q -nc -P /var/tmp http://mysite.com/foo.tgz')
+
+        d = downloader(source_cache='/cache', stream=True,
+                       url='http://mysite.com/foo.tgz')
+        self.assertTrue(d.download_step().startswith('mkdir -p /cache/'))
+
+    @bash
+    def test_source_cache_no_unpack(self):
+        """Download into the source cache, but do not unpack"""
+        d = downloader(source_cache='/cache', url='http://mysite.com/foo.tgz')
+        self.assertEqual(d.download_step(unpack=False),
+r'''mkdir -p /cache/url/a3f6530c50e6c874 && if ! [ -s /cache/url/a3f6530c50e6c874/foo.tgz ]; then t=$(mktemp /cache/url/a3f6530c50e6c874/foo.tgz.XXXXXX) && wget -q -O $t http://mysite.com/foo.tgz && mv $t /cache/url/a3f6530c50e6c874/foo.tgz; fi && mkdir -p /var/tmp && cp /cache/url/a3f6530c50e6c874/foo.tgz /var/tmp/foo.tgz''')
+
     @docker
     def test_tarball(self):
         """Local tarball, no download"""
@@ -0,0 +1,175 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Test cases for the fetch module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import hashlib
+import io
+import json
+import logging # pylint: disable=unused-import
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from helpers import docker, x86_64
+
+from hpccm.building_blocks.generic_autotools import generic_autotools
+from hpccm.fetch import fetch, manifest, mirror_path, record
+from hpccm.templates.git import git
+from hpccm.templates.wget import wget
+
+class Test_fetch(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def __source(self, name, data):
+        """Create a local file to fetch and return its URL and checksum"""
+        path = os.path.join(self.tmpdir, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(data)
+        return ('file://' + path, hashlib.sha256(data).hexdigest())
+
+    def test_record(self):
+        """Templates record into the active manifest"""
+        with record() as m:
+            wget().download_step(url='http://mysite.com/foo.tgz',
+                                 sha256='abc123')
+            wget().download_step(url='http://mysite.com/foo.tgz')
+            git().clone_step(repository='https://github.com/foo/bar.git',
+                             branch='v1.0')
+        self.assertEqual(m.urls, [{'url': 'http://mysite.com/foo.tgz',
+                                   'sha256': 'abc123'}])
+        self.assertEqual(m.repositories,
+                         [{'repository': 'https://github.com/foo/bar.git',
+                           'branch': 'v1.0'}])
+
+    def test_not_recording(self):
+        """Nothing is recorded outside of the context manager"""
+        m = manifest()
+        with record(m):
+            pass
+        wget().download_step(url='http://mysite.com/foo.tgz')
+        self.assertEqual(m.urls, [])
+
+    def test_record_thread(self):
+        """Recording is local to the current thread"""
+        with record() as m:
+            t = threading.Thread(
+                target=wget().download_step,
+                kwargs={'url': 'http://mysite.com/foo.tgz'})
+            t.start()
+            t.join()
+        self.assertEqual(m.urls, [])
+
+    @x86_64
+    @docker
+    def test_building_block(self):
+        """Building block sources are recorded"""
+        with record() as m:
+            generic_autotools(url='http://mysite.com/foo-1.0.tar.gz')
+            generic_autotools(repository='https://github.com/foo/bar',
+                              commit='deadbeef', recursive=True)
+        self.assertEqual(json.loads(m.json()), {
+            'version': 1,
+            'urls': [{'url': 'http://mysite.com/foo-1.0.tar.gz'}],
+            'repositories': [{'repository': 'https://github.com/foo/bar',
+                              'commit': 'deadbeef',
+                              'recursive': True}]})
+
+    def test_load(self):
+        """Manifest round trip"""
+        m = manifest(urls=[{'url': 'http://mysite.com/foo.tgz'}])
+        m2 = manifest.load(io.StringIO(m.json()))
+        self.assertEqual(m2.urls, m.urls)
+
+        with self.assertRaises(RuntimeError):
+            manifest.load(io.StringIO('{"version": 99}'))
+
+    def test_mirror_path(self):
+        """Mirror location derived from the URL"""
+        self.assertEqual(
+            mirror_path('sources', 'https://example.com/foo/foo-1.0.tar.gz'),
+            os.path.join('sources', 'example.com', 'foo', 'foo-1.0.tar.gz'))
+        self.assertEqual(
+            mirror_path('sources', 'https://user@example.com:8080/a/../b.tgz'),
+            os.path.join('sources', 'example.com:8080', 'a', 'b.tgz'))
+
+        with self.assertRaises(RuntimeError):
+            mirror_path('sources', 'https://')
+
+    def test_fetch(self):
+        """Fetch URLs into a mirror"""
+        url1, sha1 = self.__source('a.tar.gz', b'a' * 1000)
+        url2, _ = self.__source('b.tar.gz', b'b' * 10)
+        mirror = os.path.join(self.tmpdir, 'mirror')
+
+        m = manifest(urls=[{'url': url1, 'sha256': sha1}, {'url': url2}])
+        self.assertEqual(fetch(m, mirror, jobs=2), [])
+        with open(mirror_path(mirror, url1), 'rb') as f:
+            self.assertEqual(f.read(), b'a' * 1000)
+        self.assertTrue(os.path.exists(mirror_path(mirror, url2)))
+
+        # Already present and valid
+        self.assertEqual(fetch(m, mirror), [])
+
+    def test_fetch_checksum_mismatch(self):
+        """Fetch with a bad checksum"""
+        url, _ = self.__source('a.tar.gz', b'a')
+        mirror = os.path.join(self.tmpdir, 'mirror')
+
+        m = manifest(urls=[{'url': url, 'sha256': '0' * 64}])
+        errors = fetch(m, mirror)
+        self.assertEqual(len(errors), 1)
+        self.assertFalse(os.path.exists(mirror_path(mirror, url)))
+        self.assertFalse(os.path.exists(mirror_path(mirror, url) + '.part'))
+
+    def test_fetch_same_name(self):
+        """Files with the same name from different URLs"""
+        url1, _ = self.__source(os.path.join('1.0', 'src.tar.gz'), b'a')
+        url2, _ = self.__source(os.path.join('2.0', 'src.tar.gz'), b'b')
+        mirror = os.path.join(self.tmpdir, 'mirror')
+
+        self.assertNotEqual(mirror_path(mirror, url1),
+                            mirror_path(mirror, url2))
+        self.assertEqual(os.path.basename(mirror_path(mirror, url1)),
+                         'src.tar.gz')
+
+        m = manifest(urls=[{'url': url1}, {'url': url2}])
+        self.assertEqual(fetch(m, mirror, jobs=2), [])
+        with open(mirror_path(mirror, url1), 'rb') as f:
+            self.assertEqual(f.read(), b'a')
+        with open(mirror_path(mirror, url2), 'rb') as f:
+            self.assertEqual(f.read(), b'b')
+
+    def test_fetch_missing(self):
+        """Fetch a URL that does not exist"""
+        mirror = os.path.join(self.tmpdir, 'mirror')
+        m = manifest(urls=[{'url': 'file://' + os.path.join(self.tmpdir,
+                                                            'nothere.tgz')}])
+        self.assertEqual(len(fetch(m, mirror)), 1)
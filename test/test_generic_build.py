@@ -191,3 +191,26 @@ COPY --from=0 /usr/local/cuda-stream/bin /usr/local/cuda-stream/bin''')
         self.assertEqual(r,
 r'''# https://github.com/bcumming/cuda-stream
 COPY --from=0 /usr/local/cuda-stream/bin /usr/local/cuda-stream/bin''')
+
+    @ubuntu
+    @docker
+    def test_compiler_cache(self):
+        """Compiler cache"""
+        g = generic_build(build=['make'], compiler_cache=True,
+                          install=['make install'],
+                          url='https://example.com/foo-1.0.tar.gz')
+        self.assertEqual(str(g),
+r'''# https://example.com/foo-1.0.tar.gz
+RUN apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        ccache && \
+    rm -rf /var/lib/apt/lists/*
+RUN --mount=type=cache,target=/var/cache/hpccm/ccache mkdir -p /var/tmp && wget -q -nc -P /var/tmp https://example.com/foo-1.0.tar.gz && \
+    mkdir -p /var/tmp && tar -x -f /var/tmp/foo-1.0.tar.gz -C /var/tmp -z && \
+    export CCACHE_DIR=/var/cache/hpccm/ccache && export PATH=/usr/lib/ccache:/usr/lib64/ccache:$PATH && ccache -z && \
+    cd /var/tmp/foo-1.0 && \
+    make && \
+    cd /var/tmp/foo-1.0 && \
+    make install && \
+    ccache -s && \
+    rm -rf /var/tmp/foo-1.0 /var/tmp/foo-1.0.tar.gz''')
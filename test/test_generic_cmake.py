@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import centos, docker, ubuntu
 
 from hpccm.building_blocks.generic_cmake import generic_cmake
@@ -302,3 +304,46 @@ r'''# https://github.com/gromacs/gromacs/archive/v2018.2.tar.gz
 COPY --from=0 /usr/local/gromacs /usr/local/gromacs
 LABEL hpccm.gromacs.cmake='cmake -DCMAKE_INSTALL_PREFIX=/usr/local/gromacs -D CMAKE_BUILD_TYPE=Release -D CUDA_TOOLKIT_ROOT_DIR=/usr/local/cuda -D GMX_BUILD_OWN_FFTW=ON -D GMX_GPU=ON -D GMX_MPI=OFF -D GMX_OPENMP=ON -D GMX_PREFER_STATIC_LIBS=ON -D MPIEXEC_PREFLAGS=--allow-run-as-root' \
     hpccm.gromacs.url=https://github.com/gromacs/gromacs/archive/v2018.2.tar.gz''')
+
+    @ubuntu
+    @docker
+    def test_generator_ninja_ubuntu(self):
+        """Ninja generator"""
+        g = generic_cmake(generator='Ninja', parallel=8,
+                          prefix='/usr/local/foo',
+                          url='https://example.com/foo-1.0.tar.gz')
+        self.assertEqual(str(g),
+r'''# https://example.com/foo-1.0.tar.gz
+RUN apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        ninja-build && \
+    rm -rf /var/lib/apt/lists/*
+RUN mkdir -p /var/tmp && wget -q -nc -P /var/tmp https://example.com/foo-1.0.tar.gz && \
+    mkdir -p /var/tmp && tar -x -f /var/tmp/foo-1.0.tar.gz -C /var/tmp -z && \
+    mkdir -p /var/tmp/foo-1.0/build && cd /var/tmp/foo-1.0/build && cmake -G Ninja -DCMAKE_INSTALL_PREFIX=/usr/local/foo /var/tmp/foo-1.0 && \
+    cmake --build /var/tmp/foo-1.0/build --target all --parallel 8 && \
+    cmake --build /var/tmp/foo-1.0/build --target install --parallel 8 && \
+    rm -rf /var/tmp/foo-1.0 /var/tmp/foo-1.0.tar.gz''')
+
+    @centos
+    @docker
+    def test_generator_global_centos(self):
+        """Global Ninja generator"""
+        hpccm.config.set_cmake_generator('Ninja')
+        try:
+            g = generic_cmake(prefix='/usr/local/foo',
+                              url='https://example.com/foo-1.0.tar.gz')
+        finally:
+            hpccm.config.set_cmake_generator(None)
+        self.assertEqual(str(g),
+r'''# https://example.com/foo-1.0.tar.gz
+RUN yum install -y epel-release && \
+    yum install -y \
+        ninja-build && \
+    rm -rf /var/cache/yum/*
+RUN mkdir -p /var/tmp && wget -q -nc -P /var/tmp https://example.com/foo-1.0.tar.gz && \
+    mkdir -p /var/tmp && tar -x -f /var/tmp/foo-1.0.tar.gz -C /var/tmp -z && \
+    mkdir -p /var/tmp/foo-1.0/build && cd /var/tmp/foo-1.0/build && cmake -G Ninja -DCMAKE_INSTALL_PREFIX=/usr/local/foo /var/tmp/foo-1.0 && \
+    cmake --build /var/tmp/foo-1.0/build --target all --parallel $(nproc) && \
+    cmake --build /var/tmp/foo-1.0/build --target install --parallel $(nproc) && \
+    rm -rf /var/tmp/foo-1.0 /var/tmp/foo-1.0.tar.gz''')
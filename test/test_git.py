@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from hpccm.templates.git import git
 
 class Test_git(unittest.TestCase):
@@ -115,6 +117,56 @@ class Test_git(unittest.TestCase):
         self.assertEqual(g.clone_step(repository='https://github.com/NVIDIA/hpc-container-maker.git'),
                          'mkdir -p /tmp && cd /tmp && git clone --single-branch https://github.com/NVIDIA/hpc-container-maker.git hpc-container-maker && cd -')
 
+    def test_shallow_commit(self):
+        """git with specified commit, fetching only the commit"""
+        g = git()
+        self.assertEqual(g.clone_step(repository='https://github.com/NVIDIA/hpc-container-maker.git',
+                                      commit='ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c',
+                                      shallow=True),
+                         'mkdir -p /tmp/hpc-container-maker && cd /tmp/hpc-container-maker && git init && git remote add origin https://github.com/NVIDIA/hpc-container-maker.git && (git fetch --depth=1 origin ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c || git fetch --tags origin) && git checkout ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c && cd -')
+
+    def test_shallow_commit_recursive(self):
+        """git with specified commit, partial clone, and submodules"""
+        g = git()
+        self.assertEqual(g.clone_step(repository='https://github.com/NVIDIA/hpc-container-maker.git',
+                                      commit='ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c',
+                                      directory='hpccm', filter_spec='blob:none',
+                                      jobs=8, path='/var/tmp', recursive=True,
+                                      shallow=True),
+                         'mkdir -p /var/tmp/hpccm && cd /var/tmp/hpccm && git init && git remote add origin https://github.com/NVIDIA/hpc-container-maker.git && (git fetch --depth=1 --filter=blob:none origin ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c || git fetch --filter=blob:none --tags origin) && git checkout ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c && git submodule update --init --recursive --depth=1 --jobs 8 && cd -')
+
+    def test_shallow_recursive(self):
+        """git with shallow submodules fetched in parallel"""
+        g = git()
+        self.assertEqual(g.clone_step(repository='https://github.com/NVIDIA/hpc-container-maker.git',
+                                      branch='master', filter_spec='blob:none',
+                                      jobs=8, recursive=True, shallow=True),
+                         'mkdir -p /tmp && cd /tmp && git clone --depth=1 --filter=blob:none --branch master --recursive --shallow-submodules --jobs 8 https://github.com/NVIDIA/hpc-container-maker.git hpc-container-maker && cd -')
+
+    def test_shallow_lfs(self):
+        """git LFS with specified commit always clones the full history"""
+        g = git()
+        self.assertEqual(g.clone_step(repository='https://github.com/NVIDIA/hpc-container-maker.git',
+                                      commit='ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c',
+                                      lfs=True, shallow=True),
+                         'mkdir -p /tmp && cd /tmp && git lfs clone  https://github.com/NVIDIA/hpc-container-maker.git hpc-container-maker && cd - && cd /tmp/hpc-container-maker && git checkout ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c && cd -')
+
+    def test_set_git_clone(self):
+        """git with global clone settings"""
+        g = git()
+        hpccm.config.set_git_clone(shallow=True, jobs=4)
+        try:
+            self.assertEqual(g.clone_step(repository='https://github.com/NVIDIA/hpc-container-maker.git',
+                                          commit='ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c',
+                                          recursive=True),
+                             'mkdir -p /tmp/hpc-container-maker && cd /tmp/hpc-container-maker && git init && git remote add origin https://github.com/NVIDIA/hpc-container-maker.git && (git fetch --depth=1 origin ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c || git fetch --tags origin) && git checkout ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c && git submodule update --init --recursive --depth=1 --jobs 4 && cd -')
+            self.assertEqual(g.clone_step(repository='https://github.com/NVIDIA/hpc-container-maker.git',
+                                          commit='ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c',
+                                          shallow=False),
+                             'mkdir -p /tmp && cd /tmp && git clone  https://github.com/NVIDIA/hpc-container-maker.git hpc-container-maker && cd - && cd /tmp/hpc-container-maker && git checkout ac6ca95d0b20ed1efaffa6d58945a4dd2d80780c && cd -')
+        finally:
+            hpccm.config.set_git_clone(shallow=False)
+
     # This test will fail if git is not installed on the system
     def test_verify(self):
         """git with verification enabled"""
@@ -54,6 +54,28 @@ RUN mkdir -p /var/tmp && wget -q -nc -P /var/tmp https://content.mellanox.com/hp
     echo "hpcx_load" >> /etc/bash.bashrc && \
     rm -rf /var/tmp/hpcx-v2.21.3-gcc-doca_ofed-ubuntu20.04-cuda12-x86_64.tbz /var/tmp/hpcx-v2.21.3-gcc-doca_ofed-ubuntu20.04-cuda12-x86_64''')
 
+    @x86_64
+    @ubuntu20
+    @docker
+    def test_stream(self):
+        """Download and unpack in one pass"""
+        h = hpcx(stream=True, version='2.21.3')
+        self.assertEqual(str(h),
+r'''# Mellanox HPC-X version 2.21.3
+RUN apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        bzip2 \
+        libnuma1 \
+        openssh-client \
+        tar \
+        wget && \
+    rm -rf /var/lib/apt/lists/*
+RUN mkdir -p /var/tmp && bash -o pipefail -c 'wget -q -O - https://content.mellanox.com/hpc/hpc-x/v2.21.3/hpcx-v2.21.3-gcc-doca_ofed-ubuntu20.04-cuda12-x86_64.tbz | tar -x -f - -C /var/tmp -j' && \
+    cp -a /var/tmp/hpcx-v2.21.3-gcc-doca_ofed-ubuntu20.04-cuda12-x86_64 /usr/local/hpcx && \
+    echo "source /usr/local/hpcx/hpcx-init-ompi.sh" >> /etc/bash.bashrc && \
+    echo "hpcx_load" >> /etc/bash.bashrc && \
+    rm -rf /var/tmp/hpcx-v2.21.3-gcc-doca_ofed-ubuntu20.04-cuda12-x86_64.tbz /var/tmp/hpcx-v2.21.3-gcc-doca_ofed-ubuntu20.04-cuda12-x86_64''')
+
     @x86_64
     @ubuntu24
     @docker
@@ -0,0 +1,145 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Test cases for the ir module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import logging # pylint: disable=unused-import
+import unittest
+
+from helpers import docker, ubuntu
+
+from hpccm.building_blocks import gnu
+from hpccm.building_blocks.base import bb_base
+from hpccm.common import container_type
+from hpccm.ir import (Comment, Copy, Env, From, Layer, Opaque, Packages,
+                      Run, emit, lower)
+from hpccm.primitives import (baseimage, comment, copy, environment, label,
+                              shell)
+from hpccm.Stage import Stage
+
+class Test_ir(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+    @ubuntu
+    @docker
+    def test_lower_primitives(self):
+        """Primitives are lowered to typed nodes"""
+        s = Stage()
+        s += baseimage(image='ubuntu:18.04', _as='devel')
+        s += copy(_from='build', src='a', dest='/b')
+        s += environment(variables={'A': 'B'}, _export=False)
+        s += 'RUN true'
+
+        layers = s.ir()
+        self.assertEqual(len(layers), 4)
+        self.assertEqual(layers[0], [From(image='ubuntu:18.04',
+                                          _as='devel')])
+        self.assertEqual(layers[1], [Copy(src='a', dest='/b',
+                                          _from='build')])
+        self.assertEqual(layers[2], [Env(variables={'A': 'B'},
+                                         _export=False)])
+        self.assertIsInstance(layers[3][0], Opaque)
+        self.assertEqual(layers[3][0].source, 'RUN true')
+
+    @ubuntu
+    @docker
+    def test_lower_building_block(self):
+        """Building blocks are flattened into their primitives"""
+        layer = gnu().ir()
+        self.assertEqual([type(n) for n in layer], [Comment, Packages, Env])
+        self.assertEqual(layer[0].string, 'GNU compiler')
+
+        # Nested building blocks
+        b = bb_base()
+        b += shell(commands=['echo a'])
+        b += gnu()
+        self.assertEqual([type(n) for n in lower(b)], [Run, Comment, Packages, Env])
+
+    @ubuntu
+    @docker
+    def test_emit_unchanged(self):
+        """Emitting the IR is identical to rendering the stage"""
+        s = Stage()
+        s += baseimage(image='ubuntu:18.04')
+        s += gnu()
+        s += label(metadata={'A': 'B'})
+        for ctype in [container_type.DOCKER, container_type.SINGULARITY,
+                      container_type.BASH]:
+            # Emit the layers node by node
+            self.assertEqual(emit(s.ir(), ctype=ctype),
+                             emit([Layer(l) for l in s.ir()], ctype=ctype))
+        self.assertEqual(emit(s.ir()), str(s))
+
+    @ubuntu
+    @docker
+    def test_emit_changed(self):
+        """Changed nodes are emitted from their fields"""
+        b = bb_base()
+        b += comment('foo')
+        b += shell(commands=['echo a'])
+        layer = b.ir()
+
+        run = layer[1].replace(commands=['echo b'])
+        self.assertIsNone(run.source)
+        self.assertEqual(layer[1].commands, ['echo a'])
+
+        changed = Layer([layer[0], run])
+        self.assertEqual(emit([changed]), '# foo\nRUN echo b')
+        self.assertEqual(emit([changed], ctype=container_type.SINGULARITY),
+                         '# foo\n%post\n    cd /\n    echo b')
+        self.assertEqual(emit([changed], ctype=container_type.BASH),
+                         '# foo\ncd /\necho b')
+
+        # Comments take the string as a positional argument
+        self.assertEqual(emit([Layer([Comment(string='bar')])]), '# bar')
+
+    def test_invalid_field(self):
+        """Unrecognized node field"""
+        with self.assertRaises(RuntimeError):
+            Run(command=['echo a'])
+
+    @ubuntu
+    @docker
+    def test_runtime(self):
+        """The runtime of a stage is lowered per building block"""
+        s0 = Stage()
+        s0 += gnu()
+        s0 += shell(commands=['echo a'])
+        s0 += gnu()
+        s1 = Stage()
+        s1 += s0.runtime()
+        layers = s1.ir()
+        self.assertEqual(len(layers), 2)
+        self.assertEqual([type(n) for n in layers[0]], [Comment, Packages])
+        self.assertEqual(emit(layers), str(s1))
+
+    @ubuntu
+    @docker
+    def test_runtime_changed(self):
+        """The runtime string is used if the building block changed"""
+        g = gnu()
+        rt = g.runtime()
+        self.assertEqual([type(n) for n in rt.ir()[0]], [Comment, Packages])
+
+        # The runtime instructions accumulate
+        g.runtime()
+        self.assertEqual([type(n) for n in rt.ir()[0]], [Opaque])
+        self.assertEqual(emit(rt.ir()), rt)
@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import centos, centos8, docker, ubuntu
 
 from hpccm.building_blocks.kokkos import kokkos
@@ -131,3 +133,15 @@ ENV PATH=/usr/local/kokkos/bin:$PATH''')
 r'''# Kokkos
 COPY --from=0 /usr/local/kokkos /usr/local/kokkos
 ENV PATH=/usr/local/kokkos/bin:$PATH''')
+
+    @ubuntu
+    @docker
+    def test_cuda_arch(self):
+        """Global CUDA GPU architectures"""
+        hpccm.config.set_cuda_arch(['80', '90'])
+        try:
+            s = str(kokkos())
+            self.assertIn('-DKokkos_ARCH_AMPERE80=ON', s)
+            self.assertNotIn('CMAKE_CUDA_ARCHITECTURES', s)
+        finally:
+            hpccm.config.set_cuda_arch(None)
@@ -0,0 +1,75 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Test cases for the lazy module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import logging # pylint: disable=unused-import
+import os
+import subprocess
+import sys
+import unittest
+
+import hpccm.building_blocks
+import hpccm.primitives
+
+from hpccm.building_blocks.base import bb_base
+from hpccm.building_blocks.openmpi import openmpi
+
+class Test_lazy(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+    def test_classes(self):
+        """Package attributes are the classes, not the modules"""
+        # Importing openmpi also imports generic_autotools and packages
+        self.assertIs(hpccm.building_blocks.openmpi, openmpi)
+        for name in ['generic_autotools', 'packages', 'openmpi']:
+            self.assertTrue(issubclass(getattr(hpccm.building_blocks, name),
+                                       bb_base))
+        self.assertEqual(hpccm.primitives.shell.__name__, 'shell')
+
+    def test_all(self):
+        """Every name in __all__ can be loaded"""
+        for package in [hpccm.building_blocks, hpccm.primitives]:
+            for name in package.__all__:
+                self.assertEqual(getattr(package, name).__name__, name)
+                self.assertIn(name, dir(package))
+
+    def test_from_import(self):
+        """from ... import"""
+        from hpccm.building_blocks import ucx # pylint: disable=import-outside-toplevel
+        self.assertTrue(issubclass(ucx, bb_base))
+
+    def test_missing(self):
+        """Nonexistent name"""
+        with self.assertRaises(AttributeError):
+            hpccm.building_blocks.foo # pylint: disable=pointless-statement
+
+    @unittest.skipIf(sys.version_info[0] < 3, 'lazy loading requires Python 3')
+    def test_import_hpccm(self):
+        """Importing hpccm does not import the building blocks or archspec"""
+        path = os.path.join(os.path.dirname(__file__), '..')
+        code = ('import sys, hpccm; '
+                'print(",".join(sorted(m for m in sys.modules if '
+                'm.startswith("archspec") or '
+                'm.startswith("hpccm.building_blocks."))))')
+        out = subprocess.check_output([sys.executable, '-c', code],
+                                      cwd=path).decode('utf-8').strip()
+        self.assertEqual(out, '')
@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import centos, docker, ubuntu
 
 from hpccm.building_blocks.magma import magma
@@ -87,3 +89,16 @@ COPY --from=0 /usr/local/magma /usr/local/magma
 ENV CPATH=/usr/local/magma/include:$CPATH \
     LD_LIBRARY_PATH=/usr/local/magma/lib:$LD_LIBRARY_PATH \
     LIBRARY_PATH=/usr/local/magma/lib:$LIBRARY_PATH''')
+
+    @ubuntu
+    @docker
+    def test_cuda_arch(self):
+        """Global CUDA GPU architectures"""
+        hpccm.config.set_cuda_arch(['80', '90'])
+        try:
+            s = str(magma())
+            self.assertIn('-DGPU_TARGET="sm_80 sm_90"', s)
+            self.assertIn('-DCMAKE_CUDA_ARCHITECTURES="80;90"', s)
+            self.assertNotIn('Pascal', s)
+        finally:
+            hpccm.config.set_cuda_arch(None)
@@ -0,0 +1,131 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Test cases for the matrix module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import json
+import logging # pylint: disable=unused-import
+import os
+import shutil
+import tempfile
+import unittest
+
+from helpers import x86_64
+
+import hpccm.config
+
+from hpccm.common import container_type, linux_distro
+from hpccm.matrix import cells, load, render
+from hpccm.recipe import recipe
+
+class Test_matrix(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+        path = os.path.dirname(__file__)
+        self.examples = os.path.join(path, '..', 'recipes', 'examples')
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_cells(self):
+        """Cross product of the matrix values"""
+        c = cells({'recipe': 'foo/bar.py',
+                   'format': ['docker', 'singularity'],
+                   'cpu_target': [None, 'haswell'],
+                   'userarg': [{'a': 1}],
+                   'singularity_version': '3.2'})
+        self.assertEqual(len(c), 4)
+        self.assertEqual([x['name'] for x in c],
+                         ['bar-a=1.Dockerfile', 'bar-haswell-a=1.Dockerfile',
+                          'bar-a=1.def', 'bar-haswell-a=1.def'])
+        self.assertEqual(c[3]['ctype'], container_type.SINGULARITY)
+        self.assertEqual(c[3]['cpu_target'], 'haswell')
+        self.assertEqual(c[3]['userarg'], {'a': '1'})
+        self.assertEqual(c[3]['singularity_version'], '3.2')
+
+    def test_cells_defaults(self):
+        """Default values for keys not in the matrix"""
+        c = cells({'recipe': 'bar.py'}, format='bash', cpu_target='zen2')
+        self.assertEqual(len(c), 1)
+        self.assertEqual(c[0]['name'], 'bar-zen2.sh')
+        self.assertEqual(c[0]['ctype'], container_type.BASH)
+
+    def test_cells_bad_format(self):
+        """Invalid format"""
+        with self.assertRaises(RuntimeError):
+            cells({'recipe': 'bar.py', 'format': 'foo'})
+
+    def test_load(self):
+        """Load a JSON matrix file"""
+        mf = os.path.join(self.tmpdir, 'matrix.json')
+        with open(mf, 'w') as f:
+            json.dump({'recipe': 'basic.py', 'format': ['docker']}, f)
+        m = load(mf)
+        self.assertEqual(m['recipe'], os.path.join(self.tmpdir, 'basic.py'))
+        self.assertEqual(m['format'], ['docker'])
+
+    @x86_64
+    def test_render(self):
+        """Render a matrix sequentially"""
+        rf = os.path.join(self.examples, 'userargs.py')
+        c = cells({'recipe': rf, 'format': ['docker', 'singularity'],
+                   'userarg': [{'cuda': '9.0'}, {'cuda': '10.0'}]})
+        results = render(c, output_directory=self.tmpdir)
+        self.assertEqual(len(results), 4)
+        for name, spec, error in results:
+            self.assertIsNone(error)
+            with open(os.path.join(self.tmpdir, name)) as f:
+                self.assertEqual(f.read(), spec + '\n')
+
+        # Same output as rendering each cell individually
+        self.assertEqual(results[3][1],
+                         recipe(rf, ctype=container_type.SINGULARITY,
+                                userarg={'cuda': '10.0'}))
+
+    @x86_64
+    def test_render_parallel(self):
+        """Render a matrix in parallel"""
+        rf = os.path.join(self.examples, 'basic.py')
+        c = cells({'recipe': rf, 'format': ['docker', 'singularity', 'bash']})
+        sequential = render(c)
+        parallel = render(c, jobs=3)
+        self.assertEqual(parallel, sequential)
+
+    @x86_64
+    def test_render_restores_config(self):
+        """Global configuration is restored"""
+        hpccm.config.set_linux_distro('centos8')
+        try:
+            rf = os.path.join(self.examples, 'basic.py')
+            render(cells({'recipe': rf}))
+            self.assertEqual(hpccm.config.g_linux_distro,
+                             linux_distro.CENTOS)
+        finally:
+            hpccm.config.set_linux_distro('ubuntu')
+
+    def test_render_error(self):
+        """Errors are reported per cell"""
+        rf = os.path.join(os.path.dirname(__file__), 'bad_recipe.py')
+        results = render(cells({'recipe': rf}))
+        self.assertEqual(results[0][0], 'bad_recipe.Dockerfile')
+        self.assertIsNone(results[0][1])
+        self.assertIn('SyntaxError', results[0][2])
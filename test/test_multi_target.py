@@ -0,0 +1,134 @@
+# Copyright (c) 2019, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# pylint: disable=invalid-name, too-few-public-methods, bad-continuation
+
+"""Test cases for the multi_target module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import logging # pylint: disable=unused-import
+import unittest
+
+from helpers import aarch64, docker, ubuntu, x86_64
+
+from hpccm.building_blocks.generic_autotools import generic_autotools
+from hpccm.building_blocks.multi_target import multi_target, _dispatch_script
+
+class Test_multi_target(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+    @x86_64
+    @ubuntu
+    @docker
+    def test_defaults(self):
+        """Build for multiple CPU targets"""
+        m = multi_target(building_block=generic_autotools,
+                         prefix='/usr/local/app',
+                         targets=['haswell', 'zen2', 'neoverse_n1'],
+                         url='https://example.com/app-1.0.tar.gz')
+        s = str(m)
+        self.assertIn(r'''# https://example.com/app-1.0.tar.gz
+RUN mkdir -p /var/tmp && wget -q -nc -P /var/tmp https://example.com/app-1.0.tar.gz && \
+    mkdir -p /var/tmp && tar -x -f /var/tmp/app-1.0.tar.gz -C /var/tmp -z && \
+    cd /var/tmp/app-1.0 &&  CFLAGS='-O2 -march=haswell -mtune=haswell' CXXFLAGS='-O2 -march=haswell -mtune=haswell' FCFLAGS='-O2 -march=haswell -mtune=haswell' FFLAGS='-O2 -march=haswell -mtune=haswell' ./configure --prefix=/usr/local/app/haswell && \
+    make -j$(nproc) && \
+    make -j$(nproc) install && \
+    rm -rf /var/tmp/app-1.0 /var/tmp/app-1.0.tar.gz
+# https://example.com/app-1.0.tar.gz
+RUN mkdir -p /var/tmp && wget -q -nc -P /var/tmp https://example.com/app-1.0.tar.gz && \
+    mkdir -p /var/tmp && tar -x -f /var/tmp/app-1.0.tar.gz -C /var/tmp -z && \
+    cd /var/tmp/app-1.0 &&  CFLAGS='-O2 -march=znver2 -mtune=znver2' CXXFLAGS='-O2 -march=znver2 -mtune=znver2' FCFLAGS='-O2 -march=znver2 -mtune=znver2' FFLAGS='-O2 -march=znver2 -mtune=znver2' ./configure --prefix=/usr/local/app/zen2 && \
+    make -j$(nproc) && \
+    make -j$(nproc) install && \
+    rm -rf /var/tmp/app-1.0 /var/tmp/app-1.0.tar.gz
+RUN mkdir -p /usr/local/app && \
+''', s)
+        self.assertNotIn('neoverse_n1', s)
+        self.assertIn(' > /usr/local/app/env.sh && \\', s)
+        self.assertIn(r'''printf "%s\n" '#!/bin/sh' '. /usr/local/app/env.sh' 'exec "$@"' > /usr/local/app/launch && \
+    chmod +x /usr/local/app/env.sh /usr/local/app/launch''', s)
+
+    @aarch64
+    @ubuntu
+    @docker
+    def test_aarch64(self):
+        """Only the CPU targets of the CPU architecture"""
+        m = multi_target(building_block=generic_autotools,
+                         prefix='/usr/local/app',
+                         targets=['icelake', 'neoverse_n1', 'neoverse_v1'],
+                         url='https://example.com/app-1.0.tar.gz')
+        s = str(m)
+        self.assertIn('--prefix=/usr/local/app/neoverse_n1', s)
+        self.assertIn('--prefix=/usr/local/app/neoverse_v1', s)
+        self.assertNotIn('icelake', s)
+
+    @x86_64
+    @ubuntu
+    @docker
+    def test_errors(self):
+        """Invalid parameters"""
+        with self.assertRaises(RuntimeError):
+            multi_target(prefix='/usr/local/app', targets=['haswell'])
+        with self.assertRaises(RuntimeError):
+            multi_target(building_block=generic_autotools,
+                         targets=['haswell'])
+        with self.assertRaises(RuntimeError):
+            multi_target(building_block=generic_autotools,
+                         prefix='/usr/local/app', targets=['foo'])
+        with self.assertRaises(RuntimeError):
+            multi_target(building_block=generic_autotools,
+                         prefix='/usr/local/app', targets=['power9le'])
+        with self.assertRaises(RuntimeError):
+            multi_target(building_block=generic_autotools,
+                         prefix='/usr/local/app', targets=['neoverse_n1'])
+
+    def test_dispatch_script(self):
+        """CPU target selection"""
+        lines = _dispatch_script('/usr/local/app',
+                                 ['x86_64_v3', 'zen3', 'icelake'])
+        self.assertIn('  x86_64_v3|zen3|icelake) _hpccm_target=$HPCCM_TARGET ;;',
+                      lines)
+
+        # Most specific target first, generic targets do not check
+        # the vendor, and sse3 is implied by ssse3
+        selection = [l for l in lines if 'then _hpccm_target=' in l]
+        self.assertEqual(len(selection), 3)
+        self.assertTrue(selection[0].startswith(
+            '    if _hpccm_is GenuineIntel && _hpccm_has abm adx aes avx '))
+        self.assertTrue(selection[0].endswith('; then _hpccm_target=icelake'))
+        self.assertTrue(selection[1].startswith(
+            '    elif _hpccm_is AuthenticAMD && _hpccm_has '))
+        self.assertEqual(selection[2], '    elif _hpccm_has abm avx avx2 bmi1 bmi2 cx16 f16c fma lahf_lm mmx movbe popcnt sse sse2 sse4_1 sse4_2 ssse3 xsave; then _hpccm_target=x86_64_v3')
+
+        lines = _dispatch_script('/usr/local/app', ['neoverse_n1'])
+        self.assertIn('    if _hpccm_is 0x41 && _hpccm_has aes asimd asimddp asimdhp asimdrdm atomics cpuid crc32 dcpop evtstrm fp fphp lrcpc pmull sha1 sha2; then _hpccm_target=neoverse_n1', lines)
+
+    @x86_64
+    @ubuntu
+    @docker
+    def test_runtime(self):
+        """Runtime"""
+        m = multi_target(building_block=generic_autotools,
+                         prefix='/usr/local/app',
+                         targets=['haswell', 'zen2'],
+                         url='https://example.com/app-1.0.tar.gz')
+        r = m.runtime()
+        self.assertEqual(r,
+r'''# generic_autotools for haswell, zen2
+COPY --from=0 /usr/local/app /usr/local/app''')
@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import aarch64, centos8, rockylinux9, rockylinux10, docker, ubuntu20, ubuntu22, ubuntu24, x86_64
 
 from hpccm.building_blocks.nccl import nccl
@@ -129,6 +131,39 @@ ENV CPATH=/usr/local/nccl/include:$CPATH \
     LIBRARY_PATH=/usr/local/nccl/lib:$LIBRARY_PATH \
     PATH=/usr/local/nccl/bin:$PATH''')
 
+    @x86_64
+    @ubuntu24
+    @docker
+    def test_build_cuda_arch(self):
+        """nccl build for selected GPU architectures"""
+        n = nccl(build=True, cuda_arch=['80', '90'])
+        self.assertIn(r'''    cd /var/tmp/nccl-2.29.7-1 && \
+    NVCC_GENCODE='-gencode=arch=compute_80,code=sm_80 -gencode=arch=compute_90,code=sm_90 -gencode=arch=compute_90,code=compute_90' PREFIX=/usr/local/nccl make -j$(nproc) install && \
+''', str(n))
+
+        hpccm.config.set_cuda_arch('sm_90')
+        try:
+            n = nccl(build=True)
+            self.assertIn(" NVCC_GENCODE='-gencode=arch=compute_90,code=sm_90 -gencode=arch=compute_90,code=compute_90' PREFIX=", str(n))
+
+            # Make variables take precedence
+            n = nccl(build=True,
+                     make_variables={'NVCC_GENCODE': '-arch=sm_80'})
+            self.assertIn(' NVCC_GENCODE=-arch=sm_80 PREFIX=', str(n))
+        finally:
+            hpccm.config.set_cuda_arch(None)
+
+    @x86_64
+    @ubuntu24
+    @docker
+    def test_build_parallel_auto(self):
+        """nccl build with memory aware parallelism"""
+        n = nccl(build=True, parallel='auto')
+        self.assertIn(" make -j$(awk -v n=$(nproc) -v m=4194304 '", str(n))
+
+        n = nccl(build=True, parallel='auto', parallel_memory=8)
+        self.assertIn(" make -j$(awk -v n=$(nproc) -v m=8388608 '", str(n))
+
     @x86_64
     @rockylinux10
     @docker
@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import centos, docker, ubuntu
 
 from hpccm.building_blocks.nvshmem import nvshmem
@@ -117,3 +119,14 @@ ENV CPATH=/usr/local/nvshmem/include:$CPATH \
     LD_LIBRARY_PATH=/usr/local/nvshmem/lib:$LD_LIBRARY_PATH \
     LIBRARY_PATH=/usr/local/nvshmem/lib:$LIBRARY_PATH \
     PATH=/usr/local/nvshmem/bin:$PATH''')
+
+    @ubuntu
+    @docker
+    def test_cuda_arch(self):
+        """Global CUDA GPU architectures"""
+        hpccm.config.set_cuda_arch(['80', '90'])
+        try:
+            s = str(nvshmem())
+            self.assertIn('-DCMAKE_CUDA_ARCHITECTURES="80;90"', s)
+        finally:
+            hpccm.config.set_cuda_arch(None)
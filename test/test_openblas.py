@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import aarch64, centos, docker, ppc64le, ubuntu, x86_64
 
 from hpccm.building_blocks.openblas import openblas
@@ -134,6 +136,32 @@ RUN mkdir -p /var/tmp && wget -q -nc -P /var/tmp https://github.com/xianyi/OpenB
     rm -rf /var/tmp/OpenBLAS-0.3.6 /var/tmp/v0.3.6.tar.gz
 ENV LD_LIBRARY_PATH=/usr/local/openblas/lib:$LD_LIBRARY_PATH''')
 
+    @aarch64
+    @ubuntu
+    @docker
+    def test_native_target_aarch64(self):
+        """native-target optimization profile"""
+        with hpccm.config.context(cpu_target='neoverse_v1',
+                                  optimization='native-target'):
+            o = openblas(version='0.3.6')
+        self.assertIn('make TARGET=NEOVERSEV1 USE_OPENMP=1', str(o))
+
+    @x86_64
+    @ubuntu
+    @docker
+    def test_native_target_x86_64(self):
+        """native-target optimization profile"""
+        tc = toolchain(CC='gcc', FC='gfortran')
+        with hpccm.config.context(cpu_target='icelake'):
+            o = openblas(toolchain=tc, version='0.3.6')
+        self.assertIn('make CC=gcc FC=gfortran USE_OPENMP=1', str(o))
+
+        with hpccm.config.context(cpu_target='icelake',
+                                  optimization='native-target'):
+            o = openblas(toolchain=tc, version='0.3.6')
+        self.assertIn('make CC=gcc FC=gfortran TARGET=SKYLAKEX USE_OPENMP=1',
+                      str(o))
+
     @x86_64
     @ubuntu
     @docker
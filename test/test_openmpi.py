@@ -26,6 +26,7 @@ from helpers import centos, cpu_target_none, docker, ubuntu
 
 from hpccm.building_blocks.nvhpc import nvhpc
 from hpccm.building_blocks.openmpi import openmpi
+from hpccm.toolchain import toolchain
 
 class Test_openmpi(unittest.TestCase):
     def setUp(self):
@@ -305,3 +306,22 @@ ENV LD_LIBRARY_PATH=/usr/local/openmpi/lib:$LD_LIBRARY_PATH \
         self.assertEqual(tc.FC, 'mpifort')
         self.assertEqual(tc.F77, 'mpif77')
         self.assertEqual(tc.F90, 'mpif90')
+
+    @ubuntu
+    @docker
+    def test_compiler_cache(self):
+        """The compiler cache is not embedded in the compiler wrappers"""
+        tc = toolchain(CC='gcc-9', CXX='g++-9')
+
+        ompi = openmpi(compiler_cache='ccache', toolchain=tc)
+        s = str(ompi)
+        self.assertIn('RUN --mount=type=cache,target=/var/cache/hpccm/ccache ', s)
+        self.assertIn('ccache -z', s)
+        self.assertIn('CC=gcc-9 CXX=g++-9 ./configure', s)
+        self.assertNotIn("'ccache gcc-9'", s)
+
+        ompi = openmpi(compiler_cache='sccache', toolchain=tc)
+        s = str(ompi)
+        self.assertNotIn('sccache', s)
+        self.assertNotIn('--mount', s)
+        self.assertIn('CC=gcc-9 CXX=g++-9 ./configure', s)
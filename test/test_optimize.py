@@ -0,0 +1,517 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Test cases for the optimize module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import logging # pylint: disable=unused-import
+import unittest
+
+from helpers import centos, docker, singularity, ubuntu
+
+import hpccm.config
+
+from hpccm.building_blocks import gnu, packages
+from hpccm.building_blocks.base import bb_base
+from hpccm.ir import emit
+from hpccm.optimize import fan_out, hoist_packages, instrument, merge_layers
+from hpccm.primitives import (baseimage, comment, copy, environment, label,
+                              shell, workdir)
+from hpccm.Stage import Stage
+from hpccm.toolchain import toolchain
+
+def _block(name, *primitives):
+    """Return a building block consisting of a comment and primitives"""
+    b = bb_base()
+    b += comment(name)
+    for p in primitives:
+        b += p
+    return b
+
+class library(bb_base):
+    """Building block that installs into a prefix"""
+
+    def __init__(self, name, prefix, command, toolchain=None,
+                 provides=None):
+        super(library, self).__init__()
+        self.prefix = prefix
+        self.__toolchain = toolchain
+        self.toolchain = provides
+        self += comment(name)
+        self += shell(commands=[command])
+        self += environment(variables={'PATH': '{}/bin:$PATH'.format(prefix)})
+
+class Test_optimize(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+    def __optimize(self, s):
+        layers, removed = merge_layers(s.ir())
+        return emit(layers), removed
+
+    @ubuntu
+    @docker
+    def test_merge_shell(self):
+        """Adjacent shell primitives are merged across building blocks"""
+        s = Stage()
+        s += _block('a', shell(chdir=False, commands=['apt-get install a']),
+                    shell(commands=['cd /var/tmp', 'make']))
+        s += _block('b', shell(chdir=False, commands=['apt-get install b']),
+                    environment(variables={}))
+        spec, removed = self.__optimize(s)
+        self.assertEqual(removed, 2)
+        self.assertEqual(spec,
+r'''# a
+# b
+RUN apt-get install a && \
+    cd / && \
+    cd /var/tmp && \
+    make && \
+    apt-get install b''')
+
+    @ubuntu
+    @docker
+    def test_separators(self):
+        """Other instructions and incompatible options are not merged"""
+        s = Stage()
+        s += shell(commands=['echo a'])
+        s += copy(src='a', dest='/a')
+        s += shell(commands=['echo b'])
+        s += shell(_arguments='--mount=type=cache,target=/root/.cache',
+                   commands=['echo c'])
+        spec, removed = self.__optimize(s)
+        self.assertEqual(removed, 0)
+        self.assertEqual(spec, str(s))
+
+    @ubuntu
+    @docker
+    def test_workdir(self):
+        """Merged commands start in the Docker working directory"""
+        s = Stage()
+        s += workdir(directory='/work')
+        s += shell(commands=['echo a'])
+        s += shell(commands=['echo b'])
+        spec, removed = self.__optimize(s)
+        self.assertEqual(removed, 1)
+        self.assertEqual(spec,
+r'''WORKDIR /work
+
+RUN echo a && \
+    cd /work && \
+    echo b''')
+
+    @ubuntu
+    @docker
+    def test_merge_environment(self):
+        """Independent environment variables are merged"""
+        s = Stage()
+        s += environment(variables={'A': '1'})
+        s += environment(variables={'B': '2'})
+        s += environment(variables={'C': '${B}/bin'})
+        s += environment(variables={'A': '3'})
+        s += environment(variables={'A': '4'})
+        spec, removed = self.__optimize(s)
+        self.assertEqual(removed, 2)
+        self.assertEqual(spec,
+r'''ENV A=1 \
+    B=2
+
+ENV A=3 \
+    C=${B}/bin
+
+ENV A=4''')
+
+    @ubuntu
+    @docker
+    def test_merge_label(self):
+        """Labels are merged"""
+        s = Stage()
+        s += label(metadata={'A': '1'})
+        s += label(metadata={'B': '2'})
+        spec, removed = self.__optimize(s)
+        self.assertEqual(removed, 1)
+        self.assertEqual(spec,
+r'''LABEL A=1 \
+    B=2''')
+
+    @ubuntu
+    @singularity
+    def test_singularity(self):
+        """Singularity"""
+        s = Stage()
+        s += shell(commands=['echo a'])
+        s += shell(commands=['echo b'])
+        s += environment(variables={'A': '1'}, _export=False)
+        s += environment(variables={'B': '2'}, _export=False)
+        spec, removed = self.__optimize(s)
+        self.assertEqual(removed, 2)
+        self.assertEqual(spec,
+r'''%post
+    cd /
+    echo a
+    cd /
+    echo b
+
+%environment
+    export A=1
+    export B=2''')
+
+    @ubuntu
+    @docker
+    def test_stage(self):
+        """Stage layer optimization"""
+        s = Stage(optimize_layers=True)
+        s += shell(commands=['echo a'])
+        s += shell(commands=['echo b'])
+        self.assertEqual(str(s), 'RUN echo a && \\\n    cd / && \\\n    echo b')
+
+        s = Stage()
+        s += shell(commands=['echo a'])
+        s += shell(commands=['echo b'])
+        self.assertEqual(str(s), 'RUN echo a\n\nRUN echo b')
+        with hpccm.config.context():
+            hpccm.config.set_optimize_layers(True)
+            self.assertEqual(str(s),
+                             'RUN echo a && \\\n    cd / && \\\n    echo b')
+
+    @ubuntu
+    @docker
+    def test_hoist_packages(self):
+        """Packages are installed in as few transactions as possible"""
+        s = Stage()
+        s += baseimage(image='ubuntu:18.04')
+        s += _block('a', packages(ospackages=['make', 'wget']),
+                    shell(commands=['make']))
+        s += _block('b', packages(ospackages=['gnupg', 'wget']))
+        s += _block('c', packages(apt_keys=['https://a.com/key.pub'],
+                                  apt_repositories=['deb https://a.com/ubuntu /'],
+                                  ospackages=['c']))
+        s += packages(ospackages=['d'])
+        s += packages(download=True, ospackages=['e'])
+        layers, removed = hoist_packages(s.ir())
+        self.assertEqual(removed, 2)
+        self.assertEqual(emit(layers),
+r'''FROM ubuntu:18.04
+
+# b
+# c
+RUN apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        gnupg \
+        make \
+        wget && \
+    rm -rf /var/lib/apt/lists/*
+RUN mkdir -p /usr/share/keyrings && \
+    rm -f /usr/share/keyrings/key.gpg && \
+    wget -qO - https://a.com/key.pub | gpg --dearmor -o /usr/share/keyrings/key.gpg && \
+    echo "deb https://a.com/ubuntu /" >> /etc/apt/sources.list.d/hpccm.list && \
+    apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        c \
+        d && \
+    rm -rf /var/lib/apt/lists/*
+
+# a
+RUN make
+
+RUN apt-get update -y && \
+    mkdir -m 777 -p /var/tmp/packages_download && cd /var/tmp/packages_download && \
+    DEBIAN_FRONTEND=noninteractive apt-get download -y --no-install-recommends \
+        e && \
+    rm -rf /var/lib/apt/lists/*''')
+
+    @ubuntu
+    @docker
+    def test_hoist_single(self):
+        """A single package installation is not moved"""
+        s = Stage()
+        s += baseimage(image='ubuntu:18.04')
+        s += shell(commands=['echo a'])
+        s += packages(ospackages=['make'])
+        layers, removed = hoist_packages(s.ir())
+        self.assertEqual(removed, 0)
+        self.assertEqual(emit(layers), str(s))
+
+    @centos
+    @docker
+    def test_hoist_runtime(self):
+        """Packages of the runtime of a previous stage are hoisted"""
+        s0 = Stage()
+        s0 += gnu()
+        s0 += packages(ospackages=['numactl'])
+        s0 += shell(commands=['echo a'])
+        s1 = Stage(hoist_packages=True)
+        s1 += baseimage(image='centos:7')
+        s1 += s0.runtime()
+        s1 += packages(ospackages=['git'])
+        self.assertEqual(str(s1),
+r'''FROM centos:7
+
+# GNU compiler runtime
+RUN yum install -y \
+        git \
+        libgfortran \
+        libgomp && \
+    rm -rf /var/cache/yum/*''')
+
+    @ubuntu
+    @docker
+    def test_instrument(self):
+        """Timing markers around the commands of building blocks"""
+        b = _block('a', packages(ospackages=['make']),
+                    shell(commands=['mkdir -p /var/tmp',
+                                    'wget -P /var/tmp https://a.com/a.tgz',
+                                    'tar -x -f /var/tmp/a.tgz -C /var/tmp',
+                                    'cd /var/tmp/a', './configure', 'make',
+                                    'rm -rf /var/tmp/a', 'ldconfig']))
+        s = Stage()
+        s += baseimage(image='ubuntu:18.04')
+        s += b
+        s += shell(commands=['echo a'])
+
+        layers, count = instrument(s.ir())
+        self.assertEqual(count, 0)
+        self.assertEqual(emit(layers), str(s))
+
+        layers, count = instrument(s.ir(), default=True)
+        self.assertEqual(count, 1)
+        self.assertEqual(emit(layers),
+r'''FROM ubuntu:18.04
+
+# a
+RUN printf 'hpccm-mark %s %s %s\n' bb_base packages "$(date +%s)" && \
+    apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        make && \
+    rm -rf /var/lib/apt/lists/* && \
+    printf 'hpccm-mark %s %s %s\n' bb_base end "$(date +%s)"
+RUN printf 'hpccm-mark %s %s %s\n' bb_base other "$(date +%s)" && \
+    mkdir -p /var/tmp && \
+    printf 'hpccm-mark %s %s %s\n' bb_base download "$(date +%s)" && \
+    wget -P /var/tmp https://a.com/a.tgz && \
+    tar -x -f /var/tmp/a.tgz -C /var/tmp && \
+    cd /var/tmp/a && \
+    printf 'hpccm-mark %s %s %s\n' bb_base compile "$(date +%s)" && \
+    ./configure && \
+    make && \
+    rm -rf /var/tmp/a && \
+    printf 'hpccm-mark %s %s %s\n' bb_base other "$(date +%s)" && \
+    ldconfig && \
+    printf 'hpccm-mark %s %s %s\n' bb_base end "$(date +%s)"
+
+RUN echo a''')
+
+    @ubuntu
+    @docker
+    def test_instrument_block(self):
+        """The instrument parameter of a building block overrides the
+        global setting"""
+        s = Stage()
+        s += library('a', '/usr/local/a', 'make install-a')
+        s += gnu(instrument=False)
+        self.assertNotIn('hpccm-mark', str(s))
+        with hpccm.config.context(instrument=True):
+            self.assertEqual(str(s).count('hpccm-mark'), 2)
+
+        s = Stage()
+        s += gnu(instrument=True)
+        self.assertIn("printf 'hpccm-mark %s %s %s\\n' gnu packages",
+                      str(s))
+
+    @ubuntu
+    @docker
+    def test_instrument_hoist(self):
+        """Building blocks are still instrumented after their packages
+        are hoisted"""
+        s = Stage(hoist_packages=True)
+        s += baseimage(image='ubuntu:18.04')
+        s += _block('a', packages(ospackages=['make']),
+                    shell(commands=['make']))
+        s += _block('b', packages(ospackages=['wget']))
+        with hpccm.config.context(instrument=True):
+            self.assertEqual(str(s),
+r'''FROM ubuntu:18.04
+
+# b
+RUN apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        make \
+        wget && \
+    rm -rf /var/lib/apt/lists/*
+
+# a
+RUN printf 'hpccm-mark %s %s %s\n' bb_base compile "$(date +%s)" && \
+    make && \
+    printf 'hpccm-mark %s %s %s\n' bb_base end "$(date +%s)"''')
+
+    @ubuntu
+    @docker
+    def test_fan_out(self):
+        """Independent building blocks are built in separate stages"""
+        s = Stage(fan_out=True)
+        s += baseimage(image='ubuntu:18.04', _as='devel')
+        s += shell(commands=['echo base'])
+        s += library('a', '/usr/local/a', 'make install-a')
+        s += library('b', '/usr/local/b', 'make install-b')
+        s += shell(commands=['echo final'])
+        s += library('c', '/usr/local/c', 'make install-c')
+        self.assertEqual(str(s),
+r'''FROM ubuntu:18.04 AS devel-base
+
+RUN echo base
+
+FROM devel-base AS devel-library
+
+# a
+RUN make install-a
+ENV PATH=/usr/local/a/bin:$PATH
+
+FROM devel-base AS devel-library-2
+
+# b
+RUN make install-b
+ENV PATH=/usr/local/b/bin:$PATH
+
+FROM devel-base AS devel
+
+# a
+COPY --from=devel-library /usr/local/a /usr/local/a
+ENV PATH=/usr/local/a/bin:$PATH
+
+# b
+COPY --from=devel-library-2 /usr/local/b /usr/local/b
+ENV PATH=/usr/local/b/bin:$PATH
+
+RUN echo final
+
+# c
+RUN make install-c
+ENV PATH=/usr/local/c/bin:$PATH''')
+
+    @ubuntu
+    @docker
+    def test_fan_out_dependencies(self):
+        """Inferred dependencies are installed in the stage of the
+        building block"""
+        s = Stage(fan_out=True)
+        s += baseimage(image='ubuntu:18.04', _as='devel')
+        s += library('mpi', '/usr/local/mpi', 'make install-mpi',
+                     provides=toolchain(CC='mpicc'))
+        s += library('a', '/usr/local/a', 'make install-a')
+        s += library('b', '/usr/local/b', 'make install-b',
+                     toolchain=toolchain(CC='mpicc'))
+        s += library('c', '/usr/local/c',
+                     'make install-c LIBS=/usr/local/b/lib/libb.so')
+        s += library('d', '/usr/local/d', 'make install-d --enable-mpi')
+        layers, count = fan_out(s.ir(), 'devel')
+        self.assertEqual(count, 5)
+        self.assertEqual(
+            [l[0].image for l in layers
+             if len(l) == 1 and type(l[0]).__name__ == 'From'],
+            ['ubuntu:18.04'] + ['devel-base'] * 6)
+        self.assertEqual(
+            [[n._from for n in l if type(n).__name__ == 'Copy']
+             for l in layers],
+            [[], [], [], [], [], [], ['devel-library'], [], [],
+             ['devel-library'], ['devel-library-3'], [], [],
+             ['devel-library'], [], [], ['devel-library'],
+             ['devel-library-2'], ['devel-library-3'], ['devel-library-4'],
+             ['devel-library-5']])
+
+    @ubuntu
+    @docker
+    def test_fan_out_explicit(self):
+        """Dependencies that cannot be inferred"""
+        s = Stage(fan_out=True)
+        s += baseimage(image='ubuntu:18.04', _as='devel')
+        a = library('a', '/usr/local/a', 'make install-a')
+        s += a
+        b = library('b', '/usr/local/b', 'make install-b')
+        s += b
+        c = library('c', '/usr/local/c', 'make install-c')
+        s += c
+        s.depends(b, a)
+        s.depends(c)
+        self.assertEqual(str(s),
+r'''FROM ubuntu:18.04 AS devel-base
+
+FROM devel-base AS devel-library
+
+# a
+RUN make install-a
+ENV PATH=/usr/local/a/bin:$PATH
+
+FROM devel-base AS devel-library-2
+
+# a
+COPY --from=devel-library /usr/local/a /usr/local/a
+ENV PATH=/usr/local/a/bin:$PATH
+
+# b
+RUN make install-b
+ENV PATH=/usr/local/b/bin:$PATH
+
+FROM devel-base AS devel
+
+# a
+COPY --from=devel-library /usr/local/a /usr/local/a
+ENV PATH=/usr/local/a/bin:$PATH
+
+# b
+COPY --from=devel-library-2 /usr/local/b /usr/local/b
+ENV PATH=/usr/local/b/bin:$PATH
+
+# c
+RUN make install-c
+ENV PATH=/usr/local/c/bin:$PATH''')
+
+    @ubuntu
+    @docker
+    def test_fan_out_unchanged(self):
+        """Stages that cannot be fanned out are unchanged"""
+        # Unnamed stage
+        s = Stage()
+        s += baseimage(image='ubuntu:18.04')
+        s += library('a', '/usr/local/a', 'make install-a')
+        s += library('b', '/usr/local/b', 'make install-b')
+        expected = str(s)
+        hpccm.config.set_fan_out()
+        try:
+            self.assertEqual(str(s), expected)
+        finally:
+            hpccm.config.set_fan_out(False)
+
+        # Only one building block with its own prefix
+        s = Stage(fan_out=True)
+        s += baseimage(image='ubuntu:18.04', _as='devel')
+        s += library('a', '/usr/local', 'make install-a')
+        s += library('b', '/usr/local/b', 'make install-b')
+        layers, count = fan_out(s.ir(), 'devel')
+        self.assertEqual(count, 0)
+        self.assertEqual(emit(layers), str(s))
+
+    @ubuntu
+    @singularity
+    def test_fan_out_singularity(self):
+        """Fan-out is Docker specific"""
+        s = Stage(fan_out=True)
+        s += baseimage(image='ubuntu:18.04', _as='devel')
+        s += library('a', '/usr/local/a', 'make install-a')
+        s += library('b', '/usr/local/b', 'make install-b')
+        self.assertEqual(str(s), emit(s.ir()))
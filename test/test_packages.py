@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import centos, docker, invalid_distro, ubuntu
 
 from hpccm.building_blocks.packages import packages 
@@ -56,6 +58,22 @@ r'''RUN yum install -y \
         gcc-fortran && \
     rm -rf /var/cache/yum/*''')
 
+    @ubuntu
+    @docker
+    def test_cache_global(self):
+        """Global package cache setting"""
+        hpccm.config.set_package_cache(True)
+        try:
+            p = packages(ospackages=['gcc'])
+        finally:
+            hpccm.config.set_package_cache(False)
+        self.assertEqual(str(p),
+r'''RUN --mount=type=cache,target=/var/cache/apt,sharing=locked --mount=type=cache,target=/var/lib/apt,sharing=locked rm -f /etc/apt/apt.conf.d/docker-clean && \
+    echo 'Binary::apt::APT::Keep-Downloaded-Packages "true";' > /etc/apt/apt.conf.d/keep-cache && \
+    apt-get update -y && \
+    DEBIAN_FRONTEND=noninteractive apt-get install -y --no-install-recommends \
+        gcc''')
+
     @invalid_distro
     def test_invalid_distro(self):
         """Invalid package type specified"""
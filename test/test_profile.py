@@ -0,0 +1,136 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Test cases for the profile module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import json
+import logging # pylint: disable=unused-import
+import os
+import unittest
+
+from helpers import centos, docker, x86_64
+
+from hpccm.building_blocks.gnu import gnu
+from hpccm.building_blocks.packages import packages
+from hpccm.profile import profile, record, timer
+from hpccm.recipe import recipe
+
+class Test_profile(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+    def test_inactive(self):
+        """Nothing is recorded outside of a profile"""
+        with timer('init', 'foo'):
+            pass
+        with record() as p:
+            pass
+        self.assertEqual(p.events, [])
+
+    def test_nested(self):
+        """Self time excludes the time of nested events"""
+        with record() as p:
+            with timer('init', 'outer'):
+                with timer('init', 'inner'):
+                    pass
+                with timer('init', 'inner'):
+                    pass
+
+        self.assertEqual([(kind, name) for kind, name, _, _ in p.events],
+                         [('init', 'inner'), ('init', 'inner'),
+                          ('init', 'outer')])
+        inner = sum(e[2] for e in p.events[:2])
+        outer = p.events[2]
+        self.assertAlmostEqual(outer[3], outer[2] - inner)
+
+        summary = p.summary()
+        self.assertEqual(len(summary), 2)
+        s = [s for s in summary if s['name'] == 'inner'][0]
+        self.assertEqual(s['count'], 2)
+        self.assertAlmostEqual(s['seconds'], inner)
+
+    def test_callback(self):
+        """The callback is called for each event"""
+        calls = []
+        with record(callback=lambda *args: calls.append(args[:2])):
+            with timer('include', 'recipe.py'):
+                pass
+        self.assertEqual(calls, [('include', 'recipe.py')])
+
+    def test_existing_profile(self):
+        """Record into an existing profile"""
+        p = profile()
+        with record(p) as r:
+            with timer('init', 'foo'):
+                pass
+        self.assertIs(p, r)
+        self.assertEqual(len(p.events), 1)
+
+    @x86_64
+    @centos
+    @docker
+    def test_building_blocks(self):
+        """Building block construction, string representation, and
+        runtime"""
+        with record() as p:
+            g = gnu()
+            str(g)
+            g.runtime()
+
+        counts = dict(((s['kind'], s['name']), s['count'])
+                      for s in p.summary())
+        self.assertEqual(counts[('init', 'gnu')], 1)
+        self.assertEqual(counts[('str', 'gnu')], 1)
+        self.assertEqual(counts[('runtime', 'gnu')], 1)
+
+        # Building blocks created by other building blocks
+        self.assertIn(('init', 'packages'), counts)
+
+    @x86_64
+    @centos
+    @docker
+    def test_recipe(self):
+        """Included recipes and stages"""
+        path = os.path.dirname(__file__)
+        rf = os.path.join(path, '..', 'recipes', 'examples', 'basic.py')
+        with record() as p:
+            recipe(rf)
+
+        kinds = set((s['kind'], s['name']) for s in p.summary())
+        self.assertIn(('include', rf), kinds)
+        self.assertIn(('stage', 'Stage0'), kinds)
+        self.assertIn(('init', 'apt_get'), kinds)
+
+        d = json.loads(p.json())
+        self.assertEqual(len(d['events']), len(p.events))
+        self.assertEqual(d['summary'], p.summary())
+
+        table = p.table().splitlines()
+        self.assertTrue(table[0].startswith('kind'))
+        self.assertEqual(len(table), len(p.summary()) + 1)
+
+    def test_packages(self):
+        """The string representation is cached, but still timed"""
+        p = packages(ospackages=['make'])
+        with record() as prof:
+            str(p)
+            str(p)
+        self.assertEqual([s['count'] for s in prof.summary()
+                          if s['name'] == 'packages'], [2])
@@ -21,10 +21,13 @@ from __future__ import print_function
 
 import logging # pylint: disable=unused-import
 import os
+import threading
 import unittest
 
 from helpers import x86_64
 
+import hpccm.config
+
 from hpccm.common import container_type
 from hpccm.recipe import recipe
 
@@ -275,3 +278,55 @@ RUN apt-get update -y && \
         gcc \
         gfortran && \
     rm -rf /var/lib/apt/lists/*''')
+
+    @x86_64
+    def test_concurrent(self):
+        """Concurrent recipes in threads"""
+        path = os.path.dirname(__file__)
+        examples = os.path.join(path, '..', 'recipes', 'examples')
+        cells = [(os.path.join(examples, 'basic.py'), container_type.DOCKER),
+                 (os.path.join(examples, 'basic.py'),
+                  container_type.SINGULARITY),
+                 (os.path.join(path, 'include3.py'), container_type.BASH)]
+        expected = [recipe(rf, ctype=ctype) for rf, ctype in cells] * 4
+
+        results = [None] * len(expected)
+        def worker(index):
+            rf, ctype = cells[index % len(cells)]
+            with hpccm.config.context():
+                results[index] = recipe(rf, ctype=ctype)
+
+        threads = [threading.Thread(target=worker, args=(i,))
+                   for i in range(len(expected))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, expected)
+
+    def test_recipe_options(self):
+        """Recipe level options are keyword arguments with the same
+        default value"""
+        try:
+            from inspect import getfullargspec as getargspec
+        except ImportError: # pragma: no cover
+            from inspect import getargspec
+
+        spec = getargspec(recipe)
+        defaults = dict(zip(spec.args[-len(spec.defaults):], spec.defaults))
+        for name, default, _ in hpccm.config._recipe_options:
+            self.assertIn(name, defaults)
+            self.assertEqual(defaults[name], default)
+
+    def test_recipe_options_applied(self):
+        """Recipe level options set the configuration"""
+        path = os.path.dirname(__file__)
+        rf = os.path.join(path, 'include3.py')
+        with hpccm.config.context():
+            recipe(rf, cmake_generator='Ninja', fan_out=True,
+                   singularity_version='3.2', working_directory='/tmp')
+            self.assertEqual(hpccm.config.g_cmake_generator, 'Ninja')
+            self.assertTrue(hpccm.config.g_fan_out)
+            self.assertEqual(str(hpccm.config.g_singularity_version), '3.2')
+            self.assertEqual(hpccm.config.g_wd, '/tmp')
@@ -0,0 +1,142 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Test cases for the server module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import logging # pylint: disable=unused-import
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from helpers import x86_64
+
+from hpccm.common import container_type
+from hpccm.recipe import recipe
+from hpccm.server import client, render, server
+
+class Test_server(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+        path = os.path.dirname(__file__)
+        self.basic = os.path.join(path, '..', 'recipes', 'examples',
+                                  'basic.py')
+
+    def __serve(self, address):
+        """Start a server in a background thread"""
+        s = server(address)
+        t = threading.Thread(target=s.serve_forever)
+        t.daemon = True
+        t.start()
+        return s
+
+    @x86_64
+    def test_render(self):
+        """Render a recipe file"""
+        r = render({'recipe': self.basic, 'format': 'singularity'})
+        self.assertEqual(r['spec'],
+                         recipe(self.basic, ctype=container_type.SINGULARITY))
+
+    @x86_64
+    def test_render_text(self):
+        """Render recipe text"""
+        r = render({'recipe_text': 'Stage0 += baseimage(image="centos:7")\n'
+                    'Stage0 += shell(commands=[USERARG["cmd"]])',
+                    'userarg': {'cmd': 'make'}})
+        self.assertEqual(r['spec'].strip(), 'FROM centos:7\n\nRUN make')
+
+    @x86_64
+    def test_render_profile(self):
+        """Render a recipe with timings"""
+        r = render({'recipe': self.basic, 'profile': True})
+        self.assertIn({'kind': 'init', 'name': 'apt_get', 'count': 1},
+                      [dict((k, s[k]) for k in ['kind', 'name', 'count'])
+                       for s in r['profile']])
+        self.assertNotIn('profile', render({'recipe': self.basic}))
+
+    def test_render_invalid(self):
+        """Invalid requests"""
+        with self.assertRaises(RuntimeError):
+            render({})
+        with self.assertRaises(RuntimeError):
+            render({'recipe': self.basic, 'format': 'foo'})
+        with self.assertRaises(SyntaxError):
+            render({'recipe_text': 'Stage0 += '})
+
+    @x86_64
+    def test_tcp(self):
+        """Concurrent requests over TCP"""
+        s = self.__serve('127.0.0.1:0')
+        address = '127.0.0.1:{}'.format(s.server_address[1])
+        try:
+            results = {}
+            def worker(fmt):
+                results[fmt] = client({'recipe': self.basic, 'format': fmt},
+                                      address=address)['spec']
+
+            threads = [threading.Thread(target=worker, args=(f,))
+                       for f in ['bash', 'docker', 'singularity']]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            for fmt in ['bash', 'docker', 'singularity']:
+                self.assertEqual(results[fmt], recipe(
+                    self.basic, ctype=container_type[fmt.upper()]))
+
+            with self.assertRaises(RuntimeError):
+                client({'recipe': 'nonexistent.py'}, address=address)
+        finally:
+            s.shutdown()
+            s.server_close()
+
+    @x86_64
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'),
+                         'Unix domain sockets are not supported')
+    def test_unix(self):
+        """Request over a Unix domain socket"""
+        tmpdir = tempfile.mkdtemp()
+        address = 'unix:' + os.path.join(tmpdir, 'hpccm.sock')
+        s = self.__serve(address)
+        try:
+            r = client({'recipe': self.basic}, address=address)
+            self.assertEqual(r['spec'], recipe(self.basic))
+        finally:
+            s.shutdown()
+            s.server_close()
+            shutil.rmtree(tmpdir)
+
+    def test_unix_unsupported(self):
+        """Unix domain socket address on a platform without support"""
+        af_unix = getattr(socket, 'AF_UNIX', None)
+        if af_unix is not None:
+            del socket.AF_UNIX
+        try:
+            with self.assertRaises(RuntimeError):
+                client({'recipe': self.basic}, address='unix:/tmp/hpccm.sock')
+            with self.assertRaises(RuntimeError):
+                server('unix:/tmp/hpccm.sock')
+        finally:
+            if af_unix is not None:
+                socket.AF_UNIX = af_unix
@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from helpers import bash, docker, invalid_ctype, singularity
 
 from hpccm.primitives.shell import shell
@@ -166,3 +168,21 @@ class Test_shell(unittest.TestCase):
         cmds = ['a', 'b', 'c']
         s = shell(commands=cmds, _arguments='--mount=type=bind,target=/usr/local/mysrc')
         self.assertEqual(str(s), 'RUN --mount=type=bind,target=/usr/local/mysrc a && \\\n    b && \\\n    c')
+
+    @docker
+    def test_source_cache_docker(self):
+        """Source cache mount is not inferred from the commands"""
+        hpccm.config.set_source_cache('/cache')
+        try:
+            s = shell(commands=['cp /cache/foo.tgz /var/tmp', 'b'],
+                      _arguments='--network=none')
+            self.assertEqual(str(s), 'RUN --network=none cp /cache/foo.tgz /var/tmp && \\\n    b')
+        finally:
+            hpccm.config.set_source_cache(None)
+
+    @docker
+    def test_compiler_cache_docker(self):
+        """Compiler cache mount is not inferred from the commands"""
+        s = shell(commands=['export CCACHE_DIR=/var/cache/hpccm/ccache',
+                            'make'])
+        self.assertEqual(str(s), 'RUN export CCACHE_DIR=/var/cache/hpccm/ccache && \\\n    make')
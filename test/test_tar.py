@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+import hpccm.config
+
 from hpccm.templates.tar import tar
 
 class Test_tar(unittest.TestCase):
@@ -52,6 +54,12 @@ class Test_tar(unittest.TestCase):
         self.assertEqual(t.untar_step(tarball='foo.tgz'),
                          'tar -x -f foo.tgz -z')
 
+        self.assertEqual(t.untar_step(tarball='foo.tar.zst'),
+                         'tar -x -f foo.tar.zst --use-compress-program=zstd')
+
+        self.assertEqual(t.untar_step(tarball='foo.tzst'),
+                         'tar -x -f foo.tzst --use-compress-program=zstd')
+
         self.assertEqual(t.untar_step(tarball='foo.tar'),
                          'tar -x -f foo.tar')
 
@@ -64,6 +72,49 @@ class Test_tar(unittest.TestCase):
         self.assertEqual(t.untar_step(tarball='foo.tgz', directory='bar'),
                          'mkdir -p bar && tar -x -f foo.tgz -C bar -z')
 
+    def test_stream(self):
+        """Read the tarball from standard input"""
+        t = tar()
+        self.assertEqual(t.untar_step(tarball='foo.tar.xz', directory='bar',
+                                      stream=True),
+                         'tar -x -f - -C bar -J')
+
+    def test_parallel(self):
+        """Multi-threaded decompressors"""
+        t = tar()
+
+        self.assertEqual(t.untar_step(tarball='foo.tar.bz2', parallel=True),
+                         'tar -x -f foo.tar.bz2 --use-compress-program="$(command -v lbzip2 || command -v pbzip2 || echo bzip2)"')
+
+        self.assertEqual(t.untar_step(tarball='foo.tgz', parallel=True),
+                         'tar -x -f foo.tgz --use-compress-program="$(command -v pigz || echo gzip)"')
+
+        self.assertEqual(t.untar_step(tarball='foo.txz', parallel=True),
+                         'tar -x -f foo.txz --use-compress-program="xz -T0"')
+
+        self.assertEqual(t.untar_step(tarball='foo.tar.zst', parallel=True),
+                         'tar -x -f foo.tar.zst --use-compress-program="zstd -T0"')
+
+        self.assertEqual(t.untar_step(tarball='foo.tar', parallel=True),
+                         'tar -x -f foo.tar')
+
+    def test_parallel_decompress(self):
+        """Parameter and global setting for multi-threaded decompressors"""
+        t = tar(parallel_decompress=True)
+        self.assertEqual(t.untar_step(tarball='foo.txz'),
+                         'tar -x -f foo.txz --use-compress-program="xz -T0"')
+        self.assertEqual(t.untar_step(tarball='foo.txz', parallel=False),
+                         'tar -x -f foo.txz -J')
+
+        hpccm.config.set_parallel_decompress()
+        try:
+            self.assertEqual(tar().untar_step(tarball='foo.txz'),
+                             'tar -x -f foo.txz --use-compress-program="xz -T0"')
+            self.assertEqual(tar(parallel_decompress=False).untar_step(
+                tarball='foo.txz'), 'tar -x -f foo.txz -J')
+        finally:
+            hpccm.config.set_parallel_decompress(False)
+
     def test_args(self):
         """Argument given"""
         t = tar()
@@ -23,6 +23,9 @@ from copy import copy, deepcopy
 import logging # pylint: disable=unused-import
 import unittest
 
+from helpers import broadwell, icelake
+
+import hpccm.config
 from hpccm.toolchain import toolchain
 
 class Test_toolchain(unittest.TestCase):
@@ -69,3 +72,81 @@ class Test_toolchain(unittest.TestCase):
         t = toolchain(FOO='bar')
         with self.assertRaises(AttributeError):
             f = t.FOO
+
+    def test_copy_optimization(self):
+        """Toolchain copies preserve the optimization profiles"""
+        t = toolchain(CC='gcc', optimization='lto', pgo_directory='/tmp/p')
+        c = copy(t)
+        self.assertEqual(c.optimization, 'lto')
+        self.assertEqual(c.pgo_directory, '/tmp/p')
+
+    def test_optimized_none(self):
+        """No optimization profiles"""
+        t = toolchain(CC='gcc', CFLAGS='-O3')
+        self.assertIs(t.optimized(), t)
+
+    @icelake
+    def test_optimized_native_target(self):
+        """Native target optimization profile"""
+        t = toolchain(CC='mpicc', CXX='clang++', FC='nvfortran',
+                      CFLAGS='-O3', optimization='native-target')
+        o = t.optimized()
+        self.assertEqual(o.CFLAGS,
+                         '-O3 -march=icelake-client -mtune=icelake-client')
+        self.assertEqual(o.CXXFLAGS,
+                         '-O2 -march=icelake-client -mtune=icelake-client')
+        self.assertEqual(o.FCFLAGS, '-O2 -tp skylake')
+        self.assertEqual(o.FFLAGS, '-O2 -tp skylake')
+        self.assertEqual(o.LDFLAGS, None)
+
+        # The original toolchain is not modified
+        self.assertEqual(t.CFLAGS, '-O3')
+        self.assertEqual(t.CXXFLAGS, None)
+
+    @broadwell
+    def test_optimized_duplicate_flags(self):
+        """Flags already present are not added again"""
+        t = toolchain(CC='gcc',
+                      CFLAGS='-march=broadwell -mtune=broadwell -flto',
+                      optimization='native-target,lto')
+        o = t.optimized()
+        self.assertEqual(o.CFLAGS,
+                         '-march=broadwell -mtune=broadwell -flto '
+                         '-ffat-lto-objects')
+        self.assertEqual(o.LDFLAGS, '-flto -ffat-lto-objects')
+
+    def test_optimized_pgo(self):
+        """Profile guided optimization profiles"""
+        t = toolchain(CC='icx', CXX='icpc', optimization='pgo-generate')
+        o = t.optimized()
+        self.assertEqual(o.CFLAGS, '-O2 -fprofile-generate=/var/tmp/pgo')
+        self.assertEqual(o.CXXFLAGS, '-O2 -prof-gen -prof-dir=/var/tmp/pgo')
+        self.assertEqual(o.FCFLAGS, '-O2 -fprofile-generate=/var/tmp/pgo')
+
+        t = toolchain(CC='gcc', optimization=['pgo-use'],
+                      pgo_directory='/var/tmp/profiles')
+        o = t.optimized()
+        self.assertEqual(o.CFLAGS,
+                         '-O2 -fprofile-use=/var/tmp/profiles '
+                         '-fprofile-correction -Wno-missing-profile')
+
+    def test_optimized_unsupported(self):
+        """Optimization profile not supported by the compiler family"""
+        t = toolchain(CC='nvc', CXX='nvc++', FC='nvfortran',
+                      optimization='lto')
+        o = t.optimized()
+        self.assertEqual(o.CFLAGS, '-O2')
+        self.assertEqual(o.LDFLAGS, None)
+
+    def test_optimized_global(self):
+        """Global optimization profiles"""
+        hpccm.config.set_optimization('lto')
+        try:
+            o = toolchain(CC='clang').optimized()
+            self.assertEqual(o.CFLAGS, '-O2 -flto')
+
+            # Toolchain profiles override the global profiles
+            t = toolchain(CC='clang', optimization=False)
+            self.assertIs(t.optimized(), t)
+        finally:
+            hpccm.config.set_optimization(None)
@@ -0,0 +1,209 @@
+# Copyright (c) 2018, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# pylint: disable=invalid-name, too-few-public-methods
+
+"""Test cases for the verify module"""
+
+from __future__ import unicode_literals
+from __future__ import print_function
+
+import json
+import logging # pylint: disable=unused-import
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+
+import hpccm.config
+
+from hpccm.recipe import recipe
+from hpccm.templates.git import git
+from hpccm.verify import cache, deferred, ls_remote, request, resolve, verifier
+
+class Test_verify(unittest.TestCase):
+    def setUp(self):
+        """Disable logging output messages"""
+        logging.disable(logging.ERROR)
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.cachefile = os.path.join(self.tmpdir, 'cache', 'git-verify.json')
+        hpccm.config.set_git_verify_cache(self.cachefile)
+
+        # Local bare repository with a branch and an annotated tag
+        env = dict(os.environ, GIT_AUTHOR_NAME='hpccm',
+                   GIT_AUTHOR_EMAIL='hpccm@example.com',
+                   GIT_COMMITTER_NAME='hpccm',
+                   GIT_COMMITTER_EMAIL='hpccm@example.com')
+        work = os.path.join(self.tmpdir, 'work')
+        self.repository = os.path.join(self.tmpdir, 'repo.git')
+        for cmd in [['git', 'init', '-q', work],
+                    ['git', '-C', work, 'commit', '-q', '--allow-empty',
+                     '-m', 'initial'],
+                    ['git', '-C', work, 'tag', '-a', '-m', 'tag', 'v1.0'],
+                    ['git', 'clone', '-q', '--bare', work, self.repository]]:
+            subprocess.check_call(cmd, env=env)
+        self.sha = subprocess.check_output(
+            ['git', '-C', work, 'rev-parse', 'HEAD']).decode().strip()
+        self.branch = subprocess.check_output(
+            ['git', '-C', work, 'rev-parse', '--abbrev-ref',
+             'HEAD']).decode().strip()
+
+    def tearDown(self):
+        hpccm.config.set_git_verify_cache(None)
+        shutil.rmtree(self.tmpdir)
+
+    def test_cache_default(self):
+        """The cache is disabled by default"""
+        with hpccm.config.context():
+            hpccm.config.g_git_verify_cache = None
+            self.assertEqual(hpccm.config.get_git_verify_cache(), None)
+            self.assertEqual(verifier().cache, None)
+
+            hpccm.config.set_git_verify_cache()
+            self.assertTrue(hpccm.config.get_git_verify_cache().endswith(
+                os.path.join('hpccm', 'git-verify.json')))
+
+    def test_ls_remote(self):
+        """Resolve branches and tags"""
+        self.assertEqual(ls_remote(self.repository), (self.sha, None))
+        self.assertEqual(ls_remote(self.repository, branch=self.branch),
+                         (self.sha, None))
+        self.assertEqual(ls_remote(self.repository, branch='v1.0'),
+                         (self.sha, None))
+
+        sha, error = ls_remote(self.repository, branch='does_not_exist')
+        self.assertEqual(sha, None)
+        self.assertIn('does_not_exist', error)
+
+        sha, error = ls_remote(os.path.join(self.tmpdir, 'missing.git'))
+        self.assertEqual(sha, None)
+        self.assertIn('missing.git', error)
+
+    def test_cache(self):
+        """Results are read from the cache until they expire"""
+        c = cache(self.cachefile, ttl=60)
+        self.assertEqual(c.get(self.repository, 'master'), None)
+        c.put(self.repository, 'master', self.sha)
+        self.assertEqual(c.get(self.repository, 'master'), self.sha)
+        self.assertEqual(c.get(self.repository), None)
+        c.save()
+
+        with open(self.cachefile) as f:
+            entries = json.load(f)['entries']
+        self.assertEqual(list(entries), ['{} master'.format(self.repository)])
+
+        # Expired entry
+        entries['{} master'.format(self.repository)]['time'] = time.time() - 120
+        with open(self.cachefile, 'w') as f:
+            json.dump({'version': 1, 'entries': entries}, f)
+        self.assertEqual(cache(self.cachefile, ttl=60).get(self.repository,
+                                                           'master'), None)
+        self.assertEqual(cache(self.cachefile, ttl=None).get(self.repository,
+                                                             'master'),
+                         self.sha)
+
+    def test_cache_invalid(self):
+        """Cache file that cannot be read"""
+        os.makedirs(os.path.dirname(self.cachefile))
+        with open(self.cachefile, 'w') as f:
+            f.write('not json')
+        c = cache(self.cachefile)
+        self.assertEqual(c.get(self.repository), None)
+        c.put(self.repository, None, self.sha)
+        c.save()
+        self.assertEqual(cache(self.cachefile).get(self.repository), self.sha)
+
+    def test_resolve_cached(self):
+        """Later resolutions do not access the repository"""
+        c = cache(self.cachefile, ttl=None)
+        self.assertEqual(resolve(self.repository, branch='v1.0', c=c),
+                         (self.sha, None))
+        c.save()
+
+        shutil.rmtree(self.repository)
+        self.assertEqual(resolve(self.repository, branch='v1.0',
+                                 c=cache(self.cachefile, ttl=None)),
+                         (self.sha, None))
+        self.assertEqual(resolve(self.repository, branch='v1.0')[0], None)
+
+    def test_verifier(self):
+        """Resolve requests concurrently"""
+        v = verifier()
+        v.add(self.repository)
+        v.add(self.repository, branch=self.branch, fatal=True)
+        v.add(self.repository, branch='v1.0')
+        v.add(self.repository, branch='does_not_exist')
+        self.assertEqual(v.run(),
+                         {(self.repository, None): self.sha,
+                          (self.repository, self.branch): self.sha,
+                          (self.repository, 'v1.0'): self.sha,
+                          (self.repository, 'does_not_exist'): None})
+        self.assertEqual(v.requests, [])
+
+        # Only successful results are cached
+        with open(self.cachefile) as f:
+            self.assertEqual(len(json.load(f)['entries']), 3)
+
+    def test_verifier_fatal(self):
+        """A fatal request that fails raises an exception"""
+        v = verifier(c=None)
+        v.add(self.repository, branch='does_not_exist')
+        v.add(self.repository, branch='does_not_exist', fatal=True)
+        with self.assertRaises(RuntimeError):
+            v.run()
+        self.assertFalse(os.path.exists(self.cachefile))
+
+    def test_request(self):
+        """Requests are resolved immediately unless deferred"""
+        request(self.repository, branch=self.branch, fatal=True)
+        with self.assertRaises(RuntimeError):
+            request(self.repository, branch='does_not_exist', fatal=True)
+
+        with self.assertRaises(RuntimeError):
+            with deferred() as v:
+                request(self.repository, branch='does_not_exist', fatal=True)
+                self.assertEqual(len(v.requests), 1)
+
+    def test_git_verify(self):
+        """Clone step with verification"""
+        g = git()
+        with deferred() as v:
+            self.assertEqual(
+                g.clone_step(repository=self.repository, branch='v1.0',
+                             verify='fatal'),
+                'mkdir -p /tmp && cd /tmp && git clone --depth=1 --branch v1.0 {} repo && cd -'.format(self.repository))
+            self.assertEqual(v.requests, [(self.repository, 'v1.0', True)])
+
+        with self.assertRaises(RuntimeError):
+            g.clone_step(repository=self.repository, branch='v2.0',
+                         verify='fatal')
+
+    def test_recipe(self):
+        """Verification of the git repositories of a recipe"""
+        rf = os.path.join(self.tmpdir, 'recipe.py')
+        with open(rf, 'w') as f:
+            f.write('from hpccm.templates.git import git\n')
+            f.write('Stage0 += shell(commands=[git().clone_step(repository={0!r}, branch={1!r}, verify="fatal")])\n'.format(self.repository, self.branch))
+            f.write('Stage0 += shell(commands=[git().clone_step(repository={0!r}, branch="v1.0", verify=True)])\n'.format(self.repository))
+        self.assertIn('git clone', recipe(rf, raise_exceptions=True))
+
+        with open(rf, 'a') as f:
+            f.write('Stage0 += shell(commands=[git().clone_step(repository={0!r}, branch="v2.0", verify="fatal")])\n'.format(self.repository))
+        with self.assertRaises(RuntimeError):
+            recipe(rf, raise_exceptions=True)
+        with self.assertRaises(SystemExit):
+            recipe(rf)
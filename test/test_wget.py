@@ -22,6 +22,8 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
+from helpers import docker, singularity
+
 from hpccm.templates.wget import wget
 
 class Test_wget(unittest.TestCase):
@@ -74,3 +76,58 @@ class Test_wget(unittest.TestCase):
         w = wget(opts=['-fast'])
         self.assertEqual(w.download_step(url='http://mysite.com/foo.tgz'),
                          'mkdir -p /tmp && wget -fast -P /tmp http://mysite.com/foo.tgz')
+
+    def test_sha256(self):
+        """wget with checksum verification"""
+        w = wget()
+        self.assertEqual(w.download_step(url='http://mysite.com/foo.tgz',
+                                         sha256='abc123'),
+                         'mkdir -p /tmp && wget -q -nc -P /tmp http://mysite.com/foo.tgz && echo "abc123  /tmp/foo.tgz" | sha256sum -c -')
+
+    def test_stream(self):
+        """wget piped into a command"""
+        w = wget()
+        self.assertEqual(w.stream_step(url='http://mysite.com/foo.tgz',
+                                       command='tar -x -f - -z',
+                                       no_check_certificate=True),
+                         "bash -o pipefail -c 'wget -q --no-check-certificate -O - http://mysite.com/foo.tgz | tar -x -f - -z'")
+        self.assertEqual(w.stream_step(url='http://mysite.com/foo.tgz',
+                                       command='tar -x -f - -z',
+                                       sha256='abc123'),
+                         """bash -o pipefail -c '{ wget -q -O - http://mysite.com/foo.tgz | tee /dev/fd/3 | tar -x -f - -z; } 3>&1 | sha256sum -c <(echo "abc123  -")'""")
+
+    def test_cache(self):
+        """wget with source cache"""
+        w = wget()
+        self.assertEqual(w.download_step(url='http://mysite.com/foo.tgz',
+                                         cache='/cache'),
+                         'mkdir -p /cache/url/a3f6530c50e6c874 && if ! [ -s /cache/url/a3f6530c50e6c874/foo.tgz ]; then t=$(mktemp /cache/url/a3f6530c50e6c874/foo.tgz.XXXXXX) && wget -q -O $t http://mysite.com/foo.tgz && mv $t /cache/url/a3f6530c50e6c874/foo.tgz; fi && mkdir -p /tmp && cp /cache/url/a3f6530c50e6c874/foo.tgz /tmp/foo.tgz')
+
+    def test_cache_sha256(self):
+        """wget with source cache and checksum verification"""
+        w = wget()
+        self.assertEqual(w.download_step(url='http://mysite.com/foo.tgz',
+                                         cache='/cache', sha256='abc123',
+                                         directory='/var/tmp'),
+                         'mkdir -p /cache/sha256/abc123 && if ! echo "abc123  /cache/sha256/abc123/foo.tgz" | sha256sum -c --status; then t=$(mktemp /cache/sha256/abc123/foo.tgz.XXXXXX) && wget -q -O $t http://mysite.com/foo.tgz && echo "abc123  $t" | sha256sum -c - && mv $t /cache/sha256/abc123/foo.tgz; fi && mkdir -p /var/tmp && cp /cache/sha256/abc123/foo.tgz /var/tmp/foo.tgz')
+
+    def test_cache_disabled(self):
+        """wget with source cache explicitly disabled"""
+        w = wget()
+        self.assertEqual(w.download_step(url='http://mysite.com/foo.tgz',
+                                         cache=False),
+                         'mkdir -p /tmp && wget -q -nc -P /tmp http://mysite.com/foo.tgz')
+
+    @docker
+    def test_cache_mount(self):
+        """Source cache mount"""
+        w = wget()
+        self.assertEqual(w.cache_mount(), '')
+        self.assertEqual(w.cache_mount(cache='/cache'),
+                         '--mount=type=cache,target=/cache')
+
+    @singularity
+    def test_cache_mount_singularity(self):
+        """Source cache mount is Docker specific"""
+        w = wget()
+        self.assertEqual(w.cache_mount(cache='/cache'), '')
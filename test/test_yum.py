@@ -22,7 +22,9 @@ from __future__ import print_function
 import logging # pylint: disable=unused-import
 import unittest
 
-from helpers import aarch64, centos, centos8, docker, x86_64
+import hpccm.config
+
+from helpers import aarch64, bash, centos, centos8, docker, rockylinux9, x86_64
 
 from hpccm.building_blocks.yum import yum
 
@@ -44,6 +46,21 @@ r'''RUN yum install -y \
         gcc-fortran && \
     rm -rf /var/cache/yum/*''')
 
+    @x86_64
+    @centos
+    @docker
+    def test_source_cache(self):
+        """The source cache is not mounted"""
+        hpccm.config.set_source_cache('/cache')
+        try:
+            y = yum(ospackages=['gcc'])
+            self.assertEqual(str(y),
+r'''RUN yum install -y \
+        gcc && \
+    rm -rf /var/cache/yum/*''')
+        finally:
+            hpccm.config.set_source_cache(None)
+
     @x86_64
     @centos
     @docker
@@ -162,3 +179,49 @@ r'''RUN yum install -y dnf-utils && \
     yum install -y \
         hwloc-devel && \
     rm -rf /var/cache/yum/*''')
+
+    @x86_64
+    @rockylinux9
+    @docker
+    def test_powertools_rockylinux9(self):
+        """Powertools repo"""
+        y = yum(ospackages=['hwloc-devel'], powertools=True)
+        self.assertEqual(str(y),
+r'''RUN yum install -y dnf-utils && \
+    yum-config-manager --set-enabled crb && \
+    yum install -y \
+        hwloc-devel && \
+    rm -rf /var/cache/yum/*''')
+
+    @x86_64
+    @centos
+    @docker
+    def test_cache(self):
+        """Package cache"""
+        y = yum(cache=True, ospackages=['gcc', 'make'])
+        self.assertEqual(str(y),
+r'''RUN --mount=type=cache,target=/var/cache/yum,sharing=locked yum install -y --setopt=keepcache=1 \
+        gcc \
+        make''')
+
+    @x86_64
+    @centos8
+    @docker
+    def test_cache_centos8(self):
+        """Package cache"""
+        y = yum(cache=True, epel=True, ospackages=['gcc'])
+        self.assertEqual(str(y),
+r'''RUN --mount=type=cache,target=/var/cache/yum,sharing=locked --mount=type=cache,target=/var/cache/dnf,sharing=locked yum install -y epel-release && \
+    yum install -y --setopt=keepcache=1 \
+        gcc''')
+
+    @x86_64
+    @centos
+    @bash
+    def test_cache_bash(self):
+        """Package cache is ignored for bash"""
+        y = yum(cache=True, ospackages=['gcc'])
+        self.assertEqual(str(y),
+r'''yum install -y \
+        gcc
+rm -rf /var/cache/yum/*''')